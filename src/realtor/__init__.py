@@ -1,10 +1,28 @@
 from __future__ import annotations
 
-import flet as ft
+import logging
 
-from .app import main as app_main
+logger = logging.getLogger(__name__)
 
 
 def main() -> None:
+    # Imported here so `import realtor` (and every CLI or worker that only needs a submodule)
+    # does not load flet, pymongo or the parser
+    import flet as ft
+
+    from .app import main as app_main
+    from .db import ensure_indexes
+    from .metrics import configure_from_settings
+    from .parser import get_parser_pool
+
+    logging.basicConfig(level=logging.INFO)
+    configure_from_settings()
+    # Start the parser workers (each loads the spaCy pipeline once) so the first parse is not a cold start
+    get_parser_pool().warm()
+    try:
+        ensure_indexes()
+    except RuntimeError as e:
+        # The UI still starts and reports Mongo errors per action
+        logger.warning("Skipping index creation: %s", e)
     # Launch Flet in web browser
     ft.app(target=app_main, view=ft.WEB_BROWSER)
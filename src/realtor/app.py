@@ -1,11 +1,29 @@
 from __future__ import annotations
 
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict
+
 import flet as ft
 from flet import Icon
 
-from .db import save_raw_description, save_property_data, list_recent
-from .models import PropertyData
-from .parser import parse_free_text_to_structured
+from . import metrics
+from .config import settings
+from .db import find_near_duplicates, save_listing, query_listings
+from .parser import ParserPoolFull, get_parser_pool, merge_segment_results, split_segments
+from .search import search_listings
+
+# Shared by every session: the pool sizes cap concurrent parses / Mongo calls server-wide, so one
+# heavy user queues behind everyone else instead of starving them. Parses go to the process pool
+# in realtor.parser (get_parser_pool), which is also what batch jobs use.
+_DB_POOL = ThreadPoolExecutor(max_workers=settings.ui_db_workers, thread_name_prefix="realtor-db")
+
+HISTORY_PAGE_SIZE = 25
+# Live parsing waits for a pause in typing, then re-parses only sentences it has not seen yet
+LIVE_PARSE_DEBOUNCE_SECONDS = 0.6
+LIVE_SEGMENT_CACHE_SIZE = 256
 
 
 def _spacer(height: int = 10) -> ft.Control:
@@ -19,6 +37,15 @@ def main(page: ft.Page) -> None:
 
     # State
     parsed_data: dict | None = None
+    # The in-flight parse for this session; bumping the generation marks a running parse as stale
+    parse_state: Dict[str, Any] = {"generation": 0, "future": None}
+    # Parser output that has no form field: every phone number found and the parser version
+    parsed_extras: Dict[str, Any] = {"phones": [], "parser_version": None}
+    # Live mode: the latest keystroke's generation wins; per-sentence results are kept for this session
+    live_state: Dict[str, Any] = {"generation": 0, "segments": OrderedDict()}
+    # Paths of the form fields the agent has typed into (saved as edited_fields); parses, manual or
+    # live, never overwrite them, and neither does realtor-reparse once saved
+    dirty_fields: set = set()
 
     # Controls
     description_input = ft.TextField(
@@ -79,89 +106,332 @@ def main(page: ft.Page) -> None:
 
     property_photos_picker.on_result = on_photos_selected
 
-    # History
-    history_list = ft.ListView(expand=True, spacing=6, padding=0)
+    # History: keyset-paginated, loaded a page at a time as the list is scrolled
+    history_state: Dict[str, Any] = {"cursor": None, "exhausted": False, "loading": False, "filters": {}}
 
-    def refresh_history() -> None:
-        history_list.controls.clear()
+    def history_tile(item: dict) -> ft.Control:
+        addr = item.get("address") or {}
+        addr_str = ", ".join(
+            [
+                x
+                for x in [addr.get("street"), addr.get("city"), addr.get("state"), addr.get("postal_code")]
+                if x
+            ]
+        )
+        return ft.ListTile(
+            title=ft.Text(item.get("contact_name") or "(unknown seller)"),
+            subtitle=ft.Text(addr_str or "(no address)"),
+            trailing=ft.Text(str(item.get("created_at") or "")),
+        )
+
+    async def load_history_page() -> None:
+        if history_state["loading"] or history_state["exhausted"]:
+            return
+        history_state["loading"] = True
         try:
-            recent = list_recent(limit=10)
-            for item in recent:
-                addr = item.get("address") or {}
-                addr_str = ", ".join(
-                    [
-                        x
-                        for x in [addr.get("street"), addr.get("city"), addr.get("state"), addr.get("postal_code")]
-                        if x
-                    ]
-                )
-                history_list.controls.append(
-                    ft.ListTile(
-                        title=ft.Text(item.get("seller_name") or "(unknown seller)"),
-                        subtitle=ft.Text(addr_str or "(no address)"),
-                        trailing=ft.Text(str(item.get("created_at") or "")),
-                    )
+            items, cursor = await asyncio.wrap_future(
+                _DB_POOL.submit(
+                    query_listings, HISTORY_PAGE_SIZE, history_state["cursor"], **history_state["filters"]
                 )
+            )
         except Exception as e:
             history_list.controls.append(ft.Text(f"History unavailable: {e}", color=ft.Colors.RED))
+            history_state["exhausted"] = True
+        else:
+            history_list.controls.extend(history_tile(item) for item in items)
+            history_state["cursor"] = cursor
+            history_state["exhausted"] = cursor is None
+        finally:
+            history_state["loading"] = False
+        page.update()
+
+    async def on_history_scroll(e: ft.OnScrollEvent) -> None:
+        if e.max_scroll_extent - e.pixels < 300:
+            await load_history_page()
+
+    history_list = ft.ListView(expand=True, spacing=6, padding=0, on_scroll=on_history_scroll, on_scroll_interval=100)
+
+    filter_city = ft.TextField(label="City", width=180, dense=True)
+    filter_state = ft.TextField(label="State", width=90, dense=True)
+    filter_min_price = ft.TextField(label="Min price", width=130, dense=True)
+    filter_max_price = ft.TextField(label="Max price", width=130, dense=True)
+    filter_min_beds = ft.TextField(label="Min beds", width=100, dense=True)
+
+    def _number(field: ft.TextField) -> float | None:
+        value = (field.value or "").replace(",", "").replace("$", "").strip()
+        return float(value) if value else None
+
+    async def refresh_history(e: ft.ControlEvent | None = None) -> None:
+        try:
+            filters = {
+                "city": filter_city.value or None,
+                "state": filter_state.value or None,
+                "min_price": _number(filter_min_price),
+                "max_price": _number(filter_max_price),
+                "min_bedrooms": _number(filter_min_beds),
+            }
+        except ValueError:
+            page.snack_bar = ft.SnackBar(ft.Text("Price and bedroom filters must be numbers."), open=True)
+            page.update()
+            return
+        history_state.update(cursor=None, exhausted=False, filters={k: v for k, v in filters.items() if v is not None})
+        history_list.controls.clear()
+        with metrics.span("realtor_history_refresh"):
+            await load_history_page()
+            # Keep loading until the list can scroll (or there is nothing more), so on_scroll can fire
+            while not history_state["exhausted"] and len(history_list.controls) < 2 * HISTORY_PAGE_SIZE:
+                await load_history_page()
+
+    def prepend_history(item: dict) -> None:
+        # New rows go on top without re-querying; skip when a filter is active since it may not match
+        if not history_state["filters"]:
+            history_list.controls.insert(0, history_tile(item))
+
+    # Search: keyword query plus facet filters applied by clicking a facet value
+    search_state: Dict[str, Any] = {"filters": {}}
+    search_query = ft.TextField(label="Search listings", hint_text="e.g. pool garage Austin", expand=True)
+    search_results = ft.ListView(expand=True, spacing=6, padding=0)
+    search_facets = ft.Column(spacing=4)
+    search_summary = ft.Text("", size=12)
+
+    def facet_row(title: str, name: str | None, buckets: list) -> ft.Control:
+        def apply(value: Any):
+            async def handler(e: ft.ControlEvent) -> None:
+                search_state["filters"][name] = value
+                await run_search()
+            return handler
+
+        chips = [
+            ft.TextButton(f"{b['value']} ({b['count']})", on_click=apply(b["value"]) if name else None, disabled=name is None)
+            for b in buckets
+        ]
+        return ft.Row([ft.Text(f"{title}:", weight=ft.FontWeight.BOLD), *chips], wrap=True, spacing=2)
+
+    async def run_search(e: ft.ControlEvent | None = None) -> None:
+        try:
+            found = await asyncio.wrap_future(
+                _DB_POOL.submit(search_listings, search_query.value or "", 50, **search_state["filters"])
+            )
+        except Exception as ex:
+            search_summary.value = f"Search failed: {ex}"
+            page.update()
+            return
+        active = ", ".join(f"{k}={v}" for k, v in search_state["filters"].items())
+        search_summary.value = f"{found['total']} matching listings" + (f" (filters: {active})" if active else "")
+        search_results.controls = [history_tile(item) for item in found["results"]]
+        facets = found["facets"]
+        search_facets.controls = [
+            facet_row("Property type", "property_type", facets["property_type"]),
+            facet_row("City", "city", facets["city"]),
+            facet_row("Bedrooms", None, facets["bedrooms"]),
+            facet_row("Price", None, facets["price"]),
+        ]
         page.update()
 
+    async def clear_search_filters(e: ft.ControlEvent) -> None:
+        search_state["filters"] = {}
+        await run_search()
+
+    search_query.on_submit = run_search
+
+    form_fields: Dict[str, ft.TextField] = {
+        "contact_name": contact_name,
+        "email": email,
+        "phone": phone,
+        "address.street": street,
+        "address.city": city,
+        "address.state": state,
+        "address.postal_code": postal_code,
+        "address.country": country,
+        "price": price,
+        "bedrooms": bedrooms,
+        "bathrooms": bathrooms,
+        "square_feet": square_feet,
+        "lot_size": lot_size,
+        "year_built": year_built,
+        "property_type": property_type,
+        "amenities": amenities,
+        "parking": parking,
+        "hoa_fees": hoa_fees,
+        "notes": notes,
+    }
+
+    def mark_dirty(key: str):
+        def handler(e: ft.ControlEvent) -> None:
+            dirty_fields.add(key)
+        return handler
+
+    for key, field in form_fields.items():
+        field.on_change = mark_dirty(key)
+
     def populate_form(data: dict) -> None:
-        contact_name.value = data.get("contact_name") or ""
-        email.value = data.get("email") or ""
-        phone.value = data.get("phone") or ""
         addr = data.get("address") or {}
-        street.value = addr.get("street") or ""
-        #unit.value = addr.get("unit") or ""
-        city.value = addr.get("city") or ""
-        state.value = addr.get("state") or ""
-        postal_code.value = addr.get("postal_code") or ""
-        country.value = addr.get("country") or "US"
-        price.value = str(data.get("price") or "")
-        bedrooms.value = str(data.get("bedrooms") or "")
-        bathrooms.value = str(data.get("bathrooms") or "")
-        square_feet.value = str(data.get("square_feet") or "")
-        lot_size.value = str(data.get("lot_size") or "")
-        year_built.value = str(data.get("year_built") or "")
-        property_type.value = data.get("property_type") or ""
-        amenities.value = ", ".join(data.get("amenities") or [])
-        parking.value = data.get("parking") or ""
-        hoa_fees.value = str(data.get("hoa_fees") or "")
-        notes.value = data.get("notes") or ""
-
-    def handle_parse(e: ft.ControlEvent) -> None:
+        values = {
+            "contact_name": data.get("contact_name") or "",
+            "email": data.get("email") or "",
+            "phone": data.get("phone") or "",
+            "address.street": addr.get("street") or "",
+            #"address.unit": addr.get("unit") or "",
+            "address.city": addr.get("city") or "",
+            "address.state": addr.get("state") or "",
+            "address.postal_code": addr.get("postal_code") or "",
+            "address.country": addr.get("country") or "US",
+            "price": str(data.get("price") or ""),
+            "bedrooms": str(data.get("bedrooms") or ""),
+            "bathrooms": str(data.get("bathrooms") or ""),
+            "square_feet": str(data.get("square_feet") or ""),
+            "lot_size": str(data.get("lot_size") or ""),
+            "year_built": str(data.get("year_built") or ""),
+            "property_type": data.get("property_type") or "",
+            "amenities": ", ".join(data.get("amenities") or []),
+            "parking": data.get("parking") or "",
+            "hoa_fees": str(data.get("hoa_fees") or ""),
+            "notes": data.get("notes") or "",
+        }
+        for key, value in values.items():
+            if key not in dirty_fields:
+                form_fields[key].value = value
+        parsed_extras.update(phones=data.get("phones") or [], parser_version=data.get("parser_version"))
+
+    def set_busy(message: str | None) -> None:
+        busy_ring.visible = message is not None
+        busy_text.value = message or ""
+        parse_btn.disabled = parse_state["future"] is not None
+        save_btn.disabled = message == "Saving..."
+
+    def cancel_pending_parse() -> None:
+        parse_state["generation"] += 1
+        future = parse_state["future"]
+        if future is not None:
+            # Only succeeds while still queued; a running parse finishes and is discarded as stale
+            future.cancel()
+
+    def on_description_change(e: ft.ControlEvent) -> None:
+        if parse_state["future"] is not None:
+            cancel_pending_parse()
+        if live_switch.value:
+            live_state["generation"] += 1
+            page.run_task(live_parse, live_state["generation"])
+
+    async def live_parse(generation: int) -> None:
+        # Debounce: only the task started by the last keystroke gets past the sleep
+        await asyncio.sleep(LIVE_PARSE_DEBOUNCE_SECONDS)
+        if generation != live_state["generation"] or not live_switch.value:
+            return
+        segments = split_segments(description_input.value or "")
+        cache: OrderedDict = live_state["segments"]
+        # Hits are copied out before the await: an older task finishing meanwhile may evict them
+        parsed = {s: cache[s] for s in segments if s in cache}
+        missing = [s for s in dict.fromkeys(segments) if s not in parsed]
+        if missing:
+            pool = get_parser_pool()
+            try:
+                # One task for all changed sentences; a busy pool skips this round, the next pause retries
+                future = pool.submit_batch(missing, block=False)
+            except ParserPoolFull:
+                return
+            try:
+                results = await asyncio.wait_for(asyncio.wrap_future(future), pool.task_timeout)
+            except Exception:
+                return  # live results are best-effort; "Parse details" reports errors
+            parsed.update(zip(missing, results))
+        for segment, data in parsed.items():
+            cache[segment] = data
+            cache.move_to_end(segment)
+        # Eviction starts at the oldest entries and never reaches this text's segments, even when
+        # there are more of them than the cache size
+        while len(cache) > max(LIVE_SEGMENT_CACHE_SIZE, len(parsed)):
+            cache.popitem(last=False)
+        if generation != live_state["generation"]:
+            return
+        populate_form(merge_segment_results(parsed[s] for s in segments))
+        page.update()
+
+    def on_live_toggle(e: ft.ControlEvent) -> None:
+        if live_switch.value and (description_input.value or "").strip():
+            live_state["generation"] += 1
+            page.run_task(live_parse, live_state["generation"])
+
+    async def check_duplicates(text: str, generation: int) -> None:
+        try:
+            matches = await asyncio.wrap_future(_DB_POOL.submit(find_near_duplicates, text))
+        except Exception:
+            matches = []  # the warning is advisory; never block parsing on it
+        if generation != parse_state["generation"]:
+            return
+        labels = []
+        for m in matches:
+            listing = m["listing"] or {}
+            addr = listing.get("address") or {}
+            who = listing.get("contact_name") or addr.get("street") or m["raw_id"]
+            saved = listing.get("created_at")
+            when = f", saved {saved:%Y-%m-%d}" if isinstance(saved, datetime) else ""
+            labels.append(f"{who}{when} ({m['similarity']:.0%} similar)")
+        duplicate_warning.value = "Possible duplicate of " + "; ".join(labels) if labels else ""
+        duplicate_warning.visible = bool(labels)
+        page.update()
+
+    async def handle_parse(e: ft.ControlEvent) -> None:
         text = (description_input.value or "").strip()
         if not text:
             page.snack_bar = ft.SnackBar(ft.Text("Please enter a description to parse."), open=True)
             page.update()
             return
+        cancel_pending_parse()
+        generation = parse_state["generation"]
+        pool = get_parser_pool()
         try:
-            data = parse_free_text_to_structured(text)
-            populate_form(data)
-            page.snack_bar = ft.SnackBar(ft.Text("Parsed details. Please review and edit if needed."), open=True)
+            # Never block the event loop waiting for a slot; a saturated pool is reported instead
+            future = pool.submit(text, block=False)
+        except ParserPoolFull:
+            page.snack_bar = ft.SnackBar(ft.Text("The parser is busy. Please try again in a moment."), open=True)
+            page.update()
+            return
+        parse_state["future"] = future
+        set_busy("Parsing...")
+        page.update()
+        try:
+            data = await asyncio.wait_for(asyncio.wrap_future(future), pool.task_timeout)
+            if generation == parse_state["generation"]:
+                populate_form(data)
+                page.snack_bar = ft.SnackBar(ft.Text("Parsed details. Please review and edit if needed."), open=True)
+                page.run_task(check_duplicates, text, generation)
+        except asyncio.CancelledError:
+            pass
+        except TimeoutError:
+            if generation == parse_state["generation"]:
+                page.snack_bar = ft.SnackBar(ft.Text("Parsing took too long and was abandoned."), open=True)
         except Exception as ex:
-            page.snack_bar = ft.SnackBar(ft.Text(f"Parse failed: {ex}"), open=True)
+            if generation == parse_state["generation"]:
+                page.snack_bar = ft.SnackBar(ft.Text(f"Parse failed: {ex}"), open=True)
+        finally:
+            if parse_state["future"] is future:
+                parse_state["future"] = None
+                set_busy(None)
         page.update()
 
     def handle_reset(e: ft.ControlEvent) -> None:
+        cancel_pending_parse()
+        live_state["generation"] += 1
         description_input.value = ""
+        duplicate_warning.visible = False
+        dirty_fields.clear()
         populate_form({})
         page.update()
 
-    def handle_save(e: ft.ControlEvent) -> None:
+    async def handle_save(e: ft.ControlEvent) -> None:
         text = (description_input.value or "").strip()
         if not text:
             page.snack_bar = ft.SnackBar(ft.Text("Please enter a description before saving."), open=True)
             page.update()
             return
         try:
-            raw_id = save_raw_description(text)
             # Build structured dict from form
             structured = {
-                "description_raw_id": raw_id,
                 "contact_name": (contact_name.value or None),
                 "email": (email.value or None),
                 "phone": (phone.value or None),
+                "phones": list(parsed_extras["phones"]),
                 "address": {
                     "street": (street.value or None),
                     #"unit": (unit.value or None),
@@ -182,19 +452,34 @@ def main(page: ft.Page) -> None:
                 "hoa_fees": float(hoa_fees.value) if hoa_fees.value else None,
                 "notes": (notes.value or None),
                 "photos": [f.name for f in (property_photos_picker.result.files or [])] if property_photos_picker.result else [],
+                "parser_version": parsed_extras["parser_version"],
+                "edited_fields": sorted(dirty_fields),
             }
-            # Validate with Pydantic
-            _ = PropertyData(**structured)
-            save_property_data(structured)
+            set_busy("Saving...")
+            page.update()
+            raw_id, structured_id = await asyncio.wrap_future(_DB_POOL.submit(save_listing, text, structured))
             page.snack_bar = ft.SnackBar(ft.Text("Saved raw and structured documents."), open=True)
-            refresh_history()
+            prepend_history(
+                {
+                    **structured,
+                    "id": structured_id,
+                    "description_raw_id": raw_id,
+                    "created_at": datetime.now(timezone.utc),
+                }
+            )
         except Exception as ex:
             page.snack_bar = ft.SnackBar(ft.Text(f"Save failed: {ex}"), open=True)
+        set_busy(None)
         page.update()
 
     parse_btn = ft.ElevatedButton("Parse details", icon=ft.Icon(name="play_arrow"), on_click=handle_parse)
     reset_btn = ft.OutlinedButton("Reset", icon=ft.Icon(name="clear"), on_click=handle_reset)
     save_btn = ft.FilledButton("Save both", icon=ft.Icon(name="save"), on_click=handle_save)
+    busy_ring = ft.ProgressRing(width=18, height=18, stroke_width=2, visible=False)
+    busy_text = ft.Text("", size=12)
+    duplicate_warning = ft.Text("", color=ft.Colors.ORANGE, visible=False)
+    live_switch = ft.Switch(label="Live parse", value=False, on_change=on_live_toggle)
+    description_input.on_change = on_description_change
 
     form_grid = ft.ResponsiveRow([
         ft.Column([contact_name, email, phone], col={"xs": 12, "sm": 6}),
@@ -217,7 +502,11 @@ def main(page: ft.Page) -> None:
                 content=ft.Container(
                     content=ft.Column([
                         description_input,
-                        ft.Row([parse_btn, reset_btn, save_btn], alignment=ft.MainAxisAlignment.START),
+                        ft.Row(
+                            [parse_btn, reset_btn, save_btn, live_switch, busy_ring, busy_text],
+                            alignment=ft.MainAxisAlignment.START,
+                        ),
+                        duplicate_warning,
                         _spacer(),
                         ft.Text("Parsed details (review & edit):", weight=ft.FontWeight.BOLD),
                         form_grid,
@@ -228,12 +517,46 @@ def main(page: ft.Page) -> None:
             ),
             ft.Tab(
                 text="History",
-                content=ft.Container(content=history_list, padding=20),
+                content=ft.Container(
+                    content=ft.Column([
+                        ft.Row(
+                            [
+                                filter_city,
+                                filter_state,
+                                filter_min_price,
+                                filter_max_price,
+                                filter_min_beds,
+                                ft.OutlinedButton("Apply", icon=ft.Icon(name="filter_list"), on_click=refresh_history),
+                            ],
+                            wrap=True,
+                        ),
+                        history_list,
+                    ], expand=True),
+                    padding=20,
+                    expand=True,
+                ),
+            ),
+            ft.Tab(
+                text="Search",
+                content=ft.Container(
+                    content=ft.Column([
+                        ft.Row([
+                            search_query,
+                            ft.FilledButton("Search", icon=ft.Icon(name="search"), on_click=run_search),
+                            ft.OutlinedButton("Clear filters", on_click=clear_search_filters),
+                        ]),
+                        search_summary,
+                        search_facets,
+                        search_results,
+                    ], expand=True),
+                    padding=20,
+                    expand=True,
+                ),
             ),
         ],
         expand=1,
     )
 
     page.add(layout)
-    refresh_history()
+    page.run_task(refresh_history)
 
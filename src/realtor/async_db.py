@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+import weakref
+from typing import Any, Dict, List, Tuple
+
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.errors import ServerSelectionTimeoutError
+
+from .config import settings
+from .db import HISTORY_SORT, RECENT_PROJECTION, client_options, connection_error, raw_document, recent_item, structured_document
+
+# Async counterpart of realtor.db for event-loop callers (Flet sessions, import workers). The client
+# is bound to the loop that created it, so one is kept per running loop. Keyed weakly on the loop
+# itself: an id() can be reused by a new loop once the old one is garbage collected.
+_CLIENTS: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncMongoClient] = weakref.WeakKeyDictionary()
+# Coroutines on one loop that all find no client wait here, so only the first creates and pings one
+_CLIENT_LOCKS: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock] = weakref.WeakKeyDictionary()
+
+
+async def _get_client() -> AsyncMongoClient:
+    loop = asyncio.get_running_loop()
+    client = _CLIENTS.get(loop)
+    if client is not None:
+        return client
+
+    async with _CLIENT_LOCKS.setdefault(loop, asyncio.Lock()):
+        client = _CLIENTS.get(loop)
+        if client is not None:
+            return client
+        client = AsyncMongoClient(settings.mongo_uri, **client_options())
+        # Touch server to fail fast if unavailable
+        try:
+            await client.admin.command("ping")
+        except ServerSelectionTimeoutError as e:
+            await client.close()
+            raise connection_error() from e
+        _CLIENTS[loop] = client
+    return client
+
+
+async def _get_collection(name: str) -> AsyncCollection:
+    client = await _get_client()
+    return client[settings.db_name][name]
+
+
+async def collections() -> Tuple[AsyncCollection, AsyncCollection]:
+    raw = await _get_collection(settings.collection_raw)
+    structured = await _get_collection(settings.collection_structured)
+    return raw, structured
+
+
+async def close() -> None:
+    client = _CLIENTS.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+
+async def save_raw_description(text: str) -> str:
+    raw_col, _ = await collections()
+    res = await raw_col.insert_one(raw_document(text))
+    return str(res.inserted_id)
+
+
+async def save_property_data(data: Dict[str, Any]) -> str:
+    _, structured_col = await collections()
+    res = await structured_col.insert_one(structured_document(data))
+    return str(res.inserted_id)
+
+
+async def list_recent(limit: int = 10) -> List[Dict[str, Any]]:
+    _, structured_col = await collections()
+    cursor = structured_col.find({}, RECENT_PROJECTION).sort(HISTORY_SORT).limit(limit)
+    return [recent_item(doc) async for doc in cursor]
@@ -0,0 +1,400 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+import timeit
+import tracemalloc
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from .gazetteer import STATE_NAMES, normalize_address
+from .keywords import KeywordMatcher, tokenize
+from .parser import (
+    ACRES_RE,
+    AMENITY_KEYWORDS,
+    BATH_RE,
+    BED_RE,
+    CURRENCY_RE,
+    EMAIL_RE,
+    HOA_RE,
+    LOT_SQFT_RE,
+    PROPERTY_TYPES,
+    SQFT_RE,
+    YEAR_BUILT_RE,
+    _peak_rss_bytes,
+    _price_from,
+    _tag_address_window,
+    extract_address,
+    extract_contact_name,
+    extract_phones,
+    get_nlp,
+    parse_free_text_to_structured,
+    scan_text,
+)
+
+if TYPE_CHECKING:
+    import spacy
+
+LISTING_PARAGRAPH = (
+    "Jane Smith is selling a renovated single family home at 742 Evergreen Terrace, Springfield, IL 62704. "
+    "Asking $489,000 with 4 bedrooms and 3 bathrooms, roughly 2,450 sqft on 0.3 acres. Built in 1987, "
+    "new roof in 2019. HOA fees $85 per month. The kitchen has granite counters and stainless appliances, "
+    "hardwood floors throughout, a fireplace in the living room and central air. Fenced back yard with a "
+    "deck and garden, two-car garage. Call (217) 555-0134 or email jane.smith@example.com for a showing. "
+)
+
+
+def _legacy_scan(text: str) -> Dict[str, Any]:
+    # The per-field re.search / text.lower() calls the single-pass scanner replaced; each keyword
+    # extractor lowered the text once
+    lower = text.lower()
+    return {
+        "email": EMAIL_RE.search(text),
+        "currency": CURRENCY_RE.search(text),
+        "bedrooms": BED_RE.search(text),
+        "bathrooms": BATH_RE.search(text),
+        "square_feet": SQFT_RE.search(text),
+        "year_built": YEAR_BUILT_RE.search(text),
+        "hoa_fees": HOA_RE.search(text),
+        "lot_size": ACRES_RE.search(text) or LOT_SQFT_RE.search(text),
+        "property_type": next((t for t in PROPERTY_TYPES if t in lower), None),
+        "amenities": [kw for kw in AMENITY_KEYWORDS if kw in lower],
+        "parking": "garage" if "garage" in lower else ("carport" if "carport" in lower else None),
+    }
+
+
+def extraction_microbench(paragraphs: int = 50, number: int = 200) -> Dict[str, float]:
+    # Fields are typically found in the first paragraph, so pad the tail with filler to model a
+    # long listing whose later text still has to be scanned for keywords.
+    text = LISTING_PARAGRAPH + ("Lovely neighborhood with parks and shops nearby. " * 8) * paragraphs
+    legacy = min(timeit.repeat(lambda: _legacy_scan(text), number=number, repeat=3)) / number
+    single = min(timeit.repeat(lambda: scan_text(text), number=number, repeat=3)) / number
+    return {
+        "chars": float(len(text)),
+        "legacy_us": legacy * 1e6,
+        "single_pass_us": single * 1e6,
+        "speedup": legacy / single if single else 0.0,
+    }
+
+
+def phone_microbench(paragraphs: int = 50, number: int = 50) -> Dict[str, float]:
+    # Running PhoneNumberMatcher over the whole text vs. only over the candidate digit runs
+    import phonenumbers
+
+    text = LISTING_PARAGRAPH + ("Lovely neighborhood with parks and shops nearby. " * 8) * paragraphs
+    full = min(
+        timeit.repeat(lambda: list(phonenumbers.PhoneNumberMatcher(text, "US")), number=number, repeat=3)
+    ) / number
+    fast = min(timeit.repeat(lambda: extract_phones(text), number=number, repeat=3)) / number
+    return {
+        "chars": float(len(text)),
+        "matcher_us": full * 1e6,
+        "fast_path_us": fast * 1e6,
+        "speedup": full / fast if fast else 0.0,
+    }
+
+
+def keyword_microbench(vocab_size: int, paragraphs: int = 10, number: int = 50) -> Dict[str, float]:
+    # Substring scans cost O(terms x text); the matcher should stay flat as the vocabulary grows
+    terms = list(AMENITY_KEYWORDS) + [f"amenity term {i}" for i in range(max(0, vocab_size - len(AMENITY_KEYWORDS)))]
+    matcher = KeywordMatcher((t, t) for t in terms)
+    text = LISTING_PARAGRAPH + ("Lovely neighborhood with parks and shops nearby. " * 8) * paragraphs
+    substring = min(timeit.repeat(lambda: [t for t in terms if t in text.lower()], number=number, repeat=3)) / number
+    matched = min(timeit.repeat(lambda: matcher.find_all(tokenize(text)), number=number, repeat=3)) / number
+    return {
+        "terms": float(len(terms)),
+        "substring_us": substring * 1e6,
+        "matcher_us": matched * 1e6,
+        "speedup": substring / matched if matched else 0.0,
+    }
+
+
+# Synthetic golden corpus: listings are generated from field values, so the labels are exact.
+# Phone numbers use the 555-01xx range reserved for fiction, which libphonenumber still accepts.
+_NAMES = ["Jane Smith", "Carlos Rivera", "Priya Patel", "Michael Chen", "Aisha Johnson", "Tom O'Brien", "Laura Kim"]
+_STREETS = ["742 Evergreen Terrace", "12 Oak St", "1600 Maple Ave", "88 Harbor View Dr", "305 Pine Rd", "47 Elm Ct"]
+_PLACES = [
+    ("Springfield", "IL", "62704", "217"),
+    ("Austin", "TX", "78701", "512"),
+    ("Denver", "CO", "80203", "303"),
+    ("Boston", "MA", "02116", "617"),
+    ("Portland", "OR", "97205", "503"),
+    ("Columbus", "OH", "43215", "614"),
+]
+_BENCH_TYPES = ["single family", "condo", "townhouse", "duplex", "apartment"]
+_BENCH_AMENITIES = ["pool", "fireplace", "hardwood", "deck", "patio", "balcony", "gym", "basement", "granite", "stainless"]
+_FILLER = [
+    "Lovely neighborhood with parks and shops nearby.",
+    "The owners have kept the place in great shape over the years.",
+    "Plenty of natural light in the mornings and quiet evenings.",
+    "Schools, restaurants and the farmers market are a short walk away.",
+    "Recent updates include new paint and refreshed landscaping.",
+    "Showings can be arranged most weekdays after work.",
+]
+SIZE_CLASSES = ("short", "medium", "long")
+STAGES = ("spacy", "usaddress", "gazetteer", "phonenumbers", "regex", "total")
+
+
+def _phone(area: str, rng: random.Random) -> Tuple[str, str]:
+    line = f"01{rng.randint(0, 99):02d}"
+    shown = rng.choice([f"({area}) 555-{line}", f"{area}-555-{line}", f"{area}.555.{line}"])
+    return shown, f"+1{area}555{line}"
+
+
+def generate_listing(size: str, rng: random.Random) -> Dict[str, Any]:
+    name = rng.choice(_NAMES)
+    street = rng.choice(_STREETS)
+    city, state, zip_code, area = rng.choice(_PLACES)
+    ptype = rng.choice(_BENCH_TYPES)
+    beds, baths = rng.randint(1, 6), rng.choice([1, 1.5, 2, 2.5, 3])
+    price = rng.randrange(150_000, 1_500_000, 1000)
+    phone_shown, phone = _phone(area, rng)
+    # Some listings spell the state out, which the gazetteer normalizes back to the postal code
+    address = f"{street}, {city}, {STATE_NAMES[state] if rng.random() < 0.3 else state} {zip_code}"
+    labels: Dict[str, Any] = {
+        "phone": phone,
+        "phones": [phone],
+        "address.street": street,
+        "address.city": city,
+        "address.state": state,
+        "address.postal_code": zip_code,
+        "price": float(price),
+        "bedrooms": float(beds),
+        "bathrooms": float(baths),
+        "property_type": ptype,
+    }
+    if size == "short":
+        text = f"{ptype.capitalize()} at {address}. {beds} beds, {baths} baths, ${price:,}. Call {phone_shown}."
+        return {"size": size, "text": text, "labels": labels}
+
+    sqft, year, hoa = rng.randrange(600, 5000, 10), rng.randint(1900, 2023), rng.randrange(50, 600, 5)
+    amenities = sorted(rng.sample(_BENCH_AMENITIES, 3))
+    email = name.lower().replace(" ", ".").replace("'", "") + "@example.com"
+    labels.update(
+        {
+            "contact_name": name,
+            "email": email,
+            "square_feet": float(sqft),
+            "year_built": year,
+            "hoa_fees": float(hoa),
+            "amenities": sorted(amenities + ["garage"]),
+            "parking": "garage",
+        }
+    )
+    body = (
+        f"{name} is selling a {ptype} at {address}. Asking ${price:,} with {beds} bedrooms and {baths} bathrooms, "
+        f"about {sqft:,} sqft. Built in {year}. HOA fees ${hoa} per month. "
+        f"Features {amenities[0]}, {amenities[1]} and {amenities[2]}, plus a two-car garage."
+    )
+    contact = f"Call {phone_shown} or email {email} to schedule a visit."
+    if size == "medium":
+        text = f"{body} {contact}"
+    else:
+        # Several KB of filler between the listing and the contact line, so extractors that scan the
+        # whole text (or stop early) show up in the numbers
+        filler = " ".join(rng.choice(_FILLER) for _ in range(60))
+        office_shown, office = _phone(area, rng)
+        labels["phones"] = list(dict.fromkeys([phone, office]))
+        text = f"{body} {filler} {contact} Office: {office_shown}."
+    return {"size": size, "text": text, "labels": labels}
+
+
+def generate_corpus(per_size: int = 50, seed: int = 7) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [generate_listing(size, rng) for size in SIZE_CLASSES for _ in range(per_size)]
+
+
+def read_corpus(path: str) -> List[Dict[str, Any]]:
+    # JSONL records with "text", "labels" and an optional "size"; see generate_listing for label keys
+    with open(path, encoding="utf-8") as f:
+        return [{"size": "custom", **json.loads(line)} for line in f if line.strip()]
+
+
+def _field(data: Dict[str, Any], key: str) -> Any:
+    if key.startswith("address."):
+        return (data.get("address") or {}).get(key.split(".", 1)[1])
+    if key == "phones":
+        return [p["number"] for p in data.get("phones") or []]
+    return data.get(key)
+
+
+def _matches(expected: Any, actual: Any) -> bool:
+    if isinstance(expected, (int, float)) and not isinstance(expected, bool):
+        return isinstance(actual, (int, float)) and abs(actual - expected) < 0.01
+    if isinstance(expected, list):
+        return sorted(str(x).lower() for x in actual or []) == sorted(str(x).lower() for x in expected)
+    return isinstance(actual, str) and actual.strip().lower() == str(expected).strip().lower()
+
+
+def field_accuracy(corpus: Iterable[Dict[str, Any]], results: Iterable[Dict[str, Any]]) -> Dict[str, float]:
+    correct: Dict[str, int] = defaultdict(int)
+    total: Dict[str, int] = defaultdict(int)
+    for item, data in zip(corpus, results):
+        for key, expected in item["labels"].items():
+            total[key] += 1
+            correct[key] += _matches(expected, _field(data, key))
+    return {key: correct[key] / total[key] for key in sorted(total)}
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] if ordered else 0.0
+
+
+def corpus_bench(corpus: List[Dict[str, Any]], nlp: spacy.Language) -> Dict[str, Any]:
+    # Per-extractor timings call each stage the way _structured_from_doc does; "total" is the public
+    # entry point with an explicit nlp, which bypasses the parse cache. The two passes each start with
+    # a cold address-tagger cache so neither warms it for the other.
+    timings: Dict[Tuple[str, str], List[float]] = defaultdict(list)
+    _tag_address_window.cache_clear()
+    for item in corpus:
+        text, size = item["text"], item["size"]
+        started = time.perf_counter()
+        doc = nlp(text)
+        extract_contact_name(doc)
+        _price_from(doc, None)
+        t_spacy = time.perf_counter()
+        address = extract_address(text, doc)
+        t_address = time.perf_counter()
+        normalize_address(address)
+        t_gazetteer = time.perf_counter()
+        extract_phones(text)
+        t_phone = time.perf_counter()
+        scan_text(text)
+        t_regex = time.perf_counter()
+        for stage, elapsed in zip(
+            STAGES,
+            (t_spacy - started, t_address - t_spacy, t_gazetteer - t_address, t_phone - t_gazetteer, t_regex - t_phone),
+        ):
+            timings[(size, stage)].append(elapsed)
+
+    results: List[Dict[str, Any]] = []
+    _tag_address_window.cache_clear()
+    for item in corpus:
+        started = time.perf_counter()
+        results.append(parse_free_text_to_structured(item["text"], nlp=nlp))
+        timings[(item["size"], "total")].append(time.perf_counter() - started)
+
+    sizes = list(dict.fromkeys(item["size"] for item in corpus))
+    latency = {
+        (size, stage): {
+            "p50_ms": _percentile(samples, 0.5) * 1000,
+            "p95_ms": _percentile(samples, 0.95) * 1000,
+        }
+        for (size, stage), samples in timings.items()
+    }
+    throughput: Dict[str, float] = {}
+    peak_kib: Dict[str, float] = {}
+    chars: Dict[str, float] = {}
+    for size in sizes:
+        items = [item for item in corpus if item["size"] == size]
+        totals = timings[(size, "total")]
+        throughput[size] = len(totals) / sum(totals) if sum(totals) else 0.0
+        chars[size] = sum(len(item["text"]) for item in items) / len(items)
+        # Separate pass: tracemalloc slows allocation down too much to share with the timed run
+        _tag_address_window.cache_clear()
+        tracemalloc.start()
+        for item in items:
+            parse_free_text_to_structured(item["text"], nlp=nlp)
+        peak_kib[size] = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    return {
+        "sizes": sizes,
+        "chars": chars,
+        "latency": latency,
+        "throughput": throughput,
+        "peak_kib": peak_kib,
+        "accuracy": field_accuracy(corpus, results),
+        "peak_rss_bytes": _peak_rss_bytes(),
+    }
+
+
+def print_corpus_report(report: Dict[str, Any]) -> None:
+    print(f"{'size':>8} {'chars':>7} {'stage':>13} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+    for size in report["sizes"]:
+        for stage in STAGES:
+            r = report["latency"][(size, stage)]
+            print(f"{size:>8} {int(report['chars'][size]):>7} {stage:>13} {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f}")
+    print()
+    print(f"{'size':>8} {'docs/s':>9} {'peak alloc (KiB)':>17}")
+    for size in report["sizes"]:
+        print(f"{size:>8} {report['throughput'][size]:>9.1f} {report['peak_kib'][size]:>17.1f}")
+    if report["peak_rss_bytes"]:
+        print(f"peak RSS: {report['peak_rss_bytes'] / 2**20:.1f} MiB")
+    print()
+    print(f"{'field':>20} {'accuracy':>9}")
+    for key, value in report["accuracy"].items():
+        print(f"{key:>20} {value:>8.1%}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(prog="realtor-bench", description="Parser benchmarks.")
+    ap.add_argument(
+        "suite",
+        nargs="?",
+        choices=("corpus", "micro"),
+        default="corpus",
+        help="corpus: per-extractor latency, throughput, memory and field accuracy (default); "
+        "micro: regex, phone and keyword matcher micro-benchmarks",
+    )
+    ap.add_argument("--per-size", type=int, default=50, help="Generated listings per size class (default: 50)")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--corpus", help="Labelled JSONL corpus to use instead of the generated one")
+    ap.add_argument("--dump-corpus", help="Write the generated corpus as JSONL and exit")
+    ap.add_argument("--model", help="spaCy model (default: SPACY_MODEL)")
+    ap.add_argument("--blank", action="store_true", help="Use a blank English pipeline (no NER; contact_name is skipped)")
+    ap.add_argument(
+        "--min-accuracy",
+        type=float,
+        help="Exit non-zero if any field's accuracy falls below this fraction",
+    )
+    ap.add_argument("--paragraphs", type=int, nargs="+", default=[0, 10, 100])
+    ap.add_argument("--number", type=int, default=200)
+    ap.add_argument("--vocab-sizes", type=int, nargs="+", default=[20, 1000, 10000])
+    args = ap.parse_args(argv)
+
+    if args.suite == "corpus":
+        corpus = read_corpus(args.corpus) if args.corpus else generate_corpus(args.per_size, args.seed)
+        if args.dump_corpus:
+            with open(args.dump_corpus, "w", encoding="utf-8") as f:
+                for item in corpus:
+                    f.write(json.dumps(item) + "\n")
+            return
+        if args.blank:
+            import spacy
+
+            nlp = spacy.blank("en")
+        else:
+            nlp = get_nlp(args.model)
+        if args.blank:
+            for item in corpus:
+                item["labels"].pop("contact_name", None)
+        report = corpus_bench(corpus, nlp)
+        print_corpus_report(report)
+        failing = {k: v for k, v in report["accuracy"].items() if args.min_accuracy is not None and v < args.min_accuracy}
+        if failing:
+            raise SystemExit(f"Accuracy below {args.min_accuracy:.0%}: " + ", ".join(f"{k}={v:.1%}" for k, v in failing.items()))
+        return
+
+    print(f"{'chars':>8} {'per-field (us)':>15} {'single-pass (us)':>17} {'speedup':>8}")
+    for paragraphs in args.paragraphs:
+        r = extraction_microbench(paragraphs, args.number)
+        print(f"{int(r['chars']):>8} {r['legacy_us']:>15.1f} {r['single_pass_us']:>17.1f} {r['speedup']:>7.2f}x")
+
+    print()
+    print(f"{'chars':>8} {'matcher (us)':>13} {'fast path (us)':>15} {'speedup':>8}")
+    for paragraphs in args.paragraphs:
+        r = phone_microbench(paragraphs)
+        print(f"{int(r['chars']):>8} {r['matcher_us']:>13.1f} {r['fast_path_us']:>15.1f} {r['speedup']:>7.2f}x")
+
+    print()
+    print(f"{'terms':>8} {'substring (us)':>15} {'matcher (us)':>13} {'speedup':>8}")
+    for vocab_size in args.vocab_sizes:
+        r = keyword_microbench(vocab_size)
+        print(f"{int(r['terms']):>8} {r['substring_us']:>15.1f} {r['matcher_us']:>13.1f} {r['speedup']:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
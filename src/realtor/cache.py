@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import copy
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from .config import settings
+
+if TYPE_CHECKING:
+    # The persistent tier is optional; pymongo is only needed once a collection is attached
+    from pymongo.collection import Collection
+    from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    # Whitespace-only edits (re-wrapped lines, trailing spaces) should hit the same entry
+    return " ".join(text.split())
+
+
+class ParseCache:
+    """Parse results keyed by a hash of the normalized text and the parser version.
+
+    The in-memory tier is an LRU bounded by entry count and TTL. The optional Mongo tier is shared
+    across processes; its entries are stamped with the parser version so results from an older
+    parser never match and are purged when the tier is attached.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600.0,
+        collection: Optional[Collection] = None,
+    ) -> None:
+        self.version = version
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.collection = collection
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self.counters = {"hits": 0, "misses": 0, "persistent_hits": 0, "evictions": 0, "persistent_errors": 0}
+        if collection is not None:
+            self.purge_stale()
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.version}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> Optional[Dict[str, Any]]:
+        key = self.key(text)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, result = entry
+                if now - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return copy.deepcopy(result)
+                del self._entries[key]
+        result = self._get_persistent(key)
+        with self._lock:
+            if result is None:
+                self.counters["misses"] += 1
+                return None
+            self.counters["persistent_hits"] += 1
+        self._put_memory(key, result)
+        return copy.deepcopy(result)
+
+    def put(self, text: str, result: Dict[str, Any]) -> None:
+        key = self.key(text)
+        result = copy.deepcopy(result)
+        self._put_memory(key, result)
+        if self.collection is not None:
+            from pymongo.errors import PyMongoError
+
+            try:
+                self.collection.replace_one(
+                    {"_id": key},
+                    {"parser_version": self.version, "result": result, "created_at": datetime.now(timezone.utc)},
+                    upsert=True,
+                )
+            except PyMongoError as e:
+                self._persistent_error(e)
+
+    def _put_memory(self, key: str, result: Dict[str, Any]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def _get_persistent(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.collection is None:
+            return None
+        from pymongo.errors import PyMongoError
+
+        try:
+            doc = self.collection.find_one({"_id": key, "parser_version": self.version}, {"result": 1})
+        except PyMongoError as e:
+            self._persistent_error(e)
+            return None
+        return doc["result"] if doc else None
+
+    def _persistent_error(self, e: PyMongoError) -> None:
+        # The persistent tier is an optimisation; a Mongo hiccup must never fail a parse
+        with self._lock:
+            self.counters["persistent_errors"] += 1
+        logger.warning("Parse cache persistence failed: %s", e)
+
+    def purge_stale(self) -> int:
+        if self.collection is None:
+            return 0
+        from pymongo.errors import PyMongoError
+
+        try:
+            return self.collection.delete_many({"parser_version": {"$ne": self.version}}).deleted_count
+        except PyMongoError as e:
+            self._persistent_error(e)
+            return 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.counters, "size": len(self._entries)}
+
+
+_CACHE: Optional[ParseCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_parse_cache(version: str) -> Optional[ParseCache]:
+    global _CACHE
+    if settings.parse_cache_size <= 0 and not settings.parse_cache_mongo:
+        return None
+    if _CACHE is not None and _CACHE.version == version:
+        return _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None or _CACHE.version != version:
+            collection = None
+            if settings.parse_cache_mongo:
+                from pymongo.errors import PyMongoError
+
+                from .db import _get_collection
+
+                try:
+                    collection = _get_collection(settings.collection_parse_cache)
+                    collection.create_index("created_at", expireAfterSeconds=settings.parse_cache_mongo_ttl_seconds)
+                except (RuntimeError, PyMongoError) as e:
+                    # Mongo unreachable: parse with the in-memory tier alone rather than fail every parse
+                    logger.warning("Parse cache Mongo tier unavailable, using memory only: %s", e)
+                    collection = None
+            _CACHE = ParseCache(
+                version,
+                max_entries=settings.parse_cache_size,
+                ttl_seconds=settings.parse_cache_ttl_seconds,
+                collection=collection,
+            )
+    return _CACHE
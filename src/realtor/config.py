@@ -1,21 +1,79 @@
 from __future__ import annotations
 
+import functools
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Any, Callable
 
-from dotenv import load_dotenv
 
-# Load .env if present
-load_dotenv()
+def _flag(value: str) -> bool:
+    return value.lower() in ("1", "true", "yes")
+
+
+def _env(name: str, default: str, cast: Callable[[str], Any] = str) -> Any:
+    # Read when a Settings instance is created (after .env is loaded), not when this module is imported
+    return field(default_factory=lambda: cast(os.getenv(name, default)))
 
 
 @dataclass(frozen=True)
 class Settings:
-    mongo_uri: str = os.getenv("MONGO_URI", "mongodb://localhost:27017/realtor")
-    db_name: str = os.getenv("MONGO_DB", "realtor")
-    collection_raw: str = os.getenv("MONGO_COLLECTION_RAW", "seller_description")
-    collection_structured: str = os.getenv("MONGO_COLLECTION_STRUCTURED", "property_data")
+    mongo_uri: str = _env("MONGO_URI", "mongodb://localhost:27017/realtor")
+    db_name: str = _env("MONGO_DB", "realtor")
+    collection_raw: str = _env("MONGO_COLLECTION_RAW", "seller_description")
+    collection_structured: str = _env("MONGO_COLLECTION_STRUCTURED", "property_data")
+    # Client knobs shared by the sync (realtor.db) and async (realtor.async_db) layers
+    mongo_max_pool_size: int = _env("MONGO_MAX_POOL_SIZE", "100", int)
+    mongo_min_pool_size: int = _env("MONGO_MIN_POOL_SIZE", "0", int)
+    mongo_server_selection_timeout_ms: int = _env("MONGO_SERVER_SELECTION_TIMEOUT_MS", "3000", int)
+    mongo_timeout_ms: int = _env("MONGO_TIMEOUT_MS", "0", int)  # per-operation budget; 0 = no limit
+    mongo_write_concern: str = _env("MONGO_WRITE_CONCERN", "1")  # "1", "majority", ...
+    spacy_model: str = _env("SPACY_MODEL", "en_core_web_sm")
+    # Load only the components the extractors read (NER); see realtor.parser.minimal_pipeline_exclude
+    spacy_minimal_pipeline: bool = _env("SPACY_MINIMAL_PIPELINE", "true", _flag)
+    # Extra keyword vocabularies (os.pathsep-separated file lists); see realtor.keywords.read_vocabulary
+    amenity_vocab_paths: str = _env("AMENITY_VOCAB_PATHS", "")
+    property_type_vocab_paths: str = _env("PROPERTY_TYPE_VOCAB_PATHS", "")
+    # Parse result cache: in-memory LRU (0 entries disables it) plus an optional Mongo tier
+    parse_cache_size: int = _env("PARSE_CACHE_SIZE", "1024", int)
+    parse_cache_ttl_seconds: float = _env("PARSE_CACHE_TTL_SECONDS", "3600", float)
+    parse_cache_mongo: bool = _env("PARSE_CACHE_MONGO", "false", _flag)
+    parse_cache_mongo_ttl_seconds: int = _env("PARSE_CACHE_MONGO_TTL_SECONDS", str(30 * 24 * 3600), int)
+    collection_parse_cache: str = _env("MONGO_COLLECTION_PARSE_CACHE", "parse_cache")
+    # Optional full ZIP -> (city, state) table for realtor.gazetteer (CSV or GeoNames US.txt); without
+    # it, ZIP codes are still checked against the built-in ZIP3 -> state ranges
+    gazetteer_zip_path: str = _env("GAZETTEER_ZIP_PATH", "")
+    # Near-duplicate detection: estimated Jaccard similarity of word shingles (see realtor.dedup)
+    dedup_threshold: float = _env("DEDUP_THRESHOLD", "0.8", float)
+    # Instrumentation sink: "" (off), "log", "prometheus" (served on METRICS_PORT at /metrics) or "memory"
+    metrics_sink: str = _env("METRICS_SINK", "")
+    metrics_port: int = _env("METRICS_PORT", "9464", int)
+    # Parser worker pool (realtor.parser.ParserPool), shared by the UI and batch jobs. Each worker
+    # process loads its own pipeline; PARSER_PROCESSES=false runs the workers as threads instead.
+    parser_workers: int = _env("PARSER_WORKERS", str(min(4, os.cpu_count() or 1)), int)
+    parser_max_pending: int = _env("PARSER_MAX_PENDING", "0", int)  # 0 = 4 x workers
+    parser_task_timeout_seconds: float = _env("PARSER_TASK_TIMEOUT_SECONDS", "30", float)  # 0 = no limit
+    parser_processes: bool = _env("PARSER_PROCESSES", "true", _flag)
+    # Client-side compression of raw descriptions: "" (plain text) or "zstd"; see realtor.rawstore
+    raw_compression: str = _env("RAW_COMPRESSION", "")
+    raw_compression_level: int = _env("RAW_COMPRESSION_LEVEL", "9", int)
+    collection_raw_dictionaries: str = _env("MONGO_COLLECTION_RAW_DICTIONARIES", "raw_dictionaries")
+    # Checkpoints of resumable batch jobs (realtor-reparse)
+    collection_jobs: str = _env("MONGO_COLLECTION_JOBS", "jobs")
+    # Mongo calls from the UI, shared by every Flet session
+    ui_db_workers: int = _env("UI_DB_WORKERS", "8", int)
+
+
+@functools.lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    from dotenv import load_dotenv
 
+    # Load .env if present; variables already set in the environment win
+    load_dotenv()
+    return Settings()
 
-settings = Settings()
 
+def __getattr__(name: str) -> Any:
+    # `settings` is created on first access, so importing this module never touches .env
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
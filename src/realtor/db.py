@@ -1,15 +1,50 @@
 from __future__ import annotations
 
+import logging
+import statistics
+import threading
+import time
+from collections import deque
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
-from pymongo import MongoClient
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel, InsertOne, MongoClient, UpdateOne
+from pymongo.client_session import ClientSession
 from pymongo.collection import Collection
-from pymongo.errors import ServerSelectionTimeoutError
+from pymongo.errors import BulkWriteError, ClientBulkWriteException, PyMongoError, ServerSelectionTimeoutError
 
+from . import metrics
 from .config import settings
+from .dedup import LSHIndex, band_keys, fingerprint, from_bytes, signature
+from .models import PropertyData
+from .rawstore import RAW_TEXT_PROJECTION, raw_text, stored_text
+
+logger = logging.getLogger(__name__)
 
 _CLIENT: MongoClient | None = None
+_COLLECTIONS: Tuple[Collection, Collection] | None = None
+_SAVE_MODE: str | None = None
+
+
+def client_options() -> Dict[str, Any]:
+    w = settings.mongo_write_concern
+    options: Dict[str, Any] = {
+        "serverSelectionTimeoutMS": settings.mongo_server_selection_timeout_ms,
+        "maxPoolSize": settings.mongo_max_pool_size,
+        "minPoolSize": settings.mongo_min_pool_size,
+        "w": int(w) if w.isdigit() else w,
+        "retryWrites": True,
+    }
+    if settings.mongo_timeout_ms > 0:
+        options["timeoutMS"] = settings.mongo_timeout_ms
+    return options
+
+
+def connection_error() -> RuntimeError:
+    return RuntimeError(
+        f"Unable to connect to MongoDB at {settings.mongo_uri}. Is Docker running and the container up?"
+    )
 
 
 def _get_client() -> MongoClient:
@@ -17,14 +52,12 @@ def _get_client() -> MongoClient:
     if _CLIENT is not None:
         return _CLIENT
 
-    _CLIENT = MongoClient(settings.mongo_uri, serverSelectionTimeoutMS=3000)
+    _CLIENT = MongoClient(settings.mongo_uri, **client_options())
     # Touch server to fail fast if unavailable
     try:
         _CLIENT.admin.command("ping")
     except ServerSelectionTimeoutError as e:
-        raise RuntimeError(
-            f"Unable to connect to MongoDB at {settings.mongo_uri}. Is Docker running and the container up?"
-        ) from e
+        raise connection_error() from e
     return _CLIENT
 
 
@@ -35,45 +68,470 @@ def _get_collection(name: str) -> Collection:
 
 
 def collections() -> Tuple[Collection, Collection]:
-    raw = _get_collection(settings.collection_raw)
-    structured = _get_collection(settings.collection_structured)
-    return raw, structured
+    global _COLLECTIONS
+    if _COLLECTIONS is None:
+        raw = _get_collection(settings.collection_raw)
+        structured = _get_collection(settings.collection_structured)
+        _COLLECTIONS = (raw, structured)
+    return _COLLECTIONS
 
 
-def save_raw_description(text: str) -> str:
-    raw_col, _ = collections()
-    doc = {
-        "text": text,
-        "created_at": datetime.now(timezone.utc),
+# Declared indexes, created idempotently by ensure_indexes() at startup
+RAW_INDEXES = [
+    IndexModel([("created_at", DESCENDING)], name="created_at_desc"),
+    IndexModel([("text", TEXT)], name="text_search"),
+    # Multikey: one entry per LSH band bucket, see realtor.dedup
+    IndexModel([("minhash_bands", ASCENDING)], name="minhash_bands"),
+]
+STRUCTURED_INDEXES = [
+    # Keyset pagination order for the History view (created_at, then _id as a tie-breaker)
+    IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id_desc"),
+    IndexModel(
+        [("address.state", ASCENDING), ("address.city", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        name="address_state_city_created_at",
+    ),
+    IndexModel([("description_raw_id", ASCENDING)], name="description_raw_id"),
+    # Incremental exports scan (updated_at, _id) past a watermark (realtor.export)
+    IndexModel([("updated_at", ASCENDING), ("_id", ASCENDING)], name="updated_at_id"),
+    IndexModel(
+        [("address.state", ASCENDING), ("address.city", ASCENDING), ("address.postal_code", ASCENDING)],
+        name="address_state_city_postal_code",
+    ),
+    IndexModel([("address.postal_code", ASCENDING)], name="address_postal_code"),
+    IndexModel([("price", ASCENDING)], name="price"),
+    IndexModel([("bedrooms", ASCENDING), ("price", ASCENDING)], name="bedrooms_price"),
+    IndexModel([("property_type", ASCENDING), ("created_at", DESCENDING)], name="property_type_created_at"),
+    # A collection can only have one text index; it covers every field keyword search looks at
+    IndexModel(
+        [
+            ("contact_name", TEXT),
+            ("property_type", TEXT),
+            ("amenities", TEXT),
+            ("address.street", TEXT),
+            ("address.city", TEXT),
+            ("address.state", TEXT),
+            ("address.postal_code", TEXT),
+            ("notes", TEXT),
+        ],
+        weights={"property_type": 5, "amenities": 5, "address.city": 4, "address.street": 3, "contact_name": 2},
+        name="listing_text_search",
+    ),
+]
+
+# The queries behind the UI and batch jobs: (filter, sort) pairs that explain_hot_queries() checks
+HOT_QUERIES: Dict[str, Tuple[Dict[str, Any], Optional[List[Tuple[str, int]]]]] = {
+    "list_recent": ({}, [("created_at", DESCENDING), ("_id", DESCENDING)]),
+    "history_by_city_state": (
+        {"address.state": "IL", "address.city": "Springfield"},
+        [("created_at", DESCENDING), ("_id", DESCENDING)],
+    ),
+    "by_description_raw_id": ({"description_raw_id": "000000000000000000000000"}, None),
+    "by_city_state": ({"address.state": "IL", "address.city": "Springfield"}, None),
+    "by_postal_code": ({"address.postal_code": "62704"}, None),
+    "price_range": ({"price": {"$gte": 200000, "$lte": 400000}}, None),
+    "bedrooms_price": ({"bedrooms": {"$gte": 3}, "price": {"$lte": 500000}}, None),
+}
+
+
+def ensure_indexes() -> Dict[str, List[str]]:
+    raw_col, structured_col = collections()
+    # create_indexes is a no-op for indexes that already exist with the same spec
+    return {
+        settings.collection_raw: raw_col.create_indexes(RAW_INDEXES),
+        settings.collection_structured: structured_col.create_indexes(STRUCTURED_INDEXES),
     }
-    res = raw_col.insert_one(doc)
-    return str(res.inserted_id)
 
 
-def save_property_data(data: Dict[str, Any]) -> str:
+def _plan_summary(plan: Any, stages: List[str], indexes: Set[str]) -> None:
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        if "indexName" in plan:
+            indexes.add(plan["indexName"])
+        for value in plan.values():
+            _plan_summary(value, stages, indexes)
+    elif isinstance(plan, list):
+        for value in plan:
+            _plan_summary(value, stages, indexes)
+
+
+def summarize_explain(explain: Dict[str, Any]) -> Dict[str, Any]:
+    stages: List[str] = []
+    indexes: Set[str] = set()
+    _plan_summary(explain.get("queryPlanner", {}).get("winningPlan", {}), stages, indexes)
+    return {
+        "stages": stages,
+        "indexes": sorted(indexes),
+        "uses_index": "COLLSCAN" not in stages and bool(indexes),
+        # A SORT stage means the results were sorted in memory rather than read in index order
+        "in_memory_sort": "SORT" in stages,
+    }
+
+
+def explain_hot_queries() -> Dict[str, Dict[str, Any]]:
     _, structured_col = collections()
+    report = {}
+    for name, (query, sort) in HOT_QUERIES.items():
+        cursor = structured_col.find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        report[name] = summarize_explain(cursor.limit(10).explain())
+    return report
+
+
+def raw_document(text: str) -> Dict[str, Any]:
+    return {
+        **stored_text(text),
+        "created_at": datetime.now(timezone.utc),
+        **fingerprint(text),
+    }
+
+
+def structured_document(data: Dict[str, Any]) -> Dict[str, Any]:
     # Ensure timestamp fields
     now = datetime.now(timezone.utc)
-    data = {
+    return {
         **data,
         "created_at": data.get("created_at", now),
         "updated_at": now,
     }
-    res = structured_col.insert_one(data)
+
+
+def save_raw_description(text: str) -> str:
+    raw_col, _ = collections()
+    with metrics.span("realtor_mongo", op="save_raw_description"):
+        res = raw_col.insert_one(raw_document(text))
     return str(res.inserted_id)
 
 
-def list_recent(limit: int = 10) -> List[Dict[str, Any]]:
+def save_property_data(data: Dict[str, Any]) -> str:
+    _, structured_col = collections()
+    with metrics.span("realtor_mongo", op="save_property_data"):
+        res = structured_col.insert_one(structured_document(data))
+    return str(res.inserted_id)
+
+
+def _insert_many_unordered(col: Collection, docs: List[Dict[str, Any]]) -> Set[int]:
+    # Positions in docs that failed; unordered inserts keep going past individual errors
+    if not docs:
+        return set()
+    try:
+        col.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        return {err["index"] for err in e.details.get("writeErrors", [])}
+    return set()
+
+
+def save_listings_bulk(items: Sequence[Tuple[str, Dict[str, Any]]]) -> List[Optional[Tuple[str, str]]]:
+    # (raw_id, structured_id) per item, or None where either half failed to write. Ids are generated
+    # client-side so every structured doc carries its raw link before either write
     raw_col, structured_col = collections()
-    cursor = structured_col.find({}, {"_id": 1, "description_raw_id": 1, "contact_name": 1, "address": 1, "created_at": 1}).sort("created_at", -1).limit(limit)
+    now = datetime.now(timezone.utc)
+    raw_docs: List[Dict[str, Any]] = []
+    structured_docs: List[Dict[str, Any]] = []
+    for text, data in items:
+        raw_id, structured_id = ObjectId(), ObjectId()
+        raw_docs.append({"_id": raw_id, **stored_text(text), "created_at": now, **fingerprint(text)})
+        structured_docs.append(
+            {
+                **data,
+                "_id": structured_id,
+                "description_raw_id": str(raw_id),
+                # Imported rows have no hand edits yet; an empty list lets realtor-reparse rewrite them
+                "edited_fields": data.get("edited_fields", []),
+                "created_at": data.get("created_at", now),
+                "updated_at": now,
+            }
+        )
+    if not raw_docs:
+        return []
+    with metrics.span("realtor_mongo", op="save_listings_bulk"):
+        failed = _insert_many_unordered(raw_col, raw_docs)
+        # Only structured docs whose raw doc landed are written, so none links to a missing raw doc
+        landed = [i for i in range(len(raw_docs)) if i not in failed]
+        orphans = [landed[j] for j in _insert_many_unordered(structured_col, [structured_docs[i] for i in landed])]
+        if orphans:
+            # Undo the raw half of pairs whose structured insert failed rather than orphan it
+            raw_col.delete_many({"_id": {"$in": [raw_docs[i]["_id"] for i in orphans]}})
+            failed.update(orphans)
+    if failed:
+        logger.warning("save_listings_bulk: %d of %d listings were not written", len(failed), len(raw_docs))
     return [
-        {
-            "id": str(doc.get("_id")),
-            "description_raw_id": doc.get("description_raw_id"),
-            "contact_name": doc.get("contact_name"),
-            "address": doc.get("address"),
-            "created_at": doc.get("created_at"),
-        }
-        for doc in cursor
+        None if i in failed else (str(r["_id"]), str(s["_id"]))
+        for i, (r, s) in enumerate(zip(raw_docs, structured_docs))
     ]
 
+
+# Latency of recent save_listing calls, in milliseconds
+_SAVE_LATENCIES_MS: deque = deque(maxlen=1000)
+_SAVE_LATENCIES_LOCK = threading.Lock()
+
+
+def _save_mode(client: MongoClient) -> str:
+    # "transaction" on replica sets / sharded clusters, "client_bulk" for a single
+    # cross-collection bulk write (MongoDB 8.0+), otherwise two inserts with compensation.
+    global _SAVE_MODE
+    if _SAVE_MODE is None:
+        hello = client.admin.command("hello")
+        if hello.get("setName") or hello.get("msg") == "isdbgrid":
+            _SAVE_MODE = "transaction"
+        elif hello.get("maxWireVersion", 0) >= 25:
+            _SAVE_MODE = "client_bulk"
+        else:
+            _SAVE_MODE = "sequential"
+    return _SAVE_MODE
+
+
+def _write_listing(
+    client: MongoClient,
+    mode: str,
+    raw_col: Collection,
+    structured_col: Collection,
+    raw_doc: Dict[str, Any],
+    doc: Dict[str, Any],
+) -> None:
+    if mode == "transaction":
+        def write_both(session: ClientSession) -> None:
+            raw_col.insert_one(raw_doc, session=session)
+            structured_col.insert_one(doc, session=session)
+
+        with client.start_session() as session:
+            session.with_transaction(write_both)
+    elif mode == "client_bulk":
+        try:
+            client.bulk_write(
+                [
+                    InsertOne(raw_doc, namespace=raw_col.full_name),
+                    InsertOne(doc, namespace=structured_col.full_name),
+                ],
+                ordered=True,
+            )
+        except ClientBulkWriteException as e:
+            # Ordered is not atomic: the raw insert can land before the structured one fails
+            partial = e.partial_result
+            if partial is not None and partial.inserted_count == 1:
+                raw_col.delete_one({"_id": raw_doc["_id"]})
+            raise
+    else:
+        raw_col.insert_one(raw_doc)
+        try:
+            structured_col.insert_one(doc)
+        except PyMongoError:
+            # No transactions on a standalone server: undo the raw write rather than orphan it
+            raw_col.delete_one({"_id": raw_doc["_id"]})
+            raise
+
+
+def save_listing(raw_text: str, structured: Dict[str, Any]) -> Tuple[str, str]:
+    raw_col, structured_col = collections()
+    # Ids are generated client-side, so the link exists before either write
+    raw_doc = {"_id": ObjectId(), **raw_document(raw_text)}
+    doc = structured_document({**structured, "description_raw_id": str(raw_doc["_id"])})
+    doc.setdefault("_id", ObjectId())
+    doc.setdefault("edited_fields", [])
+    # Validate with Pydantic before anything is written, so a bad form never leaves an orphan raw doc
+    PropertyData(**doc)
+
+    started = time.perf_counter()
+    client = _get_client()
+    mode = _save_mode(client)
+    with metrics.span("realtor_mongo", op="save_listing", mode=mode):
+        _write_listing(client, mode, raw_col, structured_col, raw_doc, doc)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    with _SAVE_LATENCIES_LOCK:
+        _SAVE_LATENCIES_MS.append(elapsed_ms)
+    logger.debug("save_listing (%s) took %.1fms", mode, elapsed_ms)
+    return str(raw_doc["_id"]), str(doc["_id"])
+
+
+def save_latency_stats() -> Dict[str, float]:
+    with _SAVE_LATENCIES_LOCK:
+        if not _SAVE_LATENCIES_MS:
+            return {"count": 0}
+        last = _SAVE_LATENCIES_MS[-1]
+        samples = sorted(_SAVE_LATENCIES_MS)
+    return {
+        "count": len(samples),
+        "last_ms": last,
+        "p50_ms": statistics.median(samples),
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "max_ms": samples[-1],
+    }
+
+
+RECENT_PROJECTION = {
+    "_id": 1,
+    "description_raw_id": 1,
+    "contact_name": 1,
+    "address": 1,
+    "price": 1,
+    "bedrooms": 1,
+    "created_at": 1,
+}
+HISTORY_SORT = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+
+def recent_item(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": str(doc.get("_id")),
+        "description_raw_id": doc.get("description_raw_id"),
+        "contact_name": doc.get("contact_name"),
+        "address": doc.get("address"),
+        "price": doc.get("price"),
+        "bedrooms": doc.get("bedrooms"),
+        "created_at": doc.get("created_at"),
+    }
+
+
+def list_recent(limit: int = 10) -> List[Dict[str, Any]]:
+    return query_listings(limit=limit)[0]
+
+
+def encode_cursor(created_at: datetime, doc_id: ObjectId) -> str:
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    # Mongo stores datetimes with millisecond precision, so the cursor is exact
+    return f"{round(created_at.timestamp() * 1000)}:{doc_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    millis, _, doc_id = cursor.partition(":")
+    try:
+        return datetime.fromtimestamp(int(millis) / 1000, timezone.utc), ObjectId(doc_id)
+    except Exception as e:
+        raise ValueError(f"Invalid page cursor {cursor!r}") from e
+
+
+def listing_filter(
+    city: Optional[str] = None,
+    state: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_bedrooms: Optional[float] = None,
+    property_type: Optional[str] = None,
+) -> Dict[str, Any]:
+    query: Dict[str, Any] = {}
+    if state:
+        query["address.state"] = state.strip().upper()
+    if city:
+        query["address.city"] = city.strip()
+    if property_type:
+        query["property_type"] = property_type.strip().lower()
+    price: Dict[str, float] = {}
+    if min_price is not None:
+        price["$gte"] = min_price
+    if max_price is not None:
+        price["$lte"] = max_price
+    if price:
+        query["price"] = price
+    if min_bedrooms is not None:
+        query["bedrooms"] = {"$gte": min_bedrooms}
+    return query
+
+
+def query_listings(
+    limit: int = 20,
+    after: Optional[str] = None,
+    **filters: Any,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    # Keyset pagination on (created_at, _id): each page is an index range scan that starts where the
+    # previous one ended, so deep pages cost the same as the first. Returns (items, next_cursor).
+    _, structured_col = collections()
+    query = listing_filter(**filters)
+    if after:
+        created_at, doc_id = decode_cursor(after)
+        keyset = {"$or": [{"created_at": {"$lt": created_at}}, {"created_at": created_at, "_id": {"$lt": doc_id}}]}
+        query = {"$and": [query, keyset]} if query else keyset
+    with metrics.span("realtor_mongo", op="query_listings"):
+        docs = list(structured_col.find(query, RECENT_PROJECTION).sort(HISTORY_SORT).limit(limit + 1))
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_cursor = encode_cursor(last["created_at"], last["_id"])
+    return [recent_item(doc) for doc in docs], next_cursor
+
+
+def candidate_index(sigs: Sequence[Any]) -> LSHIndex:
+    # Only raw docs sharing a band bucket with one of the signatures are fetched, via the multikey index
+    raw_col, _ = collections()
+    keys = sorted({key for sig in sigs for key in band_keys(sig)})
+    index = LSHIndex()
+    with metrics.span("realtor_mongo", op="find_duplicate_candidates"):
+        for doc in raw_col.find({"minhash_bands": {"$in": keys}}, {"minhash": 1}):
+            index.add(str(doc["_id"]), from_bytes(doc["minhash"]))
+    return index
+
+
+def find_near_duplicates(text: str, threshold: Optional[float] = None, limit: int = 3) -> List[Dict[str, Any]]:
+    threshold = settings.dedup_threshold if threshold is None else threshold
+    sig = signature(text)
+    matches = candidate_index([sig]).query(sig, threshold)[:limit]
+    if not matches:
+        return []
+    _, structured_col = collections()
+    listings = {
+        doc.get("description_raw_id"): recent_item(doc)
+        for doc in structured_col.find({"description_raw_id": {"$in": [m[0] for m in matches]}}, RECENT_PROJECTION)
+    }
+    return [{"raw_id": raw_id, "similarity": sim, "listing": listings.get(raw_id)} for raw_id, sim in matches]
+
+
+# Keys of a structured doc that parser output never replaces
+_NON_PARSED_KEYS = ("_id", "description_raw_id", "created_at", "updated_at", "photos", "edited_fields")
+
+
+def parsed_updates(data: Dict[str, Any], edited: Sequence[str] = (), keep_empty: bool = False) -> Dict[str, Any]:
+    # Parser output as $set paths (address parts individually), leaving out the fields an agent
+    # edited by hand (edited_fields holds paths such as "price" or "address.city")
+    update: Dict[str, Any] = {}
+    for key, value in data.items():
+        if key in _NON_PARSED_KEYS or key in edited:
+            continue
+        items = [(f"address.{k}", v) for k, v in value.items()] if key == "address" and isinstance(value, dict) else [(key, value)]
+        for path, v in items:
+            if path not in edited and (keep_empty or v not in (None, "", [])):
+                update[path] = v
+    return update
+
+
+def merge_listing(raw_id: str, data: Dict[str, Any]) -> bool:
+    # Folds a resubmitted description into the listing it duplicates: newly parsed values win,
+    # empty ones never blank out what is stored, amenities and phone numbers accumulate, and
+    # hand-edited fields are left alone.
+    _, structured_col = collections()
+    now = datetime.now(timezone.utc)
+    with metrics.span("realtor_mongo", op="merge_listing_lookup"):
+        existing = structured_col.find_one({"description_raw_id": raw_id}, {"edited_fields": 1})
+    if existing is None:
+        return False
+    edited = existing.get("edited_fields") or []
+    update = parsed_updates({k: v for k, v in data.items() if k not in ("amenities", "phones")}, edited)
+    update.update(updated_at=now, last_seen_at=now)
+    if "edited_fields" not in existing:
+        # Rows written by older importers lacked the list; record that none of their fields were edited
+        update["edited_fields"] = []
+    ops: Dict[str, Any] = {"$set": update, "$inc": {"duplicate_count": 1}}
+    add_to_set = {
+        key: {"$each": list(data[key])} for key in ("amenities", "phones") if data.get(key) and key not in edited
+    }
+    if add_to_set:
+        ops["$addToSet"] = add_to_set
+    with metrics.span("realtor_mongo", op="merge_listing"):
+        res = structured_col.update_one({"_id": existing["_id"]}, ops)
+    return res.matched_count > 0
+
+
+def backfill_fingerprints(batch_size: int = 500) -> int:
+    # Raw docs saved before near-duplicate detection existed have no signature and are never matched
+    raw_col, _ = collections()
+    updated = 0
+    batch: List[UpdateOne] = []
+    for doc in raw_col.find({"minhash_bands": {"$exists": False}}, RAW_TEXT_PROJECTION):
+        batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": fingerprint(raw_text(doc))}))
+        if len(batch) >= batch_size:
+            updated += raw_col.bulk_write(batch, ordered=False).modified_count
+            batch = []
+    if batch:
+        updated += raw_col.bulk_write(batch, ordered=False).modified_count
+    return updated
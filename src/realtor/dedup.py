@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+import numpy as np
+
+# 128 permutations split into 16 bands of 8 rows: two descriptions share at least one band
+# bucket with probability 1 - (1 - s^8)^16, i.e. ~0.01 at Jaccard 0.4, ~0.24 at 0.6, ~0.95 at 0.8.
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_rng = np.random.RandomState(1)
+# Fixed seed: signatures are stored in Mongo and must stay comparable across processes and releases
+_PERM_A = _rng.randint(1, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> Set[str]:
+    # Word n-grams over lowercased text, so re-wrapping, punctuation and casing don't matter
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+def signature(text: str) -> np.ndarray:
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in shingles(text)), dtype=np.uint64
+    )
+    if not hashes.size:
+        return np.full(NUM_PERM, _MAX_HASH, dtype=np.uint32)
+    # Universal hashing (a*x + b mod p) stands in for the random permutations; uint64 wrap-around is fine
+    with np.errstate(over="ignore"):
+        permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def band_keys(sig: np.ndarray) -> List[str]:
+    return [
+        f"{band:x}:{hashlib.blake2b(sig[band * ROWS : (band + 1) * ROWS].tobytes(), digest_size=8).hexdigest()}"
+        for band in range(BANDS)
+    ]
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    # Fraction of agreeing minima estimates the Jaccard similarity of the shingle sets
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def to_bytes(sig: np.ndarray) -> bytes:
+    return sig.astype("<u4").tobytes()
+
+
+def from_bytes(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype="<u4").astype(np.uint32)
+
+
+def fingerprint(text: str) -> Dict[str, object]:
+    # Fields stored on raw description documents; minhash_bands carries a multikey index
+    sig = signature(text)
+    return {"minhash": to_bytes(sig), "minhash_bands": band_keys(sig)}
+
+
+class LSHIndex:
+    """Band buckets over a set of signatures: a batch being imported, or candidates fetched from Mongo."""
+
+    def __init__(self) -> None:
+        self._buckets: Dict[str, List[Hashable]] = defaultdict(list)
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def add(self, key: Hashable, sig: np.ndarray) -> None:
+        self._signatures[key] = sig
+        for band in band_keys(sig):
+            self._buckets[band].append(key)
+
+    def query(self, sig: np.ndarray, threshold: float) -> List[Tuple[Hashable, float]]:
+        candidates: Set[Hashable] = set()
+        for band in band_keys(sig):
+            candidates.update(self._buckets.get(band, ()))
+        scored = [(key, similarity(sig, self._signatures[key])) for key in candidates]
+        return sorted((m for m in scored if m[1] >= threshold), key=lambda m: m[1], reverse=True)
+
+    def best(self, sig: np.ndarray, threshold: float) -> Optional[Tuple[Hashable, float]]:
+        matches = self.query(sig, threshold)
+        return matches[0] if matches else None
+
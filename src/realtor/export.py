@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import logging
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from bson import ObjectId
+from pymongo import ASCENDING
+
+from . import metrics
+from .db import collections, decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("parquet", "csv", "jsonl")
+# Flat column order shared by every format; address.* and amenities are flattened
+COLUMNS = [
+    "id",
+    "description_raw_id",
+    "contact_name",
+    "email",
+    "phone",
+    "phones",
+    "address_street",
+    "address_city",
+    "address_state",
+    "address_postal_code",
+    "address_country",
+    "price",
+    "bedrooms",
+    "bathrooms",
+    "square_feet",
+    "lot_size",
+    "year_built",
+    "property_type",
+    "amenities",
+    "parking",
+    "hoa_fees",
+    "notes",
+    "created_at",
+    "updated_at",
+]
+EXPORT_PROJECTION = {"photos": 0}
+# Read whatever else is projected: the id column and the watermark need them
+ALWAYS_EXPORTED = ("_id", "updated_at")
+EXPORT_SORT = [("updated_at", ASCENDING), ("_id", ASCENDING)]
+# Joins list fields (amenities, phone numbers) into one column
+AMENITY_SEPARATOR = ";"
+
+
+@dataclass
+class ExportStats:
+    rows: int = 0
+    batches: int = 0
+    # Keyset position (updated_at, _id) of the last exported row, in realtor.db cursor format
+    watermark: Optional[str] = None
+    elapsed_seconds: float = 0.0
+
+
+def _utc(value: Any) -> Any:
+    # pymongo returns naive datetimes that are UTC
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _number(value: Any) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def flatten_listing(doc: Dict[str, Any]) -> Dict[str, Any]:
+    address = doc.get("address") or {}
+    year = doc.get("year_built")
+    return {
+        "id": str(doc["_id"]),
+        "description_raw_id": doc.get("description_raw_id"),
+        "contact_name": doc.get("contact_name"),
+        "email": doc.get("email"),
+        "phone": doc.get("phone"),
+        "phones": AMENITY_SEPARATOR.join(p.get("number") or "" for p in doc.get("phones") or []) or None,
+        "address_street": address.get("street"),
+        "address_city": address.get("city"),
+        "address_state": address.get("state"),
+        "address_postal_code": address.get("postal_code"),
+        "address_country": address.get("country"),
+        "price": _number(doc.get("price")),
+        "bedrooms": _number(doc.get("bedrooms")),
+        "bathrooms": _number(doc.get("bathrooms")),
+        "square_feet": _number(doc.get("square_feet")),
+        "lot_size": doc.get("lot_size"),
+        "year_built": int(year) if isinstance(year, (int, float)) and not isinstance(year, bool) else None,
+        "property_type": doc.get("property_type"),
+        "amenities": AMENITY_SEPARATOR.join(doc.get("amenities") or []) or None,
+        "parking": doc.get("parking"),
+        "hoa_fees": _number(doc.get("hoa_fees")),
+        "notes": doc.get("notes"),
+        "created_at": _utc(doc.get("created_at")),
+        "updated_at": _utc(doc.get("updated_at")),
+    }
+
+
+def _source_field(column: str) -> str:
+    # The document field a flat column is read from
+    if column == "id":
+        return "_id"
+    return "address" if column.startswith("address_") else column
+
+
+def export_columns(projection: Optional[Iterable[str]] = None) -> List[str]:
+    if projection is None:
+        return COLUMNS
+    fields = set(projection)
+    unknown = fields - {_source_field(c) for c in COLUMNS}
+    if unknown:
+        raise ValueError(f"Unknown export fields: {', '.join(sorted(unknown))}")
+    fields.update(ALWAYS_EXPORTED)
+    return [c for c in COLUMNS if _source_field(c) in fields]
+
+
+def mongo_projection(projection: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    if projection is None:
+        return EXPORT_PROJECTION
+    return {field: 1 for field in dict.fromkeys(_source_field(c) for c in export_columns(projection))}
+
+
+def since_filter(watermark: Optional[str]) -> Dict[str, Any]:
+    # Keyset on (updated_at, _id), so rows sharing a timestamp are neither repeated nor skipped.
+    # An ISO timestamp instead of a watermark exports rows updated strictly after it.
+    if not watermark:
+        return {}
+    try:
+        updated_at, doc_id = decode_cursor(watermark)
+    except ValueError:
+        try:
+            updated_at = _utc(datetime.fromisoformat(watermark))
+        except ValueError:
+            raise ValueError(f"--since {watermark!r} is neither a watermark nor an ISO timestamp") from None
+        # No _id sorts after this one, so the tie branch below matches nothing
+        doc_id = ObjectId("f" * 24)
+    return {"$or": [{"updated_at": {"$gt": updated_at}}, {"updated_at": updated_at, "_id": {"$gt": doc_id}}]}
+
+
+def iter_listing_batches(
+    since: Optional[str] = None,
+    batch_size: int = 1000,
+    projection: Optional[Dict[str, Any]] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    # A single cursor read batch_size documents per round trip; only one batch is held at a time
+    _, structured_col = collections()
+    cursor = structured_col.find(since_filter(since), projection or EXPORT_PROJECTION).sort(EXPORT_SORT)
+    batch: List[Dict[str, Any]] = []
+    for doc in cursor.batch_size(batch_size):
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _parquet_schema(columns: List[str]) -> Any:
+    import pyarrow as pa
+
+    floats = {"price", "bedrooms", "bathrooms", "square_feet", "hoa_fees"}
+    fields = []
+    for name in columns:
+        if name in floats:
+            kind = pa.float64()
+        elif name == "year_built":
+            kind = pa.int32()
+        elif name in ("created_at", "updated_at"):
+            kind = pa.timestamp("ms", tz="UTC")
+        else:
+            kind = pa.string()
+        fields.append(pa.field(name, kind))
+    return pa.schema(fields)
+
+
+class _ParquetWriter:
+    def __init__(self, path: str, columns: List[str]) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Parquet export needs pyarrow: pip install 'realtor[parquet]'") from e
+        self._pa = pa
+        self._schema = _parquet_schema(columns)
+        self._writer = pq.ParquetWriter(path, self._schema, compression="zstd")
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        # One row group per batch; pyarrow never sees more than one batch at a time
+        self._writer.write_batch(self._pa.RecordBatch.from_pylist(rows, schema=self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class _CsvWriter:
+    def __init__(self, stream: TextIO, columns: List[str]) -> None:
+        self._writer = csv.DictWriter(stream, fieldnames=columns)
+        self._writer.writeheader()
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        self._writer.writerows(
+            {k: v.isoformat() if isinstance(v, datetime) else v for k, v in row.items()} for row in rows
+        )
+
+    def close(self) -> None:
+        pass
+
+
+class _JsonlWriter:
+    def __init__(self, stream: TextIO, columns: List[str]) -> None:
+        self._stream = stream
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        for row in rows:
+            self._stream.write(
+                json.dumps({k: v.isoformat() if isinstance(v, datetime) else v for k, v in row.items()}) + "\n"
+            )
+
+    def close(self) -> None:
+        pass
+
+
+def export_listings(
+    out: Any,
+    fmt: str,
+    since: Optional[str] = None,
+    batch_size: int = 1000,
+    projection: Optional[Iterable[str]] = None,
+) -> ExportStats:
+    # `out` is a path for parquet and a text stream for csv/jsonl. `projection` names the document
+    # fields to export (address covers every address_* column); _id and updated_at are always kept.
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    columns = export_columns(projection)
+    writer_cls = _ParquetWriter if fmt == "parquet" else _CsvWriter if fmt == "csv" else _JsonlWriter
+    writer = writer_cls(out, columns)
+    stats = ExportStats(watermark=since)
+    started = time.perf_counter()
+    try:
+        for batch in iter_listing_batches(since, batch_size, mongo_projection(projection)):
+            with metrics.span("realtor_export_batch", format=fmt):
+                rows = [flatten_listing(doc) for doc in batch]
+                writer.write(rows if projection is None else [{c: row[c] for c in columns} for row in rows])
+            last = batch[-1]
+            if last.get("updated_at") is not None:
+                stats.watermark = encode_cursor(last["updated_at"], last["_id"])
+            stats.rows += len(batch)
+            stats.batches += 1
+            logger.info("Exported %d rows", stats.rows)
+    finally:
+        writer.close()
+    stats.elapsed_seconds = time.perf_counter() - started
+    return stats
+
+
+def detect_format(path: str) -> str:
+    suffix = Path(path).suffix.lower()
+    if suffix in (".parquet", ".pq"):
+        return "parquet"
+    if suffix == ".csv":
+        return "csv"
+    if suffix in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    raise ValueError(f"Cannot infer output format from {path!r}; pass --format {'/'.join(FORMATS)}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(
+        prog="realtor-export",
+        description="Stream structured listings from MongoDB to Parquet, CSV or JSONL.",
+    )
+    ap.add_argument("path", help="Output file ('-' for stdout; csv/jsonl only)")
+    ap.add_argument("--format", choices=FORMATS, help="Output format (default: inferred from the file extension)")
+    ap.add_argument("--batch-size", type=int, default=1000, help="Documents per cursor batch / row group (default: 1000)")
+    ap.add_argument(
+        "--since",
+        help="Export only rows updated after this watermark (as printed by a previous run) or ISO timestamp",
+    )
+    ap.add_argument(
+        "--fields",
+        help="Comma-separated document fields to export, e.g. price,address (default: all); "
+        "_id and updated_at are always included",
+    )
+    ap.add_argument(
+        "--watermark-file",
+        help="Read --since from this file if it exists, and store the new watermark there after a successful export",
+    )
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stderr)
+    fmt = args.format or ("jsonl" if args.path == "-" else detect_format(args.path))
+    since = args.since
+    watermark_path = Path(args.watermark_file) if args.watermark_file else None
+    if since is None and watermark_path is not None and watermark_path.exists():
+        since = watermark_path.read_text(encoding="utf-8").strip() or None
+    projection = [f.strip() for f in args.fields.split(",") if f.strip()] if args.fields else None
+
+    if fmt == "parquet":
+        if args.path == "-":
+            ap.error("Parquet output needs a file path")
+        stats = export_listings(args.path, fmt, since, args.batch_size, projection)
+    elif args.path == "-":
+        stats = export_listings(sys.stdout, fmt, since, args.batch_size, projection)
+    else:
+        with open(args.path, "w", newline="", encoding="utf-8") as f:
+            stats = export_listings(f, fmt, since, args.batch_size, projection)
+
+    if watermark_path is not None and stats.watermark:
+        watermark_path.write_text(stats.watermark + "\n", encoding="utf-8")
+    logger.info(
+        "Done: %d rows in %d batches, %.1fs; watermark %s",
+        stats.rows,
+        stats.batches,
+        stats.elapsed_seconds,
+        stats.watermark or "(none)",
+    )
+
+
+if __name__ == "__main__":
+    main()
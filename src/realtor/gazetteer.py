@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import csv
+import functools
+import logging
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# USPS state and territory codes, plus the military "states"
+STATE_NAMES: Dict[str, str] = {
+    "AL": "Alabama", "AK": "Alaska", "AZ": "Arizona", "AR": "Arkansas", "CA": "California",
+    "CO": "Colorado", "CT": "Connecticut", "DE": "Delaware", "DC": "District of Columbia",
+    "FL": "Florida", "GA": "Georgia", "HI": "Hawaii", "ID": "Idaho", "IL": "Illinois",
+    "IN": "Indiana", "IA": "Iowa", "KS": "Kansas", "KY": "Kentucky", "LA": "Louisiana",
+    "ME": "Maine", "MD": "Maryland", "MA": "Massachusetts", "MI": "Michigan", "MN": "Minnesota",
+    "MS": "Mississippi", "MO": "Missouri", "MT": "Montana", "NE": "Nebraska", "NV": "Nevada",
+    "NH": "New Hampshire", "NJ": "New Jersey", "NM": "New Mexico", "NY": "New York",
+    "NC": "North Carolina", "ND": "North Dakota", "OH": "Ohio", "OK": "Oklahoma", "OR": "Oregon",
+    "PA": "Pennsylvania", "RI": "Rhode Island", "SC": "South Carolina", "SD": "South Dakota",
+    "TN": "Tennessee", "TX": "Texas", "UT": "Utah", "VT": "Vermont", "VA": "Virginia",
+    "WA": "Washington", "WV": "West Virginia", "WI": "Wisconsin", "WY": "Wyoming",
+    "PR": "Puerto Rico", "VI": "Virgin Islands", "GU": "Guam",
+    "AA": "Armed Forces Americas", "AE": "Armed Forces Europe", "AP": "Armed Forces Pacific",
+}
+_STATE_CODES: Dict[str, str] = {name.lower(): code for code, name in STATE_NAMES.items()}
+_STATE_CODES.update({code.lower(): code for code in STATE_NAMES})
+_STATE_CODES.update({"washington dc": "DC", "washington d.c.": "DC", "d.c.": "DC", "us virgin islands": "VI"})
+
+# First three ZIP digits -> state, as inclusive ranges of USPS sectional centers. Ranges are
+# listed broad-first; later (narrower) entries override, e.g. 055 (MA) inside Vermont's 050-059.
+_ZIP3_RANGES: List[Tuple[int, int, str]] = [
+    (5, 5, "NY"), (6, 9, "PR"), (8, 8, "VI"), (10, 27, "MA"), (28, 29, "RI"), (30, 38, "NH"),
+    (39, 49, "ME"), (50, 59, "VT"), (55, 55, "MA"), (60, 69, "CT"), (70, 89, "NJ"), (90, 98, "AE"),
+    (100, 149, "NY"), (150, 196, "PA"), (197, 199, "DE"), (200, 205, "DC"), (201, 201, "VA"),
+    (206, 219, "MD"), (220, 246, "VA"), (247, 268, "WV"), (270, 289, "NC"), (290, 299, "SC"),
+    (300, 319, "GA"), (320, 349, "FL"), (340, 340, "AA"), (350, 369, "AL"), (370, 385, "TN"),
+    (386, 397, "MS"), (398, 399, "GA"), (400, 427, "KY"), (430, 459, "OH"), (460, 479, "IN"),
+    (480, 499, "MI"), (500, 528, "IA"), (530, 549, "WI"), (550, 567, "MN"), (569, 569, "DC"),
+    (570, 577, "SD"), (580, 588, "ND"), (590, 599, "MT"), (600, 629, "IL"), (630, 658, "MO"),
+    (660, 679, "KS"), (680, 693, "NE"), (700, 714, "LA"), (716, 729, "AR"), (730, 749, "OK"),
+    (733, 733, "TX"), (750, 799, "TX"), (800, 816, "CO"), (820, 831, "WY"), (832, 838, "ID"),
+    (840, 847, "UT"), (850, 865, "AZ"), (870, 884, "NM"), (885, 885, "TX"), (889, 898, "NV"),
+    (900, 961, "CA"), (962, 966, "AP"), (967, 968, "HI"), (969, 969, "GU"), (970, 979, "OR"),
+    (980, 994, "WA"), (995, 999, "AK"),
+]
+_STATES: List[str] = [""] + sorted(STATE_NAMES)
+_ZIP3 = array("B", bytes(1000))  # ZIP3 -> index into _STATES (0 = unassigned)
+for _lo, _hi, _state in _ZIP3_RANGES:
+    for _prefix in range(_lo, _hi + 1):
+        _ZIP3[_prefix] = _STATES.index(_state)
+
+
+def normalize_state(value: Optional[str]) -> Optional[str]:
+    # "Illinois", "illinois", "IL" and "Il." all become "IL"; unknown values are returned as given
+    if not value:
+        return value
+    return _STATE_CODES.get(value.strip().rstrip(".").lower()) or _STATE_CODES.get(value.strip().lower()) or value
+
+
+def zip5(postal_code: Optional[str]) -> Optional[int]:
+    digits = (postal_code or "").strip()[:5]
+    return int(digits) if len(digits) == 5 and digits.isdigit() else None
+
+
+def state_for_zip(postal_code: Optional[str]) -> Optional[str]:
+    zip_code = zip5(postal_code)
+    if zip_code is None:
+        return None
+    return _STATES[_ZIP3[zip_code // 100]] or None
+
+
+class ZipTable:
+    """ZIP -> (city, state) lookups from a flat array: one uint16 slot per possible ZIP code.
+
+    Loaded from GAZETTEER_ZIP_PATH, either a CSV with zip/city/state columns or a GeoNames postal
+    code dump (US.txt, tab-separated). About 200 KB in memory however many rows the file has.
+    """
+
+    def __init__(self, rows: List[Tuple[int, str, str]] = ()) -> None:
+        self._places: List[Tuple[str, str]] = [("", "")]  # slot 0 = unknown
+        self._index: Dict[Tuple[str, str], int] = {}
+        self._slots = array("H", bytes(2 * 100_000))
+        for zip_code, city, state in rows:
+            self.add(zip_code, city, state)
+
+    def __len__(self) -> int:
+        return sum(1 for slot in self._slots if slot)
+
+    def add(self, zip_code: int, city: str, state: str) -> None:
+        # The first row for a ZIP wins (files list the preferred place name first)
+        if not 0 <= zip_code < 100_000 or self._slots[zip_code]:
+            return
+        place = (city.strip(), normalize_state(state.strip()) or "")
+        slot = self._index.get(place)
+        if slot is None:
+            slot = self._index[place] = len(self._places)
+            self._places.append(place)
+        self._slots[zip_code] = slot
+
+    def lookup(self, postal_code: Optional[str]) -> Optional[Tuple[str, str]]:
+        zip_code = zip5(postal_code)
+        if zip_code is None or not self._slots[zip_code]:
+            return None
+        return self._places[self._slots[zip_code]]
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> "ZipTable":
+        table = cls()
+        with open(path, newline="", encoding="utf-8") as f:
+            first = f.readline()
+            f.seek(0)
+            if "\t" in first:
+                # GeoNames: country, postal code, place name, admin name1, admin code1, ...
+                for row in csv.reader(f, delimiter="\t"):
+                    if len(row) > 4 and row[1].isdigit():
+                        table.add(int(row[1]), row[2], row[4] or row[3])
+            else:
+                reader = csv.DictReader(f)
+                columns = {name.lower().strip(): name for name in reader.fieldnames or []}
+                zip_col = next((columns[c] for c in ("zip", "zipcode", "zip_code", "postal_code") if c in columns), None)
+                city_col = next((columns[c] for c in ("city", "primary_city", "place", "place_name") if c in columns), None)
+                state_col = next((columns[c] for c in ("state", "state_code", "state_id") if c in columns), None)
+                if not (zip_col and city_col and state_col):
+                    raise ValueError(f"{path}: expected zip, city and state columns, got {reader.fieldnames}")
+                for row in reader:
+                    zip_code = zip5(row[zip_col].zfill(5))
+                    if zip_code is not None:
+                        table.add(zip_code, row[city_col], row[state_col])
+        return table
+
+
+@functools.lru_cache(maxsize=None)
+def zip_table() -> Optional[ZipTable]:
+    path = settings.gazetteer_zip_path
+    if not path:
+        return None
+    try:
+        table = ZipTable.from_file(path)
+    except (OSError, ValueError) as e:
+        # Only the optional city lookups are lost; ZIP3 -> state checks still work
+        logger.warning("ZIP table %s unavailable: %s", path, e)
+        return None
+    logger.info("Loaded %d ZIP codes from %s", len(table), path)
+    return table
+
+
+def normalize_address(address: Dict[str, Optional[str]]) -> Dict[str, Optional[str]]:
+    # State names become postal codes and a missing city/state is filled in from the ZIP. Values
+    # that contradict the ZIP are kept as written; address_issues reports them.
+    result = dict(address)
+    result["state"] = normalize_state(result.get("state"))
+    if zip5(result.get("postal_code")) is None:
+        return result
+    table = zip_table()
+    place = table.lookup(result["postal_code"]) if table is not None else None
+    if not result.get("state"):
+        result["state"] = place[1] if place else state_for_zip(result["postal_code"])
+    if not result.get("city") and place and place[1] == result["state"]:
+        result["city"] = place[0]
+    return result
+
+
+def address_issues(address: Dict[str, Optional[str]]) -> List[str]:
+    issues: List[str] = []
+    postal_code, state, city = address.get("postal_code"), address.get("state"), address.get("city")
+    if postal_code and zip5(postal_code) is None:
+        issues.append(f"Postal code {postal_code} is not a US ZIP code.")
+        return issues
+    if state and normalize_state(state) not in STATE_NAMES:
+        issues.append(f"State {state} is not a US state or territory.")
+    if not postal_code:
+        return issues
+    expected = state_for_zip(postal_code)
+    table = zip_table()
+    place = table.lookup(postal_code) if table is not None else None
+    if place:
+        expected = place[1] or expected
+    if state and expected and normalize_state(state) != expected:
+        issues.append(f"ZIP {postal_code} is in {expected}, not {state}.")
+    elif city and place and place[0] and city.strip().lower() != place[0].lower():
+        issues.append(f"ZIP {postal_code} is {place[0]}, {place[1]}, not {city}.")
+    return issues
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import logging
+import sys
+import time
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from .config import settings
+from .db import candidate_index, ensure_indexes, merge_listing, save_listings_bulk
+from .dedup import LSHIndex, signature
+from .metrics import configure_from_settings
+from .parser import ParserPool, parse_many
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("jsonl", "csv", "tsv")
+# What to do with a row that near-duplicates a stored listing or an earlier row of the same batch
+DUPLICATE_POLICIES = ("keep", "skip", "merge")
+
+
+@dataclass
+class ImportStats:
+    rows_read: int = 0
+    rows_imported: int = 0
+    rows_skipped: int = 0
+    rows_failed: int = 0
+    rows_duplicate: int = 0
+    rows_merged: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_imported / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+def detect_format(path: str) -> str:
+    suffix = Path(path).suffix.lower()
+    if suffix in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    if suffix == ".csv":
+        return "csv"
+    if suffix == ".tsv":
+        return "tsv"
+    raise ValueError(f"Cannot infer input format from {path!r}; pass --format {'/'.join(FORMATS)}")
+
+
+def iter_descriptions(stream: TextIO, fmt: str, field: str = "text") -> Iterator[Optional[str]]:
+    # Yields one description per input row (None for rows without usable text), reading lazily.
+    if fmt == "jsonl":
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                yield None
+                continue
+            value = record.get(field) if isinstance(record, dict) else record
+            yield value.strip() if isinstance(value, str) and value.strip() else None
+    elif fmt in ("csv", "tsv"):
+        csv.field_size_limit(sys.maxsize)
+        reader = csv.DictReader(stream, delimiter="\t" if fmt == "tsv" else ",")
+        # A misspelt --field or the wrong delimiter would otherwise skip every row as empty
+        if reader.fieldnames is not None and field not in reader.fieldnames:
+            raise ValueError(f"Column {field!r} not in the {fmt} header; found {', '.join(reader.fieldnames)}")
+        for row in reader:
+            value = row.get(field)
+            yield value.strip() if value and value.strip() else None
+    else:
+        raise ValueError(f"Unsupported format {fmt!r}; expected one of {', '.join(FORMATS)}")
+
+
+def _batched(items: Iterable[Optional[str]], size: int) -> Iterator[List[Optional[str]]]:
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+def find_duplicates(texts: List[str], threshold: float) -> List[Optional[Tuple[str, object]]]:
+    # Per text: ("stored", raw_id) for a match in Mongo, ("batch", position) for an earlier row of
+    # the same batch, or None. One $in query over the batch's band buckets fetches every candidate.
+    sigs = [signature(t) for t in texts]
+    stored = candidate_index(sigs)
+    seen = LSHIndex()
+    result: List[Optional[Tuple[str, object]]] = []
+    for pos, sig in enumerate(sigs):
+        match = stored.best(sig, threshold)
+        if match:
+            result.append(("stored", match[0]))
+            continue
+        match = seen.best(sig, threshold)
+        if match:
+            result.append(("batch", match[0]))
+            continue
+        seen.add(pos, sig)
+        result.append(None)
+    return result
+
+
+def import_descriptions(
+    descriptions: Iterable[Optional[str]],
+    batch_size: int = 500,
+    n_process: int = 1,
+    on_duplicate: str = "keep",
+    threshold: Optional[float] = None,
+    pool: Optional[ParserPool] = None,
+) -> ImportStats:
+    if on_duplicate not in DUPLICATE_POLICIES:
+        raise ValueError(f"Unknown duplicate policy {on_duplicate!r}; expected one of {', '.join(DUPLICATE_POLICIES)}")
+    threshold = settings.dedup_threshold if threshold is None else threshold
+    stats = ImportStats()
+    started = time.perf_counter()
+    for batch in _batched(descriptions, batch_size):
+        stats.rows_read += len(batch)
+        texts = [t for t in batch if t]
+        stats.rows_skipped += len(batch) - len(texts)
+        if not texts:
+            continue
+        duplicates: List[Optional[Tuple[str, object]]] = [None] * len(texts)
+        if on_duplicate != "keep":
+            duplicates = find_duplicates(texts, threshold)
+            stats.rows_duplicate += sum(1 for d in duplicates if d)
+        # Skipped duplicates are never parsed
+        to_parse = [i for i, d in enumerate(duplicates) if d is None or on_duplicate == "merge"]
+        if pool is not None:
+            parsed_rows = pool.map([texts[i] for i in to_parse])
+        else:
+            parsed_rows = parse_many([texts[i] for i in to_parse], batch_size=min(batch_size, 256), n_process=n_process)
+        parsed = dict(zip(to_parse, parsed_rows))
+        fresh = [i for i, d in enumerate(duplicates) if d is None]
+        saved = save_listings_bulk([(texts[i], parsed[i]) for i in fresh])
+        # A row counts as imported only when both its raw and structured docs were written
+        raw_ids = {i: pair[0] for i, pair in zip(fresh, saved) if pair}
+        stats.rows_imported += len(raw_ids)
+        stats.rows_failed += len(fresh) - len(raw_ids)
+        if on_duplicate == "merge":
+            for i, dup in enumerate(duplicates):
+                if dup is None:
+                    continue
+                kind, target = dup
+                raw_id = target if kind == "stored" else raw_ids.get(target)
+                if raw_id and merge_listing(raw_id, parsed[i]):
+                    stats.rows_merged += 1
+        stats.elapsed_seconds = time.perf_counter() - started
+        logger.info(
+            "Imported %d/%d rows, %d duplicates (%.1f rows/s)",
+            stats.rows_imported,
+            stats.rows_read,
+            stats.rows_duplicate,
+            stats.rows_per_second,
+        )
+    stats.elapsed_seconds = time.perf_counter() - started
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(
+        prog="realtor-import",
+        description="Bulk import seller descriptions from a JSONL or CSV file into MongoDB.",
+    )
+    ap.add_argument("path", help="Input file ('-' for stdin)")
+    ap.add_argument("--format", choices=FORMATS, help="Input format (default: inferred from the file extension)")
+    ap.add_argument("--field", default="text", help="JSON key / CSV or TSV column holding the description (default: text)")
+    ap.add_argument("--batch-size", type=int, default=500, help="Rows parsed and written per batch (default: 500)")
+    ap.add_argument("--n-process", type=int, default=1, help="spaCy worker processes (default: 1)")
+    ap.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Parse on a realtor.parser.ParserPool with this many worker processes instead of in-process (default: 0)",
+    )
+    ap.add_argument(
+        "--on-duplicate",
+        choices=DUPLICATE_POLICIES,
+        default="keep",
+        help="Near-duplicates of stored listings or earlier rows: keep (insert anyway), skip, or merge into "
+        "the existing listing (default: keep)",
+    )
+    ap.add_argument("--threshold", type=float, help="Similarity at which rows count as duplicates (default: DEDUP_THRESHOLD)")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    configure_from_settings()
+    fmt = args.format or detect_format(args.path)
+    ensure_indexes()
+    pool = ParserPool(workers=args.workers) if args.workers > 0 else None
+    try:
+        if args.path == "-":
+            stats = import_descriptions(
+                iter_descriptions(sys.stdin, fmt, args.field),
+                args.batch_size,
+                args.n_process,
+                args.on_duplicate,
+                args.threshold,
+                pool,
+            )
+        else:
+            with open(args.path, newline="", encoding="utf-8") as f:
+                stats = import_descriptions(
+                    iter_descriptions(f, fmt, args.field),
+                    args.batch_size,
+                    args.n_process,
+                    args.on_duplicate,
+                    args.threshold,
+                    pool,
+                )
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    logger.info(
+        "Done: %d read, %d imported, %d skipped, %d duplicates (%d merged), %d failed in %.1fs (%.1f rows/s)",
+        stats.rows_read,
+        stats.rows_imported,
+        stats.rows_skipped,
+        stats.rows_duplicate,
+        stats.rows_merged,
+        stats.rows_failed,
+        stats.elapsed_seconds,
+        stats.rows_per_second,
+    )
+
+
+if __name__ == "__main__":
+    main()
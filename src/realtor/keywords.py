@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import string
+from pathlib import Path
+from typing import AbstractSet, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+# Punctuation becomes whitespace; str.translate + split is several times faster than a regex findall
+_PUNCT_TABLE = str.maketrans({c: " " for c in string.punctuation + "\u2018\u2019\u201c\u201d\u2013\u2014\u2022"})
+# Most listings are ASCII, where bytes.translate (a 256-entry lookup table) is faster still
+_ASCII_PUNCT_TABLE = bytes.maketrans(string.punctuation.encode("ascii"), b" " * len(string.punctuation))
+
+
+def tokenize(text: str) -> List[str]:
+    if text.isascii():
+        return text.lower().encode("ascii").translate(_ASCII_PUNCT_TABLE).decode("ascii").split()
+    return text.lower().translate(_PUNCT_TABLE).split()
+
+
+def token_variants(token: str) -> Set[str]:
+    # Singular and plural surface forms, so "pools" and "balconies" hit "pool" and "balcony"
+    variants = {token}
+    if len(token) > 2 and token.endswith("y") and token[-2] not in "aeiou":
+        variants.add(token[:-1] + "ies")
+    elif token.endswith(("s", "x", "ch", "sh")):
+        variants.add(token + "es")
+    else:
+        variants.add(token + "s")
+    return variants
+
+
+def _tail_follows(tokens: Sequence[str], surface: str, tail: Tuple[FrozenSet[str], ...]) -> bool:
+    # list.index walks the token list in C; only occurrences of the first token are visited, and
+    # the walk stops at the first one the tail follows
+    i = -1
+    stop = len(tokens) - len(tail)
+    while True:
+        try:
+            i = tokens.index(surface, i + 1, stop)
+        except ValueError:
+            return False
+        if all(tokens[i + 1 + k] in forms for k, forms in enumerate(tail)):
+            return True
+
+
+class KeywordMatcher:
+    """Multi-term keyword matcher with word-boundary semantics.
+
+    Terms and text are split into the same punctuation-free tokens, so "ac" never matches inside
+    "back" and "walk-in closet" also matches "walk in closets". Matching is one tokenization of
+    the text plus a set intersection on the first token of every term; only texts that contain a
+    multi-token term's first token check the tokens that follow it. Cost grows with the text,
+    not with the size of the vocabulary.
+    """
+
+    def __init__(self, terms: Iterable[Tuple[str, str]] = ()) -> None:
+        self.canonical: List[str] = []
+        self._rank: Dict[str, int] = {}
+        self._single: Dict[str, Set[str]] = {}  # surface token -> canonical terms
+        self._multi: Dict[str, List[Tuple[Tuple[FrozenSet[str], ...], str]]] = {}  # first surface token -> tails
+        self._first_tokens: Set[str] = set()
+        for synonym, canonical in terms:
+            self.add(synonym, canonical)
+
+    def __len__(self) -> int:
+        return len(self.canonical)
+
+    def add(self, term: str, canonical: Optional[str] = None) -> None:
+        canonical = canonical or term
+        tokens = tokenize(term)
+        if not tokens:
+            return
+        if canonical not in self._rank:
+            self._rank[canonical] = len(self.canonical)
+            self.canonical.append(canonical)
+        first = token_variants(tokens[0])
+        self._first_tokens |= first
+        if len(tokens) == 1:
+            for surface in first:
+                self._single.setdefault(surface, set()).add(canonical)
+        else:
+            tail = tuple(frozenset(token_variants(t)) for t in tokens[1:])
+            for surface in first:
+                self._multi.setdefault(surface, []).append((tail, canonical))
+
+    def find_all(self, tokens: Sequence[str], distinct: Optional[AbstractSet[str]] = None) -> Set[str]:
+        # distinct is set(tokens), for callers matching several vocabularies against one text: the
+        # intersection then walks the small first-token set instead of every token of the text
+        present = self._first_tokens.intersection(tokens if distinct is None else distinct)
+        if not present:
+            return set()
+        found: Set[str] = set()
+        for surface in present.intersection(self._single):
+            found.update(self._single[surface])
+        for surface in present.intersection(self._multi):
+            for tail, canonical in self._multi[surface]:
+                # Already found, or a tail token missing from the text: no positional check needed
+                if canonical in found or (distinct is not None and any(forms.isdisjoint(distinct) for forms in tail)):
+                    continue
+                if _tail_follows(tokens, surface, tail):
+                    found.add(canonical)
+        return found
+
+    def first_by_rank(self, tokens: Sequence[str], distinct: Optional[AbstractSet[str]] = None) -> Optional[str]:
+        # The matched term listed earliest in the vocabulary, like a scan of an ordered keyword list
+        found = self.find_all(tokens, distinct)
+        return min(found, key=self._rank.__getitem__) if found else None
+
+
+def read_vocabulary(path: str | Path) -> List[Tuple[str, str]]:
+    """Read a vocabulary file: one term per line, or ``canonical: synonym, synonym`` lines.
+
+    Blank lines and ``#`` comments are ignored. The canonical term always matches itself.
+    """
+    entries: List[Tuple[str, str]] = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        canonical, _, synonyms = line.partition(":")
+        canonical = canonical.strip().lower()
+        entries.append((canonical, canonical))
+        entries.extend((syn.strip().lower(), canonical) for syn in synonyms.split(",") if syn.strip())
+    return entries
+
+
+def build_matcher(builtin: Iterable[str], vocab_paths: Iterable[str] = ()) -> KeywordMatcher:
+    matcher = KeywordMatcher((term, term) for term in builtin)
+    for path in vocab_paths:
+        for synonym, canonical in read_vocabulary(path):
+            matcher.add(synonym, canonical)
+    return matcher
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import bisect
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+from .config import settings
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Seconds; covers sub-millisecond extractors up to slow Mongo round trips
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class MemorySink:
+    """Keeps every observation; meant for tests and ad-hoc inspection."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = defaultdict(float)
+        self.observations: Dict[Tuple[str, Labels], List[float]] = defaultdict(list)
+
+    def incr(self, name: str, value: float, labels: Labels) -> None:
+        with self._lock:
+            self.counters[(name, labels)] += value
+
+    def observe(self, name: str, value: float, labels: Labels) -> None:
+        with self._lock:
+            self.observations[(name, labels)].append(value)
+
+    def count(self, name: str, **labels: Any) -> float:
+        return self.counters.get((name, _labels(labels)), 0.0)
+
+    def values(self, name: str, **labels: Any) -> List[float]:
+        # All observations of `name` whose labels include the given ones
+        wanted = set(_labels(labels))
+        with self._lock:
+            return [v for (n, l), vs in self.observations.items() if n == name and wanted <= set(l) for v in vs]
+
+
+class LogSink:
+    """One log line per measurement, on the realtor.metrics logger."""
+
+    def __init__(self, level: int = logging.INFO) -> None:
+        self.level = level
+
+    def incr(self, name: str, value: float, labels: Labels) -> None:
+        logger.log(self.level, "%s%s +%g", name, _format_labels(labels), value)
+
+    def observe(self, name: str, value: float, labels: Labels) -> None:
+        logger.log(self.level, "%s%s %.6f", name, _format_labels(labels), value)
+
+
+class PrometheusSink:
+    """Aggregates counters and histograms and renders them in the Prometheus text format."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = defaultdict(float)
+        # Per series: bucket counts (non-cumulative, last slot is +Inf), sum, count
+        self._histograms: Dict[Tuple[str, Labels], List[Any]] = {}
+
+    def incr(self, name: str, value: float, labels: Labels) -> None:
+        with self._lock:
+            self._counters[(name, labels)] += value
+
+    def observe(self, name: str, value: float, labels: Labels) -> None:
+        with self._lock:
+            series = self._histograms.get((name, labels))
+            if series is None:
+                series = self._histograms[(name, labels)] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._histograms.items())
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        for (name, labels), (counts, total, count) in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, n in zip((*self.buckets, float("inf")), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+def serve_prometheus(sink: PrometheusSink, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = sink.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="realtor-metrics", daemon=True).start()
+    return server
+
+
+# The active sink; None means instrumentation is off and every call returns immediately
+_SINK: Any = None
+
+
+def configure(sink: Any) -> None:
+    global _SINK
+    _SINK = sink
+
+
+def get_sink() -> Any:
+    return _SINK
+
+
+def configure_from_settings() -> Any:
+    kind = settings.metrics_sink.strip().lower()
+    if not kind:
+        configure(None)
+    elif kind == "log":
+        configure(LogSink())
+    elif kind == "memory":
+        configure(MemorySink())
+    elif kind == "prometheus":
+        sink = PrometheusSink()
+        configure(sink)
+        try:
+            serve_prometheus(sink, settings.metrics_port)
+            logger.info("Serving metrics on :%d/metrics", settings.metrics_port)
+        except OSError as e:
+            logger.warning("Metrics endpoint unavailable on port %d: %s", settings.metrics_port, e)
+    else:
+        raise ValueError(f"Unknown METRICS_SINK {settings.metrics_sink!r}; expected log, prometheus or memory")
+    return _SINK
+
+
+def incr(name: str, value: float = 1, **labels: Any) -> None:
+    if _SINK is not None:
+        _SINK.incr(name, value, _labels(labels))
+
+
+def observe(name: str, value: float, **labels: Any) -> None:
+    if _SINK is not None:
+        _SINK.observe(name, value, _labels(labels))
+
+
+class _Span:
+    __slots__ = ("name", "labels", "started")
+
+    def __init__(self, name: str, labels: Dict[str, Any]) -> None:
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self) -> "_Span":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        sink = _SINK
+        if sink is None:
+            return
+        labels = _labels(self.labels)
+        sink.observe(f"{self.name}_seconds", time.perf_counter() - self.started, labels)
+        if exc_type is not None:
+            sink.incr(f"{self.name}_errors_total", 1, labels)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, **labels: Any) -> Any:
+    # Times the block into the `<name>_seconds` histogram and counts `<name>_errors_total` when it raises
+    if _SINK is None:
+        return _NULL_SPAN
+    return _Span(name, labels)
+
@@ -15,6 +15,11 @@ class Address(BaseModel):
     country: str = "US"
 
 
+class Phone(BaseModel):
+    number: str  # E.164
+    type: Optional[str] = None  # "mobile", "landline", "toll_free", "voip"; None when unknown
+
+
 class ContactDescriptionRaw(BaseModel):
     text: str
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -28,6 +33,8 @@ class PropertyData(BaseModel):
     contact_name: Optional[str] = None
     email: Optional[str] = None
     phone: Optional[str] = None
+    # Every number found in the description; phone is the primary one
+    phones: List[Phone] = Field(default_factory=list)
 
     # Address
     address: Address = Field(default_factory=Address)
@@ -47,6 +54,11 @@ class PropertyData(BaseModel):
 
     notes: Optional[str] = None
 
+    # Parser release that produced the fields, and the field paths (e.g. "price", "address.city")
+    # an agent changed by hand; realtor-reparse refreshes the former and never touches the latter
+    parser_version: Optional[str] = None
+    edited_fields: List[str] = Field(default_factory=list)
+
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
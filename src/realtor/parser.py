@@ -1,12 +1,36 @@
 from __future__ import annotations
 
+import functools
+import hashlib
+import logging
+import os
 import re
-from typing import Dict, Any, List, Optional
-
-import phonenumbers
-import spacy
-import usaddress
-from spacy.cli import download as spacy_download
+import string
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Any, Iterable, Iterator, List, Optional, Set, Tuple
+
+from . import metrics
+from .cache import ParseCache, get_parse_cache
+from .config import settings
+from .gazetteer import address_issues, normalize_address
+from .keywords import KeywordMatcher, build_matcher, tokenize
+
+if TYPE_CHECKING:
+    # spacy, usaddress and phonenumbers are imported where first used: together they dominate
+    # `import realtor.parser`, and importers/workers that never parse should not pay for them
+    import spacy
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPACY_MODEL = settings.spacy_model
+# Bump whenever a change can alter extracted fields; cached results from other versions are ignored.
+PARSER_VERSION = "16"
+# The extractors only read doc.ents (PERSON, MONEY), so the minimal pipeline keeps NER alone
+MINIMAL_PIPELINE_COMPONENTS = ("ner",)
 
 # Heuristic keyword lists
 AMENITY_KEYWORDS = [
@@ -18,6 +42,7 @@ PROPERTY_TYPES = [
     "single family", "condo", "townhouse", "apartment", "duplex", "triplex", "land",
     "multi-family", "manufactured", "mobile", "co-op",
 ]
+PARKING_KEYWORDS = ["garage", "carport"]
 
 EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
 CURRENCY_RE = re.compile(r"\$\s*([0-9]{1,3}(?:,[0-9]{3})*(?:\.[0-9]{1,2})?|[0-9]+(?:\.[0-9]{1,2})?)")
@@ -29,29 +54,327 @@ HOA_RE = re.compile(r"HOA\s*(?:fees?)?\s*[:\-]?\s*\$\s*([0-9]{1,4}(?:\.[0-9]{1,2
 ACRES_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:acre|acres)\b", re.I)
 LOT_SQFT_RE = re.compile(r"(\d{3,7})\s*(?:sq\s?ft|sqft|square\s?feet)\b", re.I)
 
+# Single-pass scanner: one alternation with named groups, so a single finditer over the text fills
+# the "$", "@" and number-then-unit fields. The pattern starts by consuming a plain, case-sensitive
+# character class: that is the only shape the regex engine turns into a fast skip to candidate
+# characters (a leading lookahead is re-evaluated at every position). Each branch then checks the
+# consumed character with a lookbehind, so "number" and "email_domain" start one character after
+# the match. The bed/bath/acre/sqft patterns share one number-then-unit branch, and emails are
+# anchored on "@" (the local part is recovered backwards) so words are not re-tried char by char.
+SCAN_RE = re.compile(
+    r"[\d$@](?:"
+    r"(?<=\$)\s*(?P<currency>[0-9]{1,3}(?:,[0-9]{3})*(?:\.[0-9]{1,2})?|[0-9]+(?:\.[0-9]{1,2})?)"
+    r"|(?<=@)(?P<email_domain>[A-Za-z0-9.-]+\.[A-Za-z]{2,})"
+    r"|(?<=\d)(?P<number>\d{0,2}(?:,\d{3})+|\d*(?:\.\d+)?)\s*"
+    r"(?P<unit>(?i:bed(?:room)?s?|bath(?:room)?s?|acres?|sq\s?ft|square\s?feet))\b"
+    r")"
+)
+# HOA and "built" start on letters, and folding them into SCAN_RE would make it stop on every "h"
+# and "b"; searched on their own they start on the same fast character skip. "built" only takes a
+# plausible year not followed by an area unit, so "built 2400 sqft" is left for SCAN_RE.
+_HOA_SCAN_RE = re.compile(r"[Hh](?i:OA\s*(?:fees?)?\s*[:\-]?\s*\$\s*)([0-9]{1,4}(?:\.[0-9]{1,2})?)")
+_BUILT_SCAN_RE = re.compile(r"[Bb](?i:uilt\s*(?:in\s*)?)((?:18|19|20)\d\d)(?!\d|\s*(?i:sq|square))")
+# Address candidate spans: windows that end on a ZIP/state/place and start on a house number or
+# facility, so the usaddress CRF only ever sees short address-like snippets.
+ZIP_RE = re.compile(r"\b\d{5}(?:-\d{4})?\b")
+STATE_ABBR_RE = re.compile(
+    r"\b(?:A[KLRZ]|C[AOT]|D[CE]|FL|GA|HI|I[ADLN]|K[SY]|LA|M[ADEINOST]|N[CDEHJMVY]|O[HKR]|PA|RI|S[CD]|"
+    r"T[NX]|UT|V[AT]|W[AIVY]|PR)\b"
+)
+# A house number is not followed by one of the unit words SCAN_RE measures ("2 baths", "1 acre lot")
+HOUSE_NUMBER_RE = re.compile(
+    r"\b\d{1,6}[A-Za-z]?\s+"
+    r"(?!(?:bed(?:room)?s?|bath(?:room)?s?|acres?|sq\.?\s?f(?:ee)?t|square|car)\b)"
+    r"(?:[NSEW]\.?\s+)?[A-Za-z0-9]",
+    re.I,
+)
+_SENTENCE_END_RE = re.compile(r"[.!?;](?=\s|$)|\n")
+_ABBREVIATIONS = {"st", "ave", "rd", "dr", "blvd", "ln", "ct", "pl", "hwy", "pkwy", "apt", "ste", "n", "s", "e", "w", "mt", "ft"}
+ADDRESS_WINDOW_CHARS = 120
+_ADDRESS_LABELS = ("AddressNumber", "StreetName", "PlaceName", "StateName", "ZipCode")
+_EMPTY_ADDRESS: Dict[str, Optional[str]] = {"street": None, "city": None, "state": None, "postal_code": None}
+
+# Characters of an email local part, as in EMAIL_RE
+_EMAIL_LOCAL_CHARS = string.ascii_letters + string.digits + "._%+-"
+_UNIT_FIELDS = {"bed": "beds", "bat": "baths", "acr": "acres"}
+_SCAN_FIELDS = ("email", "currency", "beds", "baths", "acres", "sqft")
+
+
+def _model_data_dir(model: str) -> Path:
+    import spacy
+
+    if spacy.util.is_package(model):
+        package_path = spacy.util.get_package_path(model)
+        meta = spacy.util.get_model_meta(package_path)
+        return package_path / f"{meta['lang']}_{meta['name']}-{meta['version']}"
+    path = Path(model)
+    if path.exists():
+        return path
+    raise OSError(f"spaCy model {model!r} is not installed")
+
+
+def _listener_upstreams(node: Any) -> Set[str]:
+    # Components such as tok2vec/transformer that another component listens to via "upstream"
+    found: Set[str] = set()
+    if isinstance(node, dict):
+        if "upstream" in node:
+            found.add(node["upstream"])
+        for value in node.values():
+            found |= _listener_upstreams(value)
+    return found
+
+
+def minimal_pipeline_exclude(model: str = DEFAULT_SPACY_MODEL) -> List[str]:
+    import spacy
+
+    config = spacy.util.load_config(_model_data_dir(model) / "config.cfg")
+    pipeline = list(config["nlp"]["pipeline"])
+    components = config["components"]
+    keep = {name for name in MINIMAL_PIPELINE_COMPONENTS if name in pipeline}
+    for name in list(keep):
+        upstreams = _listener_upstreams(components.get(name, {}))
+        if "*" in upstreams:
+            upstreams = {p for p in pipeline if components.get(p, {}).get("factory") in ("tok2vec", "transformer")}
+        keep |= upstreams
+    return [name for name in pipeline if name not in keep]
+
+
+def _load_model(model: str, minimal: bool) -> spacy.Language:
+    import spacy
+
+    if not minimal:
+        return spacy.load(model)
+    return spacy.load(model, exclude=minimal_pipeline_exclude(model))
+
 
-def ensure_spacy_model(model: str = "en_core_web_sm") -> spacy.Language:
+def ensure_spacy_model(model: str = DEFAULT_SPACY_MODEL, minimal: bool = False) -> spacy.Language:
     try:
-        return spacy.load(model)
+        return _load_model(model, minimal)
     except OSError:
         # download on first run
+        from spacy.cli import download as spacy_download
+
         spacy_download(model)
-        return spacy.load(model)
+        return _load_model(model, minimal)
+
+
+# Process-wide pipeline registry: each (model, minimal) pipeline is loaded from disk at most once.
+_NLP_LOCK = threading.Lock()
+_NLP_CACHE: Dict[Tuple[str, bool], spacy.Language] = {}
+_NLP_LOAD_STATS: Dict[Tuple[str, bool], Dict[str, Any]] = {}
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _registry_key(model: Optional[str], minimal: Optional[bool]) -> Tuple[str, bool]:
+    return (
+        model or DEFAULT_SPACY_MODEL,
+        settings.spacy_minimal_pipeline if minimal is None else minimal,
+    )
+
+
+def get_nlp(model: Optional[str] = None, minimal: Optional[bool] = None) -> spacy.Language:
+    key = _registry_key(model, minimal)
+    nlp = _NLP_CACHE.get(key)
+    if nlp is not None:
+        return nlp
+    with _NLP_LOCK:
+        nlp = _NLP_CACHE.get(key)
+        if nlp is not None:
+            return nlp
+        rss_before = _peak_rss_bytes()
+        started = time.perf_counter()
+        nlp = ensure_spacy_model(*key)
+        load_seconds = time.perf_counter() - started
+        rss_after = _peak_rss_bytes()
+        _NLP_LOAD_STATS[key] = {
+            "model": key[0],
+            "minimal": key[1],
+            "pipeline": list(nlp.pipe_names),
+            "load_seconds": load_seconds,
+            "peak_rss_bytes": rss_after,
+            "rss_growth_bytes": (rss_after - rss_before) if rss_before is not None and rss_after is not None else None,
+        }
+        _NLP_CACHE[key] = nlp
+    logger.info(
+        "Loaded spaCy model %s (minimal=%s, pipes=%s) in %.3fs (peak RSS growth: %s bytes)",
+        key[0],
+        key[1],
+        ",".join(nlp.pipe_names),
+        load_seconds,
+        _NLP_LOAD_STATS[key]["rss_growth_bytes"],
+    )
+    return nlp
+
+
+def warm_up(model: Optional[str] = None, minimal: Optional[bool] = None) -> Dict[str, Any]:
+    nlp = get_nlp(model, minimal)
+    # Run one tiny document so lazily-initialised tables are built before the first real request
+    nlp("Warm up the pipeline at 1 Main St.")
+    return nlp_load_stats(model, minimal) or {}
+
+
+def nlp_load_stats(model: Optional[str] = None, minimal: Optional[bool] = None) -> Optional[Dict[str, Any]]:
+    stats = _NLP_LOAD_STATS.get(_registry_key(model, minimal))
+    return dict(stats) if stats is not None else None
+
+
+def reset_nlp_cache() -> None:
+    with _NLP_LOCK:
+        _NLP_CACHE.clear()
+        _NLP_LOAD_STATS.clear()
+
+
+def _vocab_paths(value: str) -> List[str]:
+    return [p for p in value.split(os.pathsep) if p]
+
+
+@functools.lru_cache(maxsize=None)
+def amenity_matcher() -> KeywordMatcher:
+    return build_matcher(AMENITY_KEYWORDS, _vocab_paths(settings.amenity_vocab_paths))
+
+
+@functools.lru_cache(maxsize=None)
+def property_type_matcher() -> KeywordMatcher:
+    return build_matcher(PROPERTY_TYPES, _vocab_paths(settings.property_type_vocab_paths))
+
+
+@functools.lru_cache(maxsize=None)
+def parking_matcher() -> KeywordMatcher:
+    return build_matcher(PARKING_KEYWORDS)
+
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value.replace(",", ""))
+    except ValueError:
+        return None
+
+
+def scan_text(text: str) -> Dict[str, Any]:
+    # First match per field wins, mirroring the per-field re.search calls this replaces.
+    found: Dict[str, str] = {}
+    for m in SCAN_RE.finditer(text):
+        kind = m.lastgroup
+        if kind == "unit":
+            number = text[m.start() : m.end("number")]
+            field = _UNIT_FIELDS.get(m.group("unit")[:3].lower(), "sqft")
+            # square footage needs at least three digits ("12 sqft" is not a floor area)
+            if field == "sqft" and ("." in number or len(number.replace(",", "")) < 3):
+                continue
+            found.setdefault(field, number)
+        elif kind == "email_domain":
+            # The local part is the run of local-part characters before "@"; rstrip finds its start
+            # in one pass, where a "$"-anchored search would retry from every offset
+            window = text[max(0, m.start() - 64) : m.start()]
+            local = window[len(window.rstrip(_EMAIL_LOCAL_CHARS)) :]
+            if local:
+                found.setdefault("email", f"{local}@{m.group('email_domain')}")
+        else:
+            found.setdefault(kind, m.group(kind))
+        if len(found) == len(_SCAN_FIELDS):
+            break
+
+    hoa = _HOA_SCAN_RE.search(text)
+    built = _BUILT_SCAN_RE.search(text)
+    year = built.group(1) if built else None
+    year_built = int(year) if year and 1800 <= int(year) <= 2100 else None
+    sqft = found.get("sqft")
+    if "acres" in found:
+        lot_size = f"{found['acres']} acre"
+    elif sqft is not None:
+        lot_size = f"{sqft.replace(',', '')} sqft"
+    else:
+        lot_size = None
+
+    tokens = tokenize(text)
+    distinct = set(tokens)
+    return {
+        "email": found.get("email"),
+        "currency": _to_float(found.get("currency")),
+        "bedrooms": _to_float(found.get("beds")),
+        "bathrooms": _to_float(found.get("baths")),
+        "square_feet": _to_float(sqft),
+        "lot_size": lot_size,
+        "year_built": year_built,
+        "hoa_fees": _to_float(hoa.group(1) if hoa else None),
+        "property_type": property_type_matcher().first_by_rank(tokens, distinct),
+        # sorted for consistency
+        "amenities": sorted(amenity_matcher().find_all(tokens, distinct)),
+        "parking": parking_matcher().first_by_rank(tokens, distinct),
+    }
 
 
 def extract_email(text: str) -> Optional[str]:
-    m = EMAIL_RE.search(text)
-    return m.group(0) if m else None
+    return scan_text(text)["email"]
+
+
+# Runs of digits and phone punctuation long enough to hold a number. PhoneNumberMatcher is slow on
+# long text, so it only sees these windows; text without one skips phonenumbers entirely.
+# The pattern starts with a plain character set so the regex engine can skip ahead to candidate
+# characters; word boundaries are left to PhoneNumberMatcher, which sees one character either side.
+# \d and the Unicode dashes/spaces cover numbers pasted from word processors and full-width input.
+_PHONE_CANDIDATE_RE = re.compile(
+    r"[+(\d][\d \t().\-/\u2010-\u2015\u2212\u30fc\uff0d\u00a0\u202f\u3000]{6,31}\d"
+)
+_PHONE_MIN_DIGITS = 7
+# phonenumbers does not treat a narrow no-break space as a separator
+_PHONE_SPACES = str.maketrans({"\u202f": " "})
+# libphonenumber types worth naming; US numbers are mostly FIXED_LINE_OR_MOBILE, i.e. unknown
+_PHONE_TYPES = {
+    "MOBILE": "mobile",
+    "FIXED_LINE": "landline",
+    "TOLL_FREE": "toll_free",
+    "VOIP": "voip",
+}
+
+
+def phone_candidate_spans(text: str) -> List[Tuple[int, int]]:
+    return [
+        (m.start(), m.end())
+        for m in _PHONE_CANDIDATE_RE.finditer(text)
+        if sum(c.isdigit() for c in m.group()) >= _PHONE_MIN_DIGITS
+    ]
+
+
+def extract_phones(text: str, default_region: str = "US") -> List[Dict[str, Optional[str]]]:
+    # Every distinct number in text order, as {"number": E.164, "type": "mobile" | "landline" | ... | None}
+    spans = phone_candidate_spans(text)
+    if not spans:
+        return []
+    import phonenumbers
+
+    phones: List[Dict[str, Optional[str]]] = []
+    seen: Set[str] = set()
+    for start, end in spans:
+        for m in phonenumbers.PhoneNumberMatcher(
+            text[max(0, start - 1) : end + 1].translate(_PHONE_SPACES), default_region
+        ):
+            number = phonenumbers.format_number(m.number, phonenumbers.PhoneNumberFormat.E164)
+            if number in seen:
+                continue
+            seen.add(number)
+            kind = phonenumbers.PhoneNumberType.to_string(phonenumbers.number_type(m.number))
+            phones.append({"number": number, "type": _PHONE_TYPES.get(kind)})
+    return phones
 
 
 def extract_phone(text: str, default_region: str = "US") -> Optional[str]:
-    for m in phonenumbers.PhoneNumberMatcher(text, default_region):
-        num = phonenumbers.format_number(m.number, phonenumbers.PhoneNumberFormat.E164)
-        return num
-    return None
+    phones = extract_phones(text, default_region)
+    return phones[0]["number"] if phones else None
 
 
-def extract_price(text: str, doc: spacy.tokens.Doc) -> Optional[float]:
+def _price_from(doc: spacy.tokens.Doc, fallback: Optional[float]) -> Optional[float]:
     # Prefer spaCy MONEY entities; fallback to regex
     for ent in doc.ents:
         if ent.label_ == "MONEY":
@@ -61,95 +384,95 @@ def extract_price(text: str, doc: spacy.tokens.Doc) -> Optional[float]:
                 return float(cleaned)
             except ValueError:
                 pass
-    m = CURRENCY_RE.search(text)
-    if m:
-        try:
-            return float(m.group(1).replace(",", ""))
-        except ValueError:
-            return None
-    return None
+    return fallback
+
+
+def extract_price(text: str, doc: spacy.tokens.Doc) -> Optional[float]:
+    return _price_from(doc, scan_text(text)["currency"])
 
 
 def extract_bed_bath_sqft(text: str) -> Dict[str, Optional[float]]:
-    beds = baths = sqft = None
-    mb = BED_RE.search(text)
-    if mb:
-        try:
-            beds = float(mb.group(1))
-        except ValueError:
-            pass
-    mba = BATH_RE.search(text)
-    if mba:
-        try:
-            baths = float(mba.group(1))
-        except ValueError:
-            pass
-    ms = SQFT_RE.search(text)
-    if ms:
-        try:
-            sqft = float(ms.group(1).replace(",", ""))
-        except ValueError:
-            pass
-    return {"bedrooms": beds, "bathrooms": baths, "square_feet": sqft}
+    scanned = scan_text(text)
+    return {k: scanned[k] for k in ("bedrooms", "bathrooms", "square_feet")}
 
 
 def extract_property_type(text: str) -> Optional[str]:
-    lower = text.lower()
-    for t in PROPERTY_TYPES:
-        if t in lower:
-            return t
-    return None
+    return scan_text(text)["property_type"]
 
 
 def extract_year_built(text: str) -> Optional[int]:
-    m = YEAR_BUILT_RE.search(text)
-    if m:
-        try:
-            y = int(m.group(1))
-            if 1800 <= y <= 2100:
-                return y
-        except ValueError:
-            pass
-    return None
+    return scan_text(text)["year_built"]
 
 
 def extract_lot_size(text: str) -> Optional[str]:
-    m = ACRES_RE.search(text)
-    if m:
-        return f"{m.group(1)} acre"
-    m = LOT_SQFT_RE.search(text)
-    if m:
-        return f"{m.group(1)} sqft"
-    return None
+    return scan_text(text)["lot_size"]
 
 
 def extract_hoa(text: str, doc: spacy.tokens.Doc) -> Optional[float]:
-    m = HOA_RE.search(text)
-    if m:
-        try:
-            return float(m.group(1))
-        except ValueError:
-            pass
-    return None
+    return scan_text(text)["hoa_fees"]
 
 
 def extract_amenities(text: str) -> List[str]:
-    lower = text.lower()
-    found = []
-    for kw in AMENITY_KEYWORDS:
-        if kw in lower:
-            found.append(kw)
-    # de-duplicate & sort for consistency
-    return sorted(list(dict.fromkeys(found)))
-
+    return scan_text(text)["amenities"]
+
+
+def extract_parking(text: str) -> Optional[str]:
+    return scan_text(text)["parking"]
+
+
+def _sentence_end(text: str, start: int) -> int:
+    limit = min(len(text), start + ADDRESS_WINDOW_CHARS)
+    for m in _SENTENCE_END_RE.finditer(text, start, limit):
+        word = text[:m.start()].rsplit(None, 1)[-1].lower() if m.group() != "\n" else ""
+        # "St." / "Ave." end an abbreviation, not the sentence
+        if word.rstrip(".") not in _ABBREVIATIONS:
+            return m.start()
+    return limit
+
+
+def address_candidate_spans(
+    text: str, doc: Optional[spacy.tokens.Doc] = None, limit: int = 8
+) -> List[Tuple[int, int, bool]]:
+    # (start, end, anchored): anchored spans end on a ZIP, state or place entity
+    starts = [m.start() for m in HOUSE_NUMBER_RE.finditer(text)]
+    ends = [m.end() for m in ZIP_RE.finditer(text)]
+    ends += [m.end() for m in STATE_ABBR_RE.finditer(text)]
+    if doc is not None:
+        for ent in doc.ents:
+            if ent.label_ == "FAC":
+                starts.append(ent.start_char)
+            elif ent.label_ in ("GPE", "LOC"):
+                ends.append(ent.end_char)
+    starts.sort()
+
+    spans: Dict[Tuple[int, int, bool], None] = {}
+    anchored: Set[int] = set()
+    # Strongest candidates: a house number / facility followed closely by a ZIP, state or place
+    for end in sorted(set(ends), reverse=True):
+        near = [s for s in starts if end - ADDRESS_WINDOW_CHARS <= s < end]
+        # Closest start first, so it wins ties against a window that swallowed preceding words
+        for start in reversed(near[-2:]):
+            spans.setdefault((start, end, True), None)
+            anchored.add(start)
+    # House numbers with nothing address-like after them: take the rest of the sentence
+    for start in starts:
+        if start not in anchored:
+            spans.setdefault((start, _sentence_end(text, start), False), None)
+    return list(spans)[:limit]
+
+
+@functools.lru_cache(maxsize=4096)
+def _tag_address_window(window: str) -> Optional[Tuple[Tuple[str, str], ...]]:
+    import usaddress
 
-def extract_address(text: str) -> Dict[str, Optional[str]]:
-    # usaddress.tag returns (dict, label)
     try:
-        tagged, _ = usaddress.tag(text)
+        tagged, _ = usaddress.tag(window)
     except usaddress.RepeatedLabelError:
-        return {"street": None,"city": None, "state": None, "postal_code": None}
+        return None
+    return tuple(tagged.items())
+
 
+def _address_from_tags(tagged: Dict[str, str]) -> Dict[str, Optional[str]]:
     street_parts = [
         tagged.get("AddressNumber"),
         tagged.get("StreetNamePreType"),
@@ -171,6 +494,40 @@ def extract_address(text: str) -> Dict[str, Optional[str]]:
     }
 
 
+def extract_address(text: str, doc: Optional[spacy.tokens.Doc] = None) -> Dict[str, Optional[str]]:
+    windows = [(text[start:end].strip(" ,"), anchored) for start, end, anchored in address_candidate_spans(text, doc)]
+    if not windows and len(text) <= ADDRESS_WINDOW_CHARS:
+        # Short inputs (e.g. "Springfield, IL") are cheap enough to tag whole; without a ZIP or state
+        # in them they get the same street-type check as an unanchored window
+        windows = [(text, bool(ZIP_RE.search(text) or STATE_ABBR_RE.search(text)))]
+
+    best: Optional[Dict[str, str]] = None
+    best_score = 0
+    for window, anchored in windows:
+        # usaddress.tag returns (dict, label); tagged windows are cached across parses
+        tags = _tag_address_window(window)
+        if tags is None:
+            # Counted here rather than in the cached tagger, so repeats of a window are counted too
+            metrics.incr("realtor_address_repeated_label_total")
+            continue
+        tagged = dict(tags)
+        if not anchored:
+            # A number plus the rest of the sentence is only a street when it ends in a street type
+            # (St, Ave, Rd, ...); later words are not a trustworthy city/state either
+            if not tagged.get("StreetNamePostType"):
+                continue
+            number = tagged.get("AddressNumber", "")
+            if not number or not HOUSE_NUMBER_RE.match(window, max(window.find(number), 0)):
+                continue
+            tagged = {k: v for k, v in tagged.items() if k not in ("PlaceName", "StateName", "ZipCode")}
+        score = sum(1 for label in _ADDRESS_LABELS if tagged.get(label))
+        if score > best_score:
+            best, best_score = tagged, score
+            if score == len(_ADDRESS_LABELS):
+                break
+    return _address_from_tags(best) if best else dict(_EMPTY_ADDRESS)
+
+
 def extract_contact_name(doc: spacy.tokens.Doc) -> Optional[str]:
     # First PERSON entity is likely the contact name
     for ent in doc.ents:
@@ -179,33 +536,380 @@ def extract_contact_name(doc: spacy.tokens.Doc) -> Optional[str]:
     return None
 
 
-def parse_free_text_to_structured(text: str) -> Dict[str, Any]:
-    nlp = ensure_spacy_model()
-    doc = nlp(text)
-
+def _structured_from_doc(text: str, doc: spacy.tokens.Doc) -> Dict[str, Any]:
+    with metrics.span("realtor_extractor", extractor="regex"):
+        scanned = scan_text(text)
+    with metrics.span("realtor_extractor", extractor="phonenumbers"):
+        phones = extract_phones(text)
+    with metrics.span("realtor_extractor", extractor="usaddress"):
+        address = extract_address(text, doc)
+    with metrics.span("realtor_extractor", extractor="gazetteer"):
+        address = normalize_address(address)
     data: Dict[str, Any] = {
         "contact_name": extract_contact_name(doc),
-        "email": extract_email(text),
-        "phone": extract_phone(text),
-        "address": extract_address(text) | {"country": "US"},
-        "price": extract_price(text, doc),
-        **extract_bed_bath_sqft(text),
-        "lot_size": extract_lot_size(text),
-        "year_built": extract_year_built(text),
-        "property_type": extract_property_type(text),
-        "amenities": extract_amenities(text),
-        "parking": ("garage" if "garage" in text.lower() else ("carport" if "carport" in text.lower() else None)),
-        "hoa_fees": extract_hoa(text, doc),
+        "email": scanned["email"],
+        "phone": phones[0]["number"] if phones else None,
+        "phones": phones,
+        "address": address | {"country": "US"},
+        "price": _price_from(doc, scanned["currency"]),
+        "bedrooms": scanned["bedrooms"],
+        "bathrooms": scanned["bathrooms"],
+        "square_feet": scanned["square_feet"],
+        "lot_size": scanned["lot_size"],
+        "year_built": scanned["year_built"],
+        "property_type": scanned["property_type"],
+        "amenities": scanned["amenities"],
+        "parking": scanned["parking"],
+        "hoa_fees": scanned["hoa_fees"],
+        # Stored on the structured doc so realtor-reparse can find rows written by older heuristics
+        "parser_version": PARSER_VERSION,
     }
 
+    notes = _notes_for(data)
+    if notes:
+        data["notes"] = notes
+
+    return data
+
+
+def _notes_for(data: Dict[str, Any]) -> Optional[str]:
     # Notes can accumulate ambiguous or leftover hints (simple heuristic for now)
     notes: List[str] = []
     if not data.get("contact_name"):
         notes.append("Contact name not confidently detected.")
-    if not any(data["address"].get(k) for k in ("street", "city", "state", "postal_code")):
+    address = data.get("address") or {}
+    if not any(address.get(k) for k in ("street", "city", "state", "postal_code")):
         notes.append("Address not confidently detected.")
-    if notes:
-        data["notes"] = " ".join(notes)
-
+    notes.extend(address_issues(address))
+    return " ".join(notes) or None
+
+
+@functools.lru_cache(maxsize=None)
+def data_files_digest() -> str:
+    # Editing a vocabulary or ZIP file changes extracted fields without a PARSER_VERSION bump. Hashed
+    # once per process, like the matchers and ZIP table loaded from the same files
+    digest = hashlib.sha256()
+    groups = (
+        ("amenity", _vocab_paths(settings.amenity_vocab_paths)),
+        ("property_type", _vocab_paths(settings.property_type_vocab_paths)),
+        ("gazetteer", _vocab_paths(settings.gazetteer_zip_path)),
+    )
+    for group, paths in groups:
+        for path in paths:
+            digest.update(f"{group}\0{path}\0".encode("utf-8"))
+            try:
+                with open(path, "rb") as f:
+                    digest.update(hashlib.file_digest(f, "sha256").digest())
+            except OSError:
+                digest.update(b"missing")
+    return digest.hexdigest()[:16]
+
+
+def _default_cache() -> Optional[ParseCache]:
+    # Keyed on the pipeline and data files too, so switching models or vocabularies never serves
+    # results extracted with another setup
+    return get_parse_cache(f"{PARSER_VERSION}:{DEFAULT_SPACY_MODEL}:{data_files_digest()}")
+
+
+def parse_free_text_to_structured(text: str, nlp: Optional[spacy.Language] = None) -> Dict[str, Any]:
+    # Only the default pipeline is cached; an explicit nlp (tests, parity checks) always parses
+    cache = _default_cache() if nlp is None else None
+    if cache is not None:
+        hit = cache.get(text)
+        metrics.incr("realtor_parse_cache_total", result="miss" if hit is None else "hit")
+        if hit is not None:
+            return hit
+    with metrics.span("realtor_parse"):
+        nlp = nlp or get_nlp()
+        with metrics.span("realtor_extractor", extractor="spacy"):
+            doc = nlp(text)
+        data = _structured_from_doc(text, doc)
+    if cache is not None:
+        cache.put(text, data)
     return data
 
+
+def parse_many(
+    texts: Iterable[str],
+    batch_size: int = 64,
+    n_process: int = 1,
+    nlp: Optional[spacy.Language] = None,
+) -> Iterator[Dict[str, Any]]:
+    # Streams texts through nlp.pipe; results are yielded in input order, one at a time,
+    # so memory stays flat regardless of how many texts are fed in.
+    cache = _default_cache() if nlp is None else None
+    nlp = nlp or get_nlp()
+    if cache is None:
+        for doc in nlp.pipe(texts, batch_size=batch_size, n_process=n_process):
+            yield _structured_from_doc(doc.text, doc)
+        return
+
+    # Cache hits skip the pipeline; `pending` keeps them in input order around the misses
+    pending: deque = deque()
+
+    def misses() -> Iterator[str]:
+        for text in texts:
+            hit = cache.get(text)
+            pending.append((text, hit))
+            if hit is None:
+                yield text
+
+    for doc in nlp.pipe(misses(), batch_size=batch_size, n_process=n_process):
+        while pending[0][1] is not None:
+            yield pending.popleft()[1]
+        text, _ = pending.popleft()
+        data = _structured_from_doc(text, doc)
+        cache.put(text, data)
+        yield data
+    while pending:
+        yield pending.popleft()[1]
+
+
+# Incremental parsing: a description is split into sentences, each parsed (and cached) on its own,
+# and the per-segment results merged. After an edit only the changed sentences miss the cache.
+_SEGMENT_ABBREVIATIONS = _ABBREVIATIONS | {"mr", "mrs", "ms", "jr", "sr", "approx", "no"}
+
+
+def split_segments(text: str) -> List[str]:
+    segments: List[str] = []
+    start = 0
+    for m in _SENTENCE_END_RE.finditer(text):
+        if m.group() != "\n":
+            words = text[start:m.start()].rsplit(None, 1)
+            if words and words[-1].lower().rstrip(".") in _SEGMENT_ABBREVIATIONS:
+                continue
+        segment = text[start:m.end()].strip()
+        if segment:
+            segments.append(segment)
+        start = m.end()
+    tail = text[start:].strip()
+    if tail:
+        segments.append(tail)
+    return segments
+
+
+def _empty(value: Any) -> bool:
+    return value is None or value == "" or value == []
+
+
+def merge_segment_results(results: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    # In text order the first non-empty value of a field wins, as it does in a whole-text parse.
+    # Amenities and phones are unioned; the address comes from the segment that filled the most parts.
+    merged: Dict[str, Any] = {}
+    amenities: Set[str] = set()
+    phones: Dict[str, Dict[str, Optional[str]]] = {}
+    address, address_score = dict(_EMPTY_ADDRESS), 0
+    for data in results:
+        for key, value in data.items():
+            if key in ("address", "amenities", "phones", "notes"):
+                continue
+            if _empty(merged.get(key)):
+                merged[key] = value
+        amenities.update(data.get("amenities") or [])
+        for phone in data.get("phones") or []:
+            phones.setdefault(phone["number"], phone)
+        candidate = data.get("address") or {}
+        score = sum(1 for k in _EMPTY_ADDRESS if candidate.get(k))
+        if score > address_score:
+            address, address_score = {k: candidate.get(k) for k in _EMPTY_ADDRESS}, score
+    merged["address"] = address | {"country": "US"}
+    merged["amenities"] = sorted(amenities)
+    merged["phones"] = list(phones.values())
+    notes = _notes_for(merged)
+    if notes:
+        merged["notes"] = notes
+    return merged
+
+
+class ParserPoolFull(RuntimeError):
+    pass
+
+
+# Set in each pool worker by _init_worker: the (model, minimal) pipeline that worker parses with
+_WORKER_PIPELINE: Optional[Tuple[Optional[str], Optional[bool]]] = None
+
+
+def _init_worker(model: Optional[str], minimal: Optional[bool]) -> None:
+    global _WORKER_PIPELINE
+    _WORKER_PIPELINE = (model, minimal)
+    warm_up(model, minimal)
+
+
+def _worker_parse(text: str) -> Dict[str, Any]:
+    model, minimal = _WORKER_PIPELINE or (None, None)
+    if model is None and minimal is None:
+        return parse_free_text_to_structured(text)
+    return parse_free_text_to_structured(text, nlp=get_nlp(model, minimal))
+
+
+def _worker_parse_batch(texts: List[str]) -> List[Dict[str, Any]]:
+    model, minimal = _WORKER_PIPELINE or (None, None)
+    nlp = None if model is None and minimal is None else get_nlp(model, minimal)
+    return list(parse_many(texts, nlp=nlp))
+
+
+class ParserPool:
+    """Parses on a pool of worker processes, each holding its own copy of the spaCy pipeline.
+
+    At most `max_pending` tasks are queued or running; submit() waits for a free slot (or raises
+    ParserPoolFull when it may not wait), so a burst of requests cannot queue unbounded work.
+    When parse() times out, a process pool replaces its workers so the stuck task stops holding a
+    worker and a slot; a thread pool can only stop waiting for it.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        task_timeout: Optional[float] = None,
+        model: Optional[str] = None,
+        minimal: Optional[bool] = None,
+        processes: bool = True,
+    ) -> None:
+        self.workers = max(1, workers or settings.parser_workers)
+        self.max_pending = max_pending or settings.parser_max_pending or 4 * self.workers
+        timeout = settings.parser_task_timeout_seconds if task_timeout is None else task_timeout
+        self.task_timeout = timeout if timeout and timeout > 0 else None
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._model = model
+        self._minimal = minimal
+        self._use_processes = processes
+        self._executor_lock = threading.Lock()
+        self._executor = self._new_executor()
+        self._closed = False
+
+    def _new_executor(self) -> Any:
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+        import multiprocessing
+
+        if self._use_processes:
+            # spawn, not fork: the UI server has live threads, and workers only import realtor.parser,
+            # which is cheap now that spaCy loads in the initializer
+            return ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self._model, self._minimal),
+            )
+        # In-process threads: same interface without the extra memory, but parses share the GIL
+        return ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="realtor-parse",
+            initializer=_init_worker,
+            initargs=(self._model, self._minimal),
+        )
+
+    def __enter__(self) -> "ParserPool":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.shutdown()
+
+    def _submit(self, fn: Any, arg: Any, block: bool, timeout: Optional[float]) -> Tuple[Any, Any]:
+        # Returns (executor, future): a timed-out task is abandoned on the executor it ran on
+        if self._closed:
+            raise RuntimeError("Parser pool is shut down")
+        acquired = self._slots.acquire(timeout=timeout) if block and timeout is not None else self._slots.acquire(block)
+        if not acquired:
+            metrics.incr("realtor_parser_pool_rejected_total")
+            raise ParserPoolFull(f"Parser pool is at capacity ({self.max_pending} tasks queued or running)")
+        try:
+            with self._executor_lock:
+                executor = self._executor
+                future = executor.submit(fn, arg)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot frees when the task really finishes (or its worker is killed), even if the caller
+        # stopped waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        return executor, future
+
+    def submit(self, text: str, block: bool = True, timeout: Optional[float] = None) -> Any:
+        return self._submit(_worker_parse, text, block, timeout)[1]
+
+    def submit_batch(self, texts: List[str], block: bool = True, timeout: Optional[float] = None) -> Any:
+        return self._submit(_worker_parse_batch, list(texts), block, timeout)[1]
+
+    def _abandon(self, executor: Any, future: Any) -> None:
+        # A queued task is just cancelled. A running one cannot be stopped inside its worker, so a
+        # process pool swaps in a fresh executor and kills the old workers: their tasks fail with
+        # BrokenProcessPool, which frees their slots. That includes other callers' in-flight parses,
+        # so a timeout should be rare. Threads cannot be killed; their slot frees when the task ends.
+        if future.cancel() or not self._use_processes:
+            return
+        with self._executor_lock:
+            if self._closed or self._executor is not executor:
+                return  # shut down, or another timeout already replaced this executor
+            self._executor = self._new_executor()
+        metrics.incr("realtor_parser_pool_recycled_total")
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def warm(self) -> None:
+        # One task per worker before any is idle makes the executor start them all, so every
+        # worker has loaded its pipeline before the first real request
+        for future in [self.submit("Warm up the pipeline at 1 Main St.") for _ in range(self.workers)]:
+            future.result()
+
+    def parse(self, text: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        from concurrent.futures import TimeoutError as FutureTimeout
+
+        executor, future = self._submit(_worker_parse, text, True, None)
+        try:
+            with metrics.span("realtor_parser_pool"):
+                return future.result(timeout if timeout is not None else self.task_timeout)
+        except FutureTimeout:
+            self._abandon(executor, future)
+            raise TimeoutError(f"Parse did not finish within {timeout or self.task_timeout}s") from None
+
+    def map(self, texts: Iterable[str], chunk_size: int = 32) -> Iterator[Dict[str, Any]]:
+        # Results in input order; chunks are submitted as slots free up, so memory stays bounded
+        pending: deque = deque()
+        chunk: List[str] = []
+
+        def drain(block: bool) -> Iterator[Dict[str, Any]]:
+            while pending and (block or pending[0][0].done()):
+                future, size = pending.popleft()
+                yield from future.result(self.task_timeout * size if self.task_timeout else None)
+
+        for text in texts:
+            chunk.append(text)
+            if len(chunk) >= chunk_size:
+                pending.append((self.submit_batch(chunk), len(chunk)))
+                chunk = []
+                yield from drain(block=False)
+        if chunk:
+            pending.append((self.submit_batch(chunk), len(chunk)))
+        yield from drain(block=True)
+
+    def shutdown(self, wait: bool = True) -> None:
+        # Queued tasks are cancelled; running ones finish
+        with self._executor_lock:
+            self._closed = True
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_POOL: Optional[ParserPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_parser_pool() -> ParserPool:
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                import atexit
+
+                _POOL = ParserPool(processes=settings.parser_processes)
+                atexit.register(shutdown_parser_pool)
+    return _POOL
+
+
+def shutdown_parser_pool(wait: bool = True) -> None:
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.shutdown(wait=wait)
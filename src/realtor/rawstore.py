@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import logging
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+from . import metrics
+from .config import settings
+
+if TYPE_CHECKING:
+    from pymongo.collection import Collection
+    from zstandard import ZstdCompressionDict
+
+logger = logging.getLogger(__name__)
+
+# Raw description text is stored either plainly in "text", or zstd-compressed in "text_z" with the
+# id of the dictionary it was compressed with ("text_dict", None for none) and its UTF-8 size
+# ("text_size"). Readers project RAW_TEXT_PROJECTION and go through raw_text().
+CODECS = ("zstd",)
+RAW_TEXT_PROJECTION = {"text": 1, "text_z": 1, "text_dict": 1}
+DICT_SIZE = 32 * 1024
+DICT_SAMPLES = 5000
+
+
+def _zstd() -> Any:
+    try:
+        import zstandard
+    except ImportError as e:
+        raise RuntimeError("Compressed raw storage needs zstandard: pip install 'realtor[zstd]'") from e
+    return zstandard
+
+
+def dictionary_collection() -> Collection:
+    from .db import _get_collection
+
+    return _get_collection(settings.collection_raw_dictionaries)
+
+
+# Dictionaries never change once stored, so each process loads a given id at most once
+_DICTS: Dict[int, ZstdCompressionDict] = {}
+# The active dictionary and when it was looked up; re-read after ACTIVE_RECHECK_SECONDS so writers
+# pick up a dictionary trained by another process (or the first one, if none existed yet)
+_ACTIVE: Dict[str, Tuple[float, Optional[ZstdCompressionDict]]] = {}
+ACTIVE_RECHECK_SECONDS = 60.0
+_LOCK = threading.Lock()
+# zstd (de)compressors are not safe to share between threads
+_LOCAL = threading.local()
+
+
+def load_dictionary(dict_id: int) -> ZstdCompressionDict:
+    with _LOCK:
+        dictionary = _DICTS.get(dict_id)
+    if dictionary is None:
+        doc = dictionary_collection().find_one({"_id": dict_id})
+        if doc is None:
+            raise RuntimeError(f"Compression dictionary {dict_id} not found in {settings.collection_raw_dictionaries}")
+        dictionary = _zstd().ZstdCompressionDict(doc["data"])
+        with _LOCK:
+            _DICTS[dict_id] = dictionary
+    return dictionary
+
+
+def active_dictionary() -> Optional[ZstdCompressionDict]:
+    # The newest stored dictionary compresses new writes; older ones stay loadable for reads
+    now = time.monotonic()
+    with _LOCK:
+        cached = _ACTIVE.get("dict")
+        if cached is not None and now - cached[0] < ACTIVE_RECHECK_SECONDS:
+            return cached[1]
+    doc = dictionary_collection().find_one({}, {"_id": 1}, sort=[("created_at", DESCENDING)])
+    dictionary = load_dictionary(doc["_id"]) if doc else None
+    with _LOCK:
+        _ACTIVE["dict"] = (now, dictionary)
+    return dictionary
+
+
+def train_dictionary(samples: List[str], size: int = DICT_SIZE) -> ZstdCompressionDict:
+    zstd = _zstd()
+    try:
+        return zstd.train_dictionary(size, [s.encode("utf-8") for s in samples if s])
+    except zstd.ZstdError as e:
+        raise RuntimeError(f"Could not train a dictionary from {len(samples)} samples: {e}") from e
+
+
+def store_dictionary(dictionary: ZstdCompressionDict, samples: int) -> int:
+    dict_id = dictionary.dict_id()
+    data = dictionary.as_bytes()
+    dictionary_collection().replace_one(
+        {"_id": dict_id},
+        {"_id": dict_id, "data": data, "size": len(data), "samples": samples, "created_at": datetime.now(timezone.utc)},
+        upsert=True,
+    )
+    with _LOCK:
+        _DICTS[dict_id] = dictionary
+        _ACTIVE["dict"] = (time.monotonic(), dictionary)
+    return dict_id
+
+
+def _codecs() -> Dict[Any, Any]:
+    codecs = getattr(_LOCAL, "codecs", None)
+    if codecs is None:
+        codecs = _LOCAL.codecs = {}
+    return codecs
+
+
+def compress_text(
+    text: str, dictionary: Optional[ZstdCompressionDict] = None, level: Optional[int] = None
+) -> Dict[str, Any]:
+    level = settings.raw_compression_level if level is None else level
+    dict_id = dictionary.dict_id() if dictionary is not None else None
+    codecs = _codecs()
+    compressor = codecs.get(("c", dict_id, level))
+    if compressor is None:
+        compressor = codecs[("c", dict_id, level)] = _zstd().ZstdCompressor(level=level, dict_data=dictionary)
+    data = text.encode("utf-8")
+    return {"text_z": compressor.compress(data), "text_dict": dict_id, "text_size": len(data)}
+
+
+def raw_text(doc: Dict[str, Any]) -> str:
+    # The description of a raw document, whichever way it is stored
+    text = doc.get("text")
+    if text is not None:
+        return text
+    blob = doc.get("text_z")
+    if blob is None:
+        return ""
+    dict_id = doc.get("text_dict")
+    codecs = _codecs()
+    decompressor = codecs.get(("d", dict_id))
+    if decompressor is None:
+        dictionary = load_dictionary(dict_id) if dict_id is not None else None
+        decompressor = codecs[("d", dict_id)] = _zstd().ZstdDecompressor(dict_data=dictionary)
+    return decompressor.decompress(bytes(blob)).decode("utf-8")
+
+
+def stored_text(text: str) -> Dict[str, Any]:
+    # The text fields of a new raw document under the configured RAW_COMPRESSION
+    codec = settings.raw_compression.strip().lower()
+    if not codec:
+        return {"text": text}
+    if codec not in CODECS:
+        raise ValueError(f"Unknown RAW_COMPRESSION {settings.raw_compression!r}; expected one of {', '.join(CODECS)}")
+    return compress_text(text, active_dictionary())
+
+
+@dataclass
+class MigrationStats:
+    documents: int = 0
+    batches: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def saved_per_document(self) -> float:
+        return (self.bytes_before - self.bytes_after) / self.documents if self.documents else 0.0
+
+    @property
+    def ratio(self) -> float:
+        return self.bytes_before / self.bytes_after if self.bytes_after else 0.0
+
+
+def sample_texts(size: int = DICT_SAMPLES) -> List[str]:
+    from .db import collections
+
+    raw_col, _ = collections()
+    return [raw_text(doc) for doc in raw_col.aggregate([{"$sample": {"size": size}}, {"$project": RAW_TEXT_PROJECTION}])]
+
+
+def _iter_batches(query: Dict[str, Any], projection: Dict[str, Any], batch_size: int) -> Any:
+    # _id range batches; migrated documents stop matching `query`, so a rerun picks up where a killed one stopped
+    from .db import collections
+
+    raw_col, _ = collections()
+    after = None
+    while True:
+        batch_query = {**query, "_id": {"$gt": after}} if after is not None else query
+        batch = list(raw_col.find(batch_query, projection).sort("_id", ASCENDING).limit(batch_size))
+        if not batch:
+            return
+        yield raw_col, batch
+        after = batch[-1]["_id"]
+
+
+def compress_raw_documents(
+    batch_size: int = 500,
+    level: Optional[int] = None,
+    limit: Optional[int] = None,
+    report: Optional[Any] = None,
+) -> MigrationStats:
+    # Rewrites plain raw documents as compressed ones; `report` (a csv.writer) gets one row per document
+    dictionary = active_dictionary()
+    stats = MigrationStats()
+    started = time.perf_counter()
+    for raw_col, batch in _iter_batches({"text": {"$type": "string"}}, {"text": 1}, batch_size):
+        ops = []
+        for doc in batch:
+            fields = compress_text(doc["text"], dictionary, level)
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": fields, "$unset": {"text": ""}}))
+            stats.bytes_before += fields["text_size"]
+            stats.bytes_after += len(fields["text_z"])
+            if report is not None:
+                report.writerow([str(doc["_id"]), fields["text_size"], len(fields["text_z"])])
+        with metrics.span("realtor_mongo", op="compress_raw"):
+            raw_col.bulk_write(ops, ordered=False)
+        stats.documents += len(batch)
+        stats.batches += 1
+        stats.elapsed_seconds = time.perf_counter() - started
+        logger.info("Compressed %d documents, %.0f bytes saved per document", stats.documents, stats.saved_per_document)
+        if limit is not None and stats.documents >= limit:
+            break
+    stats.elapsed_seconds = time.perf_counter() - started
+    return stats
+
+
+def decompress_raw_documents(batch_size: int = 500) -> int:
+    # The reverse migration, e.g. to bring documents back under the raw text index
+    done = 0
+    for raw_col, batch in _iter_batches({"text_z": {"$exists": True}}, RAW_TEXT_PROJECTION, batch_size):
+        unset = {"text_z": "", "text_dict": "", "text_size": ""}
+        ops = [UpdateOne({"_id": doc["_id"]}, {"$set": {"text": raw_text(doc)}, "$unset": unset}) for doc in batch]
+        with metrics.span("realtor_mongo", op="decompress_raw"):
+            raw_col.bulk_write(ops, ordered=False)
+        done += len(batch)
+        logger.info("Decompressed %d documents", done)
+    return done
+
+
+def storage_stats() -> Dict[str, Any]:
+    from .db import collections
+
+    raw_col, _ = collections()
+    compressed = {"$ifNull": ["$text_z", False]}
+    plain_bytes = {"$strLenBytes": {"$ifNull": ["$text", ""]}}
+    pipeline = [
+        {
+            "$group": {
+                "_id": {"$cond": [compressed, "compressed", "plain"]},
+                "documents": {"$sum": 1},
+                "text_bytes": {"$sum": {"$ifNull": ["$text_size", plain_bytes]}},
+                "stored_bytes": {"$sum": {"$cond": [compressed, {"$binarySize": "$text_z"}, plain_bytes]}},
+            }
+        }
+    ]
+    return {doc.pop("_id"): doc for doc in raw_col.aggregate(pipeline)}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(
+        prog="realtor-rawstore",
+        description="Compressed storage of raw descriptions: train a zstd dictionary, migrate documents, report sizes.",
+    )
+    sub = ap.add_subparsers(dest="command", required=True)
+    train = sub.add_parser("train", help="Train a dictionary on a sample of stored descriptions and store it in MongoDB")
+    train.add_argument("--samples", type=int, default=DICT_SAMPLES, help=f"Descriptions to sample (default: {DICT_SAMPLES})")
+    train.add_argument("--size", type=int, default=DICT_SIZE, help=f"Dictionary size in bytes (default: {DICT_SIZE})")
+    migrate = sub.add_parser("migrate", help="Compress plain raw documents in place, in batches")
+    migrate.add_argument("--batch-size", type=int, default=500, help="Documents per bulk write (default: 500)")
+    migrate.add_argument("--level", type=int, help="zstd level (default: RAW_COMPRESSION_LEVEL)")
+    migrate.add_argument("--limit", type=int, help="Stop after about this many documents")
+    migrate.add_argument("--report", help="Write a CSV of _id, bytes before, bytes after per document ('-' for stdout)")
+    decompress = sub.add_parser("decompress", help="Rewrite compressed raw documents as plain text")
+    decompress.add_argument("--batch-size", type=int, default=500)
+    sub.add_parser("stats", help="Document counts and text bytes, plain vs compressed")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stderr)
+    metrics.configure_from_settings()
+    if args.command == "train":
+        samples = sample_texts(args.samples)
+        dict_id = store_dictionary(train_dictionary(samples, args.size), len(samples))
+        logger.info("Stored dictionary %d trained on %d descriptions", dict_id, len(samples))
+    elif args.command == "migrate":
+        if active_dictionary() is None:
+            logger.warning("No dictionary stored; compressing without one (run 'realtor-rawstore train' first)")
+        out = None
+        if args.report:
+            out = sys.stdout if args.report == "-" else open(args.report, "w", newline="", encoding="utf-8")
+        try:
+            report = csv.writer(out) if out is not None else None
+            if report is not None:
+                report.writerow(["_id", "bytes_before", "bytes_after"])
+            stats = compress_raw_documents(args.batch_size, args.level, args.limit, report)
+        finally:
+            if out is not None and out is not sys.stdout:
+                out.close()
+        logger.info(
+            "Done: %d documents in %.1fs; %d -> %d text bytes (%.1fx), %.0f bytes saved per document",
+            stats.documents,
+            stats.elapsed_seconds,
+            stats.bytes_before,
+            stats.bytes_after,
+            stats.ratio,
+            stats.saved_per_document,
+        )
+    elif args.command == "decompress":
+        logger.info("Done: %d documents decompressed", decompress_raw_documents(args.batch_size))
+    else:
+        for kind, row in sorted(storage_stats().items()):
+            saved = row["text_bytes"] - row["stored_bytes"]
+            print(
+                f"{kind:>10}: {row['documents']} documents, {row['text_bytes']} text bytes stored as "
+                f"{row['stored_bytes']} ({saved / row['documents'] if row['documents'] else 0:.0f} bytes saved per document)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne
+from pymongo.collection import Collection
+
+from . import metrics
+from .config import settings
+from .db import _get_collection, collections, parsed_updates
+from .metrics import configure_from_settings
+from .parser import PARSER_VERSION, ParserPool, parse_many
+from .rawstore import RAW_TEXT_PROJECTION, raw_text
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = "reparse"
+
+
+@dataclass
+class ReparseStats:
+    scanned: int = 0
+    updated: int = 0
+    current: int = 0  # already written by this parser version
+    orphaned: int = 0  # raw descriptions without a structured doc
+    batches: int = 0
+    last_id: Optional[ObjectId] = None
+    elapsed_seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.scanned / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+def checkpoint_collection() -> Collection:
+    return _get_collection(settings.collection_jobs)
+
+
+def checkpoint_id(version: str = PARSER_VERSION) -> str:
+    # One checkpoint per parser version: a newer parser starts over from the first description
+    return f"{JOB_NAME}:{version}"
+
+
+def load_checkpoint(version: str = PARSER_VERSION) -> Optional[ObjectId]:
+    doc = checkpoint_collection().find_one({"_id": checkpoint_id(version)})
+    return doc.get("last_id") if doc else None
+
+
+def save_checkpoint(
+    last_id: Optional[ObjectId],
+    scanned: int = 0,
+    updated: int = 0,
+    done: bool = False,
+    version: str = PARSER_VERSION,
+) -> None:
+    now = datetime.now(timezone.utc)
+    checkpoint_collection().update_one(
+        {"_id": checkpoint_id(version)},
+        {
+            "$set": {"last_id": last_id, "parser_version": version, "done": done, "updated_at": now},
+            "$inc": {"scanned": scanned, "updated": updated},
+            "$setOnInsert": {"started_at": now},
+        },
+        upsert=True,
+    )
+
+
+def clear_checkpoint(version: str = PARSER_VERSION) -> None:
+    checkpoint_collection().delete_one({"_id": checkpoint_id(version)})
+
+
+def iter_raw_batches(after: Optional[ObjectId] = None, batch_size: int = 500) -> Iterator[List[Dict[str, Any]]]:
+    # One _id range query per batch rather than one long cursor, so nothing times out between
+    # batches and a restart only needs the last _id
+    raw_col, _ = collections()
+    while True:
+        query = {"_id": {"$gt": after}} if after is not None else {}
+        with metrics.span("realtor_mongo", op="reparse_scan"):
+            batch = list(raw_col.find(query, RAW_TEXT_PROJECTION).sort("_id", ASCENDING).limit(batch_size))
+        if not batch:
+            return
+        yield batch
+        after = batch[-1]["_id"]
+
+
+def _value_at(doc: Dict[str, Any], path: str) -> Any:
+    value: Any = doc
+    for part in path.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def reparse_update(
+    existing: Dict[str, Any], parsed: Dict[str, Any], now: datetime, overwrite_legacy: bool = False
+) -> Dict[str, Any]:
+    # Every parser field is rewritten (a value the new parser no longer finds is cleared), except
+    # the ones recorded in edited_fields. Rows saved before edited_fields existed carry no record of
+    # hand edits, so by default they only get their empty fields filled in. Such a row keeps its old
+    # parser_version: its other fields are still the old parser's, and --overwrite-legacy must find it.
+    if "edited_fields" in existing or overwrite_legacy:
+        update = parsed_updates({"notes": None, **parsed}, existing.get("edited_fields") or [], keep_empty=True)
+        update.update(parser_version=parsed.get("parser_version", PARSER_VERSION), updated_at=now)
+    else:
+        update = {
+            path: value
+            for path, value in parsed_updates(parsed).items()
+            if path != "parser_version" and _value_at(existing, path) in (None, "", [])
+        }
+        if update:
+            update["updated_at"] = now
+    update["reparsed_at"] = now
+    return {"$set": update}
+
+
+def reparse_listings(
+    batch_size: int = 500,
+    n_process: int = 1,
+    pool: Optional[ParserPool] = None,
+    force: bool = False,
+    restart: bool = False,
+    limit: Optional[int] = None,
+    overwrite_legacy: bool = False,
+) -> ReparseStats:
+    if restart:
+        clear_checkpoint()
+    _, structured_col = collections()
+    stats = ReparseStats(last_id=load_checkpoint())
+    if stats.last_id is not None:
+        logger.info("Resuming after %s", stats.last_id)
+    started = time.perf_counter()
+    for batch in iter_raw_batches(stats.last_id, batch_size):
+        raw_ids = [str(doc["_id"]) for doc in batch]
+        with metrics.span("realtor_mongo", op="reparse_lookup"):
+            listings = list(
+                structured_col.find(
+                    {"description_raw_id": {"$in": raw_ids}},
+                    # Whole documents: rows without edited_fields are compared field by field
+                    {"photos": 0},
+                )
+            )
+        by_raw: Dict[str, List[Dict[str, Any]]] = {}
+        for listing in listings:
+            by_raw.setdefault(listing["description_raw_id"], []).append(listing)
+        stats.orphaned += sum(1 for raw_id in raw_ids if raw_id not in by_raw)
+
+        # Only descriptions with a stale listing are parsed
+        stale = [
+            doc
+            for doc in batch
+            if any(force or l.get("parser_version") != PARSER_VERSION for l in by_raw.get(str(doc["_id"]), []))
+        ]
+        stats.current += sum(1 for raw_id in raw_ids if raw_id in by_raw) - len(stale)
+        texts = [raw_text(doc) for doc in stale]
+        if pool is not None:
+            parsed_rows = pool.map(texts)
+        else:
+            parsed_rows = parse_many(texts, batch_size=min(batch_size, 256), n_process=n_process)
+
+        now = datetime.now(timezone.utc)
+        ops = [
+            UpdateOne({"_id": listing["_id"]}, reparse_update(listing, parsed, now, overwrite_legacy))
+            for doc, parsed in zip(stale, parsed_rows)
+            for listing in by_raw[str(doc["_id"])]
+            if force or listing.get("parser_version") != PARSER_VERSION
+        ]
+        updated = 0
+        if ops:
+            with metrics.span("realtor_mongo", op="reparse_write"):
+                updated = structured_col.bulk_write(ops, ordered=False).modified_count
+
+        stats.scanned += len(batch)
+        stats.updated += updated
+        stats.batches += 1
+        stats.last_id = batch[-1]["_id"]
+        # Written after the batch's updates, so a killed job redoes at most one batch
+        save_checkpoint(stats.last_id, len(batch), updated)
+        stats.elapsed_seconds = time.perf_counter() - started
+        logger.info(
+            "Re-parsed %d listings, %d descriptions scanned (%.1f rows/s)",
+            stats.updated,
+            stats.scanned,
+            stats.rows_per_second,
+        )
+        if limit is not None and stats.scanned >= limit:
+            break
+    else:
+        save_checkpoint(stats.last_id, done=True)
+    stats.elapsed_seconds = time.perf_counter() - started
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(
+        prog="realtor-reparse",
+        description="Re-parse stored descriptions whose listing was produced by an older parser version. "
+        "Fields an agent edited by hand are kept. Progress is checkpointed in MongoDB; rerunning resumes.",
+    )
+    ap.add_argument("--batch-size", type=int, default=500, help="Descriptions per _id range batch (default: 500)")
+    ap.add_argument(
+        "--workers",
+        type=int,
+        default=settings.parser_workers,
+        help="Parser worker processes (default: PARSER_WORKERS; 0 parses in-process)",
+    )
+    ap.add_argument("--n-process", type=int, default=1, help="spaCy worker processes when --workers is 0 (default: 1)")
+    ap.add_argument("--force", action="store_true", help="Re-parse listings already at the current parser version")
+    ap.add_argument(
+        "--overwrite-legacy",
+        action="store_true",
+        help="Rewrite every parser field of rows saved without edited_fields too (default: only fill their empty fields)",
+    )
+    ap.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the first description")
+    ap.add_argument("--limit", type=int, help="Stop after about this many descriptions (the checkpoint is kept)")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    configure_from_settings()
+    pool = ParserPool(workers=args.workers) if args.workers > 0 else None
+    try:
+        stats = reparse_listings(
+            args.batch_size, args.n_process, pool, args.force, args.restart, args.limit, args.overwrite_legacy
+        )
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    logger.info(
+        "Done: %d scanned, %d re-parsed, %d already current, %d without a listing in %.1fs (%.1f rows/s); "
+        "parser version %s",
+        stats.scanned,
+        stats.updated,
+        stats.current,
+        stats.orphaned,
+        stats.elapsed_seconds,
+        stats.rows_per_second,
+        PARSER_VERSION,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from . import metrics
+from .db import RECENT_PROJECTION, collections, listing_filter, recent_item
+
+# Upper bounds of the price facet buckets ($bucket boundaries are inclusive lower, exclusive upper)
+PRICE_BUCKETS = [0, 100_000, 250_000, 500_000, 750_000, 1_000_000, 2_000_000, float("inf")]
+FACET_LIMIT = 20
+# Raw descriptions matched by keyword are joined back to their structured docs via description_raw_id
+RAW_MATCH_LIMIT = 500
+
+
+def _price_label(lower: float) -> str:
+    i = PRICE_BUCKETS.index(lower)
+    upper = PRICE_BUCKETS[i + 1]
+    if upper == float("inf"):
+        return f"${lower:,.0f}+"
+    return f"${lower:,.0f}-${upper:,.0f}"
+
+
+def _count_by(field: str) -> List[Dict[str, Any]]:
+    # $sortByCount, with a stable tie order
+    return [
+        {"$group": {"_id": field, "count": {"$sum": 1}}},
+        {"$sort": {"count": -1, "_id": 1}},
+        {"$limit": FACET_LIMIT},
+    ]
+
+
+def build_search_pipeline(
+    match: Dict[str, Any], text_search: bool, limit: int = 20
+) -> List[Dict[str, Any]]:
+    pipeline: List[Dict[str, Any]] = [{"$match": match}]
+    if text_search:
+        pipeline.append({"$addFields": {"score": {"$meta": "textScore"}}})
+        result_sort: Dict[str, Any] = {"score": -1, "created_at": -1, "_id": -1}
+    else:
+        result_sort = {"created_at": -1, "_id": -1}
+    pipeline.append(
+        {
+            "$facet": {
+                "results": [
+                    {"$sort": result_sort},
+                    {"$limit": limit},
+                    {"$project": {**RECENT_PROJECTION, "property_type": 1, "amenities": 1, "score": 1}},
+                ],
+                "total": [{"$count": "count"}],
+                "property_type": _count_by("$property_type"),
+                "city": _count_by("$address.city"),
+                "bedrooms": _count_by("$bedrooms"),
+                "price": [
+                    {
+                        "$bucket": {
+                            "groupBy": {"$ifNull": ["$price", -1]},
+                            "boundaries": PRICE_BUCKETS,
+                            "default": "unknown",
+                            "output": {"count": {"$sum": 1}},
+                        }
+                    }
+                ],
+            }
+        }
+    )
+    return pipeline
+
+
+def format_facets(facet_doc: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    facets: Dict[str, List[Dict[str, Any]]] = {}
+    for name in ("property_type", "city", "bedrooms"):
+        facets[name] = [{"value": b["_id"], "count": b["count"]} for b in facet_doc.get(name, []) if b["_id"] is not None]
+    facets["price"] = [
+        {"value": _price_label(b["_id"]) if b["_id"] != "unknown" else "unknown", "count": b["count"]}
+        for b in facet_doc.get("price", [])
+    ]
+    return facets
+
+
+def search_listings(query: str = "", limit: int = 20, **filters: Any) -> Dict[str, Any]:
+    raw_col, structured_col = collections()
+    match = listing_filter(**filters)
+    query = query.strip()
+    if query:
+        text = {"$text": {"$search": query}}
+        with metrics.span("realtor_mongo", op="search_raw"):
+            raw_ids = [
+                str(doc["_id"])
+                for doc in raw_col.find(text, {"_id": 1}).sort([("score", {"$meta": "textScore"})]).limit(RAW_MATCH_LIMIT)
+            ]
+        # Every $or branch is indexed (text index, description_raw_id), as $text inside $or requires
+        keyword = {"$or": [text, {"description_raw_id": {"$in": raw_ids}}]} if raw_ids else text
+        match = {"$and": [keyword, match]} if match else keyword
+
+    with metrics.span("realtor_mongo", op="search_listings"):
+        facet_doc: Optional[Dict[str, Any]] = next(
+            structured_col.aggregate(build_search_pipeline(match, bool(query), limit)), None
+        )
+    facet_doc = facet_doc or {}
+    total = facet_doc.get("total") or [{"count": 0}]
+    return {
+        "total": total[0]["count"],
+        "results": [
+            {**recent_item(doc), "property_type": doc.get("property_type"), "score": doc.get("score")}
+            for doc in facet_doc.get("results", [])
+        ],
+        "facets": format_facets(facet_doc),
+    }
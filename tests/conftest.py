@@ -0,0 +1,18 @@
+import mongomock
+import pytest
+
+from realtor import db
+
+
+@pytest.fixture
+def mongo_client():
+    return mongomock.MongoClient()
+
+
+@pytest.fixture
+def fake_collections(monkeypatch, mongo_client):
+    # In-memory raw and structured collections behind realtor.db; modules that bound collections at
+    # import time, or need the client itself, patch those on top of this fixture
+    raw, structured = mongo_client.realtor.seller_description, mongo_client.realtor.property_data
+    monkeypatch.setattr(db, "collections", lambda: (raw, structured))
+    return raw, structured
@@ -0,0 +1,110 @@
+import asyncio
+from datetime import datetime, timezone
+
+import mongomock
+import pytest
+
+from realtor import async_db, db
+
+
+class FakeAsyncCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, n):
+        self._cursor = self._cursor.limit(n)
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._cursor:
+            await asyncio.sleep(0)
+            yield doc
+
+
+class FakeAsyncCollection:
+    # In-process stand-in for pymongo's AsyncCollection, backed by mongomock
+    def __init__(self, collection):
+        self._collection = collection
+
+    async def insert_one(self, doc):
+        await asyncio.sleep(0)
+        return self._collection.insert_one(doc)
+
+    def find(self, *args, **kwargs):
+        return FakeAsyncCursor(self._collection.find(*args, **kwargs))
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    database = mongomock.MongoClient().realtor
+
+    async def fake_get_collection(name):
+        return FakeAsyncCollection(database[name])
+
+    monkeypatch.setattr(async_db, "_get_collection", fake_get_collection)
+    return database
+
+
+def test_async_save_and_list_recent(fake_db):
+    async def scenario():
+        raw_id = await async_db.save_raw_description("3 beds at 1 Main St")
+        for day, name in ((1, "Ann"), (2, "Bob")):
+            created = datetime(2026, 1, day, tzinfo=timezone.utc)
+            await async_db.save_property_data({"description_raw_id": raw_id, "contact_name": name, "created_at": created})
+        return raw_id, await async_db.list_recent(limit=1)
+
+    raw_id, recent = asyncio.run(scenario())
+
+    assert fake_db.seller_description.find_one()["text"] == "3 beds at 1 Main St"
+    assert [item["contact_name"] for item in recent] == ["Bob"]
+    assert recent[0]["description_raw_id"] == raw_id
+    assert fake_db.property_data.find_one({"contact_name": "Ann"})["updated_at"] is not None
+
+
+def test_list_recent_breaks_created_at_ties_on_id(fake_db):
+    created = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    async def scenario():
+        for name in ("Ann", "Bob", "Cy"):
+            await async_db.save_property_data({"contact_name": name, "created_at": created})
+        return await async_db.list_recent(limit=2)
+
+    # Same created_at: the later _id comes first, as in db.list_recent
+    assert [item["contact_name"] for item in asyncio.run(scenario())] == ["Cy", "Bob"]
+
+
+def test_concurrent_coroutines_share_one_client(monkeypatch):
+    created = []
+
+    class FakeClient:
+        def __init__(self, *args, **kwargs):
+            created.append(self)
+            self.admin = self
+
+        async def command(self, name):
+            await asyncio.sleep(0.01)
+
+    monkeypatch.setattr(async_db, "AsyncMongoClient", FakeClient)
+
+    async def scenario():
+        clients = await asyncio.gather(*(async_db._get_client() for _ in range(5)))
+        async_db._CLIENTS.pop(asyncio.get_running_loop())
+        return clients
+
+    clients = asyncio.run(scenario())
+    assert len(created) == 1 and all(c is created[0] for c in clients)
+
+
+def test_client_options_follow_settings(monkeypatch):
+    monkeypatch.setattr(db, "settings", db.settings.__class__(mongo_write_concern="majority", mongo_timeout_ms=500))
+    options = db.client_options()
+    assert options["w"] == "majority"
+    assert options["timeoutMS"] == 500
+    assert options["maxPoolSize"] == db.settings.mongo_max_pool_size
@@ -0,0 +1,41 @@
+import json
+
+import spacy
+
+from realtor import bench
+
+
+def test_generated_corpus_is_deterministic_and_labelled():
+    corpus = bench.generate_corpus(per_size=3, seed=1)
+
+    assert corpus == bench.generate_corpus(per_size=3, seed=1)
+    assert [item["size"] for item in corpus] == ["short"] * 3 + ["medium"] * 3 + ["long"] * 3
+    assert all(item["labels"]["address.city"] in item["text"] for item in corpus)
+    assert len(corpus[-1]["text"]) > 5 * len(corpus[3]["text"])
+
+
+def test_corpus_bench_reports_stages_and_field_accuracy():
+    corpus = bench.generate_corpus(per_size=4)
+    for item in corpus:
+        item["labels"].pop("contact_name", None)  # no NER in a blank pipeline
+
+    report = bench.corpus_bench(corpus, spacy.blank("en"))
+
+    assert set(report["latency"]) == {(size, stage) for size in bench.SIZE_CLASSES for stage in bench.STAGES}
+    assert all(report["throughput"][size] > 0 for size in bench.SIZE_CLASSES)
+    # Regex, usaddress and phonenumbers fields are fully determined by the generated text
+    assert report["accuracy"] == {key: 1.0 for key in report["accuracy"]}
+
+
+def test_field_accuracy_counts_mismatches():
+    corpus = [{"labels": {"price": 100.0, "address.city": "Austin", "amenities": ["pool", "deck"]}}]
+    wrong = [{"price": 100.001, "address": {"city": "Dallas"}, "amenities": ["deck", "pool"]}]
+
+    assert bench.field_accuracy(corpus, wrong) == {"address.city": 0.0, "amenities": 1.0, "price": 1.0}
+
+
+def test_dump_corpus_round_trips(tmp_path):
+    path = tmp_path / "corpus.jsonl"
+    bench.main(["--per-size", "2", "--dump-corpus", str(path)])
+
+    assert bench.read_corpus(str(path)) == [json.loads(line) for line in path.read_text().splitlines()]
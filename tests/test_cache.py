@@ -0,0 +1,91 @@
+import dataclasses
+
+import mongomock
+import spacy
+
+from realtor import parser
+from realtor.cache import ParseCache
+
+
+def test_lru_eviction_and_normalized_keys():
+    cache = ParseCache("v1", max_entries=2)
+    cache.put("a  b", {"x": 1})
+    cache.put("c", {"x": 2})
+    assert cache.get("a b\n") == {"x": 1}  # whitespace-normalized, and now most recent
+    cache.put("d", {"x": 3})
+
+    assert cache.get("c") is None
+    assert cache.stats() == {
+        "hits": 1, "misses": 1, "persistent_hits": 0, "evictions": 1, "persistent_errors": 0, "size": 2,
+    }
+
+
+def test_results_are_copied_and_expire(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("realtor.cache.time.monotonic", lambda: clock[0])
+    cache = ParseCache("v1", ttl_seconds=10)
+    cache.put("text", {"amenities": ["pool"]})
+    cache.get("text")["amenities"].append("mutated")
+    assert cache.get("text") == {"amenities": ["pool"]}
+
+    clock[0] += 11
+    assert cache.get("text") is None
+
+
+def test_persistent_tier_is_shared_and_version_scoped():
+    collection = mongomock.MongoClient().realtor.parse_cache
+    ParseCache("v1", collection=collection).put("text", {"price": 1.0})
+
+    fresh = ParseCache("v1", collection=collection)
+    assert fresh.get("text") == {"price": 1.0}
+    assert fresh.stats()["persistent_hits"] == 1
+
+    upgraded = ParseCache("v2", collection=collection)
+    assert collection.count_documents({}) == 0  # stale v1 entries purged on attach
+    assert upgraded.get("text") is None
+
+
+def test_parse_uses_default_cache(monkeypatch):
+    cache = ParseCache("test")
+    monkeypatch.setattr(parser, "_default_cache", lambda: cache)
+    monkeypatch.setattr(parser, "get_nlp", lambda *a, **k: spacy.blank("en"))
+
+    texts = ["3 beds in a condo", "2 baths", "3 beds in a condo", "Duplex"]
+    first = parser.parse_free_text_to_structured(texts[0])
+    assert parser.parse_free_text_to_structured(texts[0]) == first
+    assert list(parser.parse_many(texts, batch_size=2)) == [
+        parser.parse_free_text_to_structured(t, nlp=spacy.blank("en")) for t in texts
+    ]
+    assert cache.stats()["hits"] == 3
+
+
+def test_mongo_tier_falls_back_to_memory_when_unreachable(monkeypatch):
+    from realtor import cache as cache_module, db
+
+    def unreachable(name):
+        raise db.connection_error()
+
+    monkeypatch.setattr(cache_module, "_CACHE", None)
+    monkeypatch.setattr(cache_module, "settings", dataclasses.replace(cache_module.settings, parse_cache_mongo=True))
+    monkeypatch.setattr(db, "_get_collection", unreachable)
+
+    cache = cache_module.get_parse_cache("v1")
+    assert cache is not None and cache.collection is None
+    cache.put("text", {"price": 1.0})
+    assert cache.get("text") == {"price": 1.0}
+
+
+def test_default_cache_key_tracks_vocabulary_files(monkeypatch, tmp_path):
+    vocab = tmp_path / "amenities.txt"
+    vocab.write_text("sauna\n")
+    monkeypatch.setattr(parser, "settings", dataclasses.replace(parser.settings, amenity_vocab_paths=str(vocab)))
+    parser.data_files_digest.cache_clear()
+    first = parser.data_files_digest()
+
+    vocab.write_text("sauna\nwine cellar\n")
+    parser.data_files_digest.cache_clear()
+    try:
+        assert parser.data_files_digest() != first
+    finally:
+        monkeypatch.undo()
+        parser.data_files_digest.cache_clear()
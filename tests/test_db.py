@@ -0,0 +1,110 @@
+import pytest
+
+from realtor import db
+
+
+@pytest.fixture
+def fake_collections(fake_collections, monkeypatch, mongo_client):
+    monkeypatch.setattr(db, "_get_client", lambda: mongo_client)
+    # mongomock has no sessions or hello; exercise the standalone-server path
+    monkeypatch.setattr(db, "_SAVE_MODE", "sequential")
+    return fake_collections
+
+
+def test_ensure_indexes_is_idempotent(fake_collections):
+    _, structured = fake_collections
+    db.ensure_indexes()
+    first = structured.index_information()
+    db.ensure_indexes()
+
+    assert structured.index_information() == first
+    assert {"created_at_id_desc", "description_raw_id", "address_state_city_postal_code", "bedrooms_price"} <= set(first)
+
+
+def test_summarize_explain_flags_collection_scans_and_sorts():
+    covered = {
+        "queryPlanner": {
+            "winningPlan": {
+                "stage": "LIMIT",
+                "inputStage": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "created_at_desc"}},
+            }
+        }
+    }
+    scan = {"queryPlanner": {"winningPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}}}
+
+    assert db.summarize_explain(covered) == {
+        "stages": ["LIMIT", "FETCH", "IXSCAN"],
+        "indexes": ["created_at_desc"],
+        "uses_index": True,
+        "in_memory_sort": False,
+    }
+    assert db.summarize_explain(scan)["uses_index"] is False
+    assert db.summarize_explain(scan)["in_memory_sort"] is True
+
+
+def test_save_listing_links_documents_and_records_latency(fake_collections):
+    raw, structured = fake_collections
+
+    raw_id, structured_id = db.save_listing("3 beds in Austin", {"contact_name": "Ann", "bedrooms": 3})
+
+    doc = structured.find_one({"_id": db.ObjectId(structured_id)})
+    assert doc["description_raw_id"] == raw_id
+    assert raw.find_one({"_id": db.ObjectId(raw_id)})["text"] == "3 beds in Austin"
+    assert db.save_latency_stats()["count"] >= 1
+
+
+def test_save_listing_leaves_no_orphans(fake_collections, monkeypatch):
+    raw, structured = fake_collections
+
+    with pytest.raises(Exception):
+        db.save_listing("bad form", {"bedrooms": "three"})  # rejected by validation before any write
+
+    def failing_insert(doc):
+        raise db.PyMongoError("boom")
+
+    monkeypatch.setattr(structured, "insert_one", failing_insert)
+    with pytest.raises(db.PyMongoError):
+        db.save_listing("network blip", {"contact_name": "Ann"})
+
+    assert raw.count_documents({}) == 0
+
+
+def test_client_bulk_save_undoes_raw_insert_when_structured_fails(fake_collections, monkeypatch):
+    raw, structured = fake_collections
+
+    class HalfBulkClient:
+        def bulk_write(self, models, ordered):
+            # The raw insert lands, the structured insert fails
+            raw.insert_one(models[0]._doc)
+            details = {"anySuccessful": True, "nInserted": 1, "writeErrors": [{"idx": 1, "code": 11000}]}
+            raise db.ClientBulkWriteException(details, False)
+
+    monkeypatch.setattr(db, "_get_client", lambda: HalfBulkClient())
+    monkeypatch.setattr(db, "_SAVE_MODE", "client_bulk")
+    with pytest.raises(db.ClientBulkWriteException):
+        db.save_listing("Loft, 2 beds.", {"bedrooms": 2.0})
+
+    assert raw.count_documents({}) == structured.count_documents({}) == 0
+
+
+def test_query_listings_pages_with_keyset_cursor(fake_collections):
+    _, structured = fake_collections
+    created = db.datetime(2026, 5, 1, tzinfo=db.timezone.utc)
+    # Identical timestamps force the _id tie-breaker
+    for i in range(5):
+        structured.insert_one(
+            {"contact_name": f"seller {i}", "created_at": created, "price": 100000.0 * (i + 1), "bedrooms": i,
+             "address": {"city": "Austin", "state": "TX"}}
+        )
+    structured.insert_one({"contact_name": "elsewhere", "created_at": created, "address": {"city": "Reno", "state": "NV"}})
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = db.query_listings(limit=2, after=cursor, state="tx")
+        seen += [item["contact_name"] for item in page]
+        if cursor is None:
+            break
+    assert seen == [f"seller {i}" for i in reversed(range(5))]
+
+    page, _ = db.query_listings(limit=10, min_price=200000, max_price=400000, min_bedrooms=2)
+    assert [item["contact_name"] for item in page] == ["seller 3", "seller 2"]
@@ -0,0 +1,50 @@
+import pytest
+
+from realtor import db, dedup
+
+LISTING = (
+    "Charming 3 bedroom, 2 bath bungalow at 12 Oak St, Austin, TX 78701. Updated kitchen, hardwood floors, "
+    "fenced backyard and a two car garage. Asking $410,000. Call Ann Lee at 512-555-0100."
+)
+RESUBMITTED = LISTING.replace("Asking $410,000.", "Asking $405,000!").replace(", ", "  ,").upper()
+OTHER = "Downtown condo with pool and gym, 1 bed 1 bath, HOA $300/mo. Built in 1999. Email bob@example.com."
+
+
+def test_signature_similarity_tracks_jaccard():
+    a, b, c = dedup.signature(LISTING), dedup.signature(RESUBMITTED), dedup.signature(OTHER)
+
+    assert dedup.similarity(a, dedup.signature(LISTING)) == 1.0
+    assert dedup.similarity(a, b) > 0.7
+    assert dedup.similarity(a, c) < 0.2
+    assert (dedup.from_bytes(dedup.to_bytes(a)) == a).all()
+
+
+def test_lsh_index_only_scores_shared_buckets():
+    index = dedup.LSHIndex()
+    index.add("listing", dedup.signature(LISTING))
+    index.add("other", dedup.signature(OTHER))
+
+    match = index.best(dedup.signature(RESUBMITTED), threshold=0.7)
+    assert match is not None and match[0] == "listing"
+    assert index.best(dedup.signature("Vacant lot for sale, 2 acres, no utilities."), threshold=0.5) is None
+
+
+@pytest.fixture
+def fake_collections(fake_collections, monkeypatch, mongo_client):
+    monkeypatch.setattr(db, "_get_client", lambda: mongo_client)
+    # mongomock has no sessions or hello; exercise the standalone-server path
+    monkeypatch.setattr(db, "_SAVE_MODE", "sequential")
+    return fake_collections
+
+
+def test_find_near_duplicates_returns_the_stored_listing(fake_collections):
+    raw, _ = fake_collections
+    raw_id, structured_id = db.save_listing(LISTING, {"contact_name": "Ann Lee"})
+    db.save_listing(OTHER, {"contact_name": "Bob"})
+    raw.insert_one({"text": LISTING, "created_at": db.datetime.now(db.timezone.utc)})  # saved before dedup existed
+
+    found = db.find_near_duplicates(RESUBMITTED)
+
+    assert [m["raw_id"] for m in found] == [raw_id]
+    assert found[0]["listing"]["id"] == structured_id
+    assert db.find_near_duplicates("Vacant lot for sale, 2 acres, no utilities.") == []
@@ -0,0 +1,93 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from realtor import db, export
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def structured(fake_collections, monkeypatch):
+    raw, structured = fake_collections
+    monkeypatch.setattr(export, "collections", lambda: (raw, structured))
+    for i in range(5):
+        structured.insert_one(
+            {
+                "description_raw_id": f"r{i}",
+                "contact_name": f"Seller {i}",
+                "address": {"street": f"{i} Oak St", "city": "Austin", "state": "TX", "postal_code": "78701"},
+                "price": 100000.0 + i,
+                "amenities": ["pool", "garage"] if i % 2 else [],
+                "photos": ["a.jpg"],
+                "created_at": T0,
+                # two rows share a timestamp, so the watermark has to break ties on _id
+                "updated_at": T0 + timedelta(minutes=min(i, 3)),
+            }
+        )
+    return structured
+
+
+def test_csv_export_flattens_address_and_amenities(structured):
+    out = io.StringIO()
+    stats = export.export_listings(out, "csv", batch_size=2)
+
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert (stats.rows, stats.batches) == (5, 3)
+    assert list(rows[0]) == export.COLUMNS
+    assert rows[1]["address_city"] == "Austin" and rows[1]["address_street"] == "1 Oak St"
+    assert rows[1]["amenities"] == "pool;garage" and rows[0]["amenities"] == ""
+    assert rows[0]["updated_at"] == T0.isoformat()
+
+
+def test_incremental_export_resumes_after_watermark(structured):
+    first = export.export_listings(io.StringIO(), "jsonl", batch_size=2)
+    assert first.rows == 5
+
+    structured.update_one({"contact_name": "Seller 0"}, {"$set": {"updated_at": T0 + timedelta(hours=1)}})
+    out = io.StringIO()
+    second = export.export_listings(out, "jsonl", since=first.watermark)
+
+    assert [json.loads(line)["contact_name"] for line in out.getvalue().splitlines()] == ["Seller 0"]
+    assert export.export_listings(io.StringIO(), "jsonl", since=second.watermark).rows == 0
+
+    # A watermark inside a timestamp tie still picks up the remaining row
+    seller_3 = structured.find_one({"contact_name": "Seller 3"})
+    ties = export.export_listings(io.StringIO(), "jsonl", since=db.encode_cursor(seller_3["updated_at"], seller_3["_id"]))
+    assert ties.rows == 2
+
+
+def test_export_projection_keeps_id_and_updated_at(structured):
+    out = io.StringIO()
+    export.export_listings(out, "csv", projection=["price", "address"])
+
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert list(rows[0]) == ["id"] + [c for c in export.COLUMNS if c.startswith("address_")] + ["price", "updated_at"]
+    assert rows[2]["price"] == "100002.0" and rows[2]["address_city"] == "Austin"
+    with pytest.raises(ValueError):
+        export.export_listings(io.StringIO(), "csv", projection=["photos"])
+
+
+def test_since_accepts_an_iso_timestamp(structured):
+    out = io.StringIO()
+    stats = export.export_listings(out, "jsonl", since=(T0 + timedelta(minutes=2)).isoformat())
+
+    assert stats.rows == 2
+    assert {json.loads(line)["contact_name"] for line in out.getvalue().splitlines()} == {"Seller 3", "Seller 4"}
+    assert export.export_listings(io.StringIO(), "jsonl", since="2026-01-01").rows == 4
+
+
+def test_parquet_export_uses_typed_columns(structured, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "listings.parquet"
+
+    stats = export.export_listings(str(path), "parquet", batch_size=2)
+
+    table = pq.read_table(path)
+    assert stats.rows == table.num_rows == 5
+    assert table.schema.field("price").type == "double"
+    assert table.column("amenities").to_pylist()[1] == "pool;garage"
+    assert pq.ParquetFile(path).num_row_groups == 3
@@ -0,0 +1,54 @@
+import spacy
+
+from realtor import gazetteer, parser
+
+
+def test_zip3_state_ranges_and_state_names():
+    assert [gazetteer.state_for_zip(z) for z in ("62704", "78701", "02116", "05501", "20147", "99501-1234")] == [
+        "IL",
+        "TX",
+        "MA",
+        "MA",
+        "VA",
+        "AK",
+    ]
+    assert gazetteer.state_for_zip("00000") is None and gazetteer.state_for_zip("IL") is None
+    assert [gazetteer.normalize_state(s) for s in ("Illinois", "new york", "tx", "Ontario")] == ["IL", "NY", "TX", "Ontario"]
+
+
+def test_zip_table_reads_csv_and_geonames(tmp_path):
+    csv_path = tmp_path / "zips.csv"
+    csv_path.write_text("zip,primary_city,state\n62704,Springfield,IL\n2116,Boston,MA\n62704,Other,IL\n")
+    geonames_path = tmp_path / "US.txt"
+    geonames_path.write_text("US\t78701\tAustin\tTexas\tTX\tTravis\t453\t\t\t30.27\t-97.74\t4\n")
+
+    table = gazetteer.ZipTable.from_file(csv_path)
+    assert table.lookup("62704-0001") == ("Springfield", "IL")
+    assert table.lookup("02116") == ("Boston", "MA")
+    assert table.lookup("10001") is None
+    assert gazetteer.ZipTable.from_file(geonames_path).lookup("78701") == ("Austin", "TX")
+
+
+def test_address_normalized_and_checked_against_zip(monkeypatch):
+    monkeypatch.setattr(gazetteer, "zip_table", lambda: gazetteer.ZipTable([(62704, "Springfield", "IL")]))
+
+    filled = gazetteer.normalize_address({"street": "12 Oak St", "city": None, "state": None, "postal_code": "62704"})
+    assert (filled["city"], filled["state"]) == ("Springfield", "IL")
+    assert gazetteer.normalize_address({"state": "Texas", "postal_code": None})["state"] == "TX"
+
+    assert gazetteer.address_issues(filled) == []
+    assert gazetteer.address_issues({"city": "Chicago", "state": "IL", "postal_code": "62704"}) == [
+        "ZIP 62704 is Springfield, IL, not Chicago."
+    ]
+    assert gazetteer.address_issues({"city": "Austin", "state": "TX", "postal_code": "62704"}) == [
+        "ZIP 62704 is in IL, not TX."
+    ]
+
+
+def test_parse_flags_state_that_contradicts_zip():
+    text = "Condo at 12 Oak St, Austin, TX 62704. Asking $410,000."
+
+    data = parser.parse_free_text_to_structured(text, nlp=spacy.blank("en"))
+
+    assert data["address"]["state"] == "TX"
+    assert "ZIP 62704 is in IL, not TX." in data["notes"]
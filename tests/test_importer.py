@@ -0,0 +1,82 @@
+import io
+import json
+
+import pytest
+import spacy
+
+from realtor import db, importer, parser
+
+
+@pytest.fixture(autouse=True)
+def blank_nlp(monkeypatch):
+    monkeypatch.setattr(parser, "get_nlp", lambda *a, **k: spacy.blank("en"))
+
+
+def test_import_jsonl_links_raw_and_structured(fake_collections):
+    raw, structured = fake_collections
+    lines = [
+        json.dumps({"text": "3 beds, 2 baths at 12 Oak St, Austin, TX 78701. Asking $410,000."}),
+        json.dumps({"text": "   "}),
+        "not json",
+        json.dumps({"text": "Condo with pool, 1 bed, built in 1999."}),
+    ]
+    stream = io.StringIO("\n".join(lines))
+
+    stats = importer.import_descriptions(importer.iter_descriptions(stream, "jsonl"), batch_size=2)
+
+    assert (stats.rows_read, stats.rows_imported, stats.rows_skipped, stats.rows_failed) == (4, 2, 2, 0)
+    assert raw.count_documents({}) == 2
+    for doc in structured.find():
+        linked = raw.find_one({"_id": db.ObjectId(doc["description_raw_id"])})
+        assert linked is not None
+    assert structured.find_one({"bedrooms": 3.0})["price"] == pytest.approx(410000.0)
+
+
+def test_iter_descriptions_csv_uses_named_column():
+    stream = io.StringIO('id,description\n1,"Duplex, 4 beds"\n2,\n')
+    assert list(importer.iter_descriptions(stream, "csv", field="description")) == ["Duplex, 4 beds", None]
+
+
+def test_iter_descriptions_tsv_splits_on_tabs_and_checks_the_column():
+    assert importer.detect_format("listings.tsv") == "tsv"
+    stream = io.StringIO("id\tdescription\n1\tCondo, 2 beds\n")
+    assert list(importer.iter_descriptions(stream, "tsv", field="description")) == ["Condo, 2 beds"]
+    with pytest.raises(ValueError, match="'text'"):
+        list(importer.iter_descriptions(io.StringIO("id,description\n1,Condo\n"), "csv"))
+
+
+def test_import_skips_or_merges_near_duplicates(fake_collections):
+    raw, structured = fake_collections
+    text = (
+        "Charming 3 beds, 2 baths bungalow at 12 Oak St, Austin, TX 78701. Updated kitchen, hardwood floors, "
+        "fenced backyard with pool. Asking $410,000, call Ann Lee at 512-555-0100 to view."
+    )
+    db.save_listings_bulk([(text, {"bedrooms": 3.0, "amenities": ["pool"]})])
+    resubmitted = text.replace("$410,000", "$399,000")
+    fresh = "Downtown condo, 1 bed, HOA $300/mo. Built in 1999."
+
+    stats = importer.import_descriptions([resubmitted, fresh, fresh], on_duplicate="skip", threshold=0.7)
+    assert (stats.rows_imported, stats.rows_duplicate, stats.rows_merged) == (1, 2, 0)
+    assert raw.count_documents({}) == 2
+
+    stats = importer.import_descriptions([resubmitted], on_duplicate="merge", threshold=0.7)
+    assert (stats.rows_imported, stats.rows_duplicate, stats.rows_merged) == (0, 1, 1)
+    merged = structured.find_one({"bedrooms": 3.0})
+    assert merged["price"] == pytest.approx(399000.0)
+    assert merged["duplicate_count"] == 1
+    assert raw.count_documents({}) == 2
+
+
+def test_import_counts_only_rows_with_both_documents(fake_collections):
+    raw, structured = fake_collections
+    # Duplicate keys make one raw insert and one structured insert fail inside the same batch
+    raw.create_index("text", unique=True)
+    structured.create_index("price", unique=True)
+    texts = ["Loft for $300,000.", "Loft for $300,000.", "Cabin for $250,000.", "Ranch for $250,000."]
+
+    stats = importer.import_descriptions(texts)
+
+    assert (stats.rows_imported, stats.rows_failed) == (2, 2)
+    assert raw.count_documents({}) == structured.count_documents({}) == 2
+    for doc in structured.find():
+        assert raw.find_one({"_id": db.ObjectId(doc["description_raw_id"])}) is not None
@@ -0,0 +1,33 @@
+from realtor import parser
+from realtor.keywords import KeywordMatcher, build_matcher, tokenize
+
+
+def test_matches_respect_word_boundaries():
+    tokens = tokenize("Big back yard on 2 acres, AC and walk in closets.")
+    found = parser.amenity_matcher().find_all(tokens)
+    assert found == {"ac", "walk-in closet"}
+
+
+def test_plurals_and_overlapping_terms():
+    tokens = tokenize("Two pools, balconies and central air conditioning.")
+    assert parser.amenity_matcher().find_all(tokens) == {"pool", "balcony", "central air", "air conditioning"}
+    # A precomputed token set gives the same matches
+    assert parser.amenity_matcher().find_all(tokens, set(tokens)) == parser.amenity_matcher().find_all(tokens)
+    tokens = tokenize("Central heat, fresh air")
+    assert parser.amenity_matcher().find_all(tokens, set(tokens)) == set()
+
+
+def test_property_type_prefers_vocabulary_order():
+    matcher = KeywordMatcher([("condo", "condo"), ("townhouse", "townhouse")])
+    assert matcher.first_by_rank(tokenize("A townhouse-style condo")) == "condo"
+    assert matcher.first_by_rank(tokenize("Nothing here")) is None
+
+
+def test_vocabulary_file_extends_builtin_terms(tmp_path):
+    vocab = tmp_path / "amenities.txt"
+    vocab.write_text("# extra amenities\nsolar panels: solar, pv system\nwine cellar\n\n", encoding="utf-8")
+
+    matcher = build_matcher(["pool"], [str(vocab)])
+
+    assert len(matcher) == 3
+    assert matcher.find_all(tokenize("New PV system, pool and a wine cellar")) == {"solar panels", "pool", "wine cellar"}
@@ -0,0 +1,74 @@
+import urllib.request
+
+import pytest
+import spacy
+import usaddress
+
+from realtor import metrics, parser
+
+
+@pytest.fixture
+def sink():
+    recorder = metrics.MemorySink()
+    metrics.configure(recorder)
+    yield recorder
+    metrics.configure(None)
+
+
+def test_disabled_spans_record_nothing():
+    metrics.configure(None)
+    with metrics.span("realtor_test", op="x"):
+        pass
+    metrics.incr("realtor_test_total")
+    assert metrics.span("realtor_test") is metrics.span("realtor_other")
+
+
+def test_parse_records_per_extractor_spans(sink):
+    parser.parse_free_text_to_structured("3 beds at 12 Oak St, Austin, TX 78701. Call 512-555-0100.", nlp=spacy.blank("en"))
+
+    for extractor in ("spacy", "regex", "phonenumbers", "usaddress"):
+        assert len(sink.values("realtor_extractor_seconds", extractor=extractor)) == 1
+    assert len(sink.values("realtor_parse_seconds")) == 1
+
+
+def test_span_counts_errors(sink):
+    with pytest.raises(RuntimeError):
+        with metrics.span("realtor_mongo", op="save_listing"):
+            raise RuntimeError("down")
+
+    assert sink.count("realtor_mongo_errors_total", op="save_listing") == 1
+    assert len(sink.values("realtor_mongo_seconds", op="save_listing")) == 1
+
+
+def test_repeated_label_fallback_is_counted(sink, monkeypatch):
+    def tag(window):
+        raise usaddress.RepeatedLabelError(window, [], "AddressNumber")
+
+    monkeypatch.setattr(usaddress, "tag", tag)
+    parser._tag_address_window.cache_clear()
+    text = "12 Oak St, Austin, TX"
+    assert len(parser.address_candidate_spans(text)) == 1
+    # The second parse is served by the tagger cache and still counted
+    for _ in range(2):
+        assert parser.extract_address(text)["street"] is None
+    parser._tag_address_window.cache_clear()
+
+    assert sink.count("realtor_address_repeated_label_total") == 2
+
+
+def test_prometheus_text_endpoint():
+    prom = metrics.PrometheusSink(buckets=(0.01, 0.1))
+    prom.incr("realtor_parse_errors_total", 2, ())
+    prom.observe("realtor_mongo_seconds", 0.05, (("op", "query_listings"),))
+    prom.observe("realtor_mongo_seconds", 0.5, (("op", "query_listings"),))
+    server = metrics.serve_prometheus(prom, 0, host="127.0.0.1")
+    try:
+        body = urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics").read().decode()
+    finally:
+        server.shutdown()
+
+    assert "# TYPE realtor_parse_errors_total counter\nrealtor_parse_errors_total 2" in body
+    assert 'realtor_mongo_seconds_bucket{op="query_listings",le="0.01"} 0' in body
+    assert 'realtor_mongo_seconds_bucket{op="query_listings",le="0.1"} 1' in body
+    assert 'realtor_mongo_seconds_bucket{op="query_listings",le="+Inf"} 2' in body
+    assert 'realtor_mongo_seconds_count{op="query_listings"} 2' in body
@@ -1,7 +1,31 @@
+import threading
+
 import pytest
+import spacy
 
+from realtor import parser
 from realtor.parser import parse_free_text_to_structured
 
+requires_model = pytest.mark.skipif(
+    not spacy.util.is_package(parser.DEFAULT_SPACY_MODEL),
+    reason=f"spaCy model {parser.DEFAULT_SPACY_MODEL} is not installed",
+)
+
+PARITY_TEXTS = [
+    (
+        "John Doe is selling a single family home at 123 Main St, Springfield, IL 62704. "
+        "Asking $350,000 with 3 bedrooms and 2.5 bathrooms, about 1,850 sqft. "
+        "Built in 1994. HOA fees $200. Call (217) 555-1212 or email john@example.com. "
+        "Includes a garage and hardwood floors. Lot is 0.25 acres."
+    ),
+    (
+        "Maria Garcia wants to list her condo at 45 Ocean Ave Unit 7, Miami, FL 33139 for $615,000. "
+        "2 beds, 2 baths, 1,100 square feet, balcony, pool and gym. HOA $450 per month. "
+        "Reach her at 305-555-0188."
+    ),
+    "Townhouse for sale, 4 bedrooms, built in 2008, fenced garden and a deck. Price $499,900.",
+]
+
 
 def test_basic_parse_example():
     text = (
@@ -27,3 +51,188 @@ def test_basic_parse_example():
     assert addr["state"] == "IL"
 
     assert any(am in data["amenities"] for am in ["garage", "hardwood"])
+
+
+def test_nlp_registry_loads_model_once(monkeypatch):
+    calls = []
+
+    def fake_load(model, minimal=False):
+        calls.append(model)
+        return spacy.blank("en")
+
+    monkeypatch.setattr(parser, "ensure_spacy_model", fake_load)
+    parser.reset_nlp_cache()
+    try:
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(parser.get_nlp())) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert calls == [parser.DEFAULT_SPACY_MODEL]
+        assert all(nlp is results[0] for nlp in results)
+
+        stats = parser.warm_up()
+        assert calls == [parser.DEFAULT_SPACY_MODEL]
+        assert stats["load_seconds"] >= 0
+    finally:
+        parser.reset_nlp_cache()
+
+
+def test_minimal_pipeline_excludes_unused_components(tmp_path):
+    nlp = spacy.blank("en")
+    nlp.add_pipe("tagger").add_label("NN")
+    nlp.add_pipe("ner").add_label("PERSON")
+    nlp.initialize()
+    nlp.to_disk(tmp_path)
+
+    assert parser.minimal_pipeline_exclude(str(tmp_path)) == ["tagger"]
+    assert parser.ensure_spacy_model(str(tmp_path), minimal=True).pipe_names == ["ner"]
+
+
+@requires_model
+@pytest.mark.parametrize("text", PARITY_TEXTS)
+def test_minimal_pipeline_parity(text):
+    full = parser.get_nlp(minimal=False)
+    minimal = parser.get_nlp(minimal=True)
+    assert set(minimal.pipe_names) < set(full.pipe_names)
+
+    assert parse_free_text_to_structured(text, nlp=minimal) == parse_free_text_to_structured(text, nlp=full)
+
+
+def test_parse_many_streams_results_in_order():
+    nlp = spacy.blank("en")
+    texts = iter(PARITY_TEXTS)
+
+    results = parser.parse_many(texts, batch_size=2, nlp=nlp)
+
+    assert not isinstance(results, list)
+    assert list(results) == [parse_free_text_to_structured(t, nlp=nlp) for t in PARITY_TEXTS]
+
+
+def test_scan_text_fills_fields_in_one_pass():
+    text = (
+        "HOA fees $150/mo. Listed at $300,000: 2 bed, 1.5 baths, 1,850 sqft on a 10890 sq ft lot, "
+        "built in 2003. Carport. Reach a.b+c@example.co or jane@example.com."
+    )
+
+    scanned = parser.scan_text(text)
+
+    assert scanned["email"] == "a.b+c@example.co"
+    # The HOA amount is the first "$" amount, matching the old CURRENCY_RE.search fallback
+    assert scanned["currency"] == pytest.approx(150.0)
+    assert scanned["hoa_fees"] == pytest.approx(150.0)
+    assert (scanned["bedrooms"], scanned["bathrooms"]) == (2.0, 1.5)
+    assert scanned["square_feet"] == pytest.approx(1850.0)
+    assert scanned["lot_size"] == "1850 sqft"
+    assert scanned["year_built"] == 2003
+    assert scanned["parking"] == "carport"
+    assert parser.extract_email(text) == scanned["email"]
+    assert parser.extract_bed_bath_sqft(text)["square_feet"] == scanned["square_feet"]
+
+    # The price fallback reads the whole HOA "$" amount, like CURRENCY_RE
+    for hoa_text, price in (("HOA $1,200 monthly", 1200.0), ("HOA fees: $ 350,000", 350000.0), ("HOA $12345", 123.0)):
+        assert parser.scan_text(hoa_text)["currency"] == pytest.approx(price)
+        assert float(parser.CURRENCY_RE.search(hoa_text).group(1).replace(",", "")) == pytest.approx(price)
+
+    # "built" followed by an area, not a year
+    custom = parser.scan_text("Custom built 2400 sqft home")
+    assert custom["square_feet"] == pytest.approx(2400.0)
+    assert (custom["lot_size"], custom["year_built"]) == ("2400 sqft", None)
+
+
+def test_address_extracted_from_candidate_span_in_long_text():
+    text = (
+        "We have 3 kids and 2 dogs and love this house. " * 10
+        + "The home is at 742 Evergreen Terrace, Springfield, IL 62704. "
+        + "Close to 4 parks, 2 schools and 12 restaurants. " * 10
+    )
+
+    spans = parser.address_candidate_spans(text)
+    assert all(end - start <= parser.ADDRESS_WINDOW_CHARS for start, end, _ in spans)
+    assert parser.extract_address(text) == {
+        "street": "742 Evergreen Terrace",
+        "city": "Springfield",
+        "state": "IL",
+        "postal_code": "62704",
+    }
+
+
+def test_closest_house_number_is_tried_first():
+    text = "Walk to 5 parks from 12 Oak St, Austin, TX 78701."
+    start, end, anchored = parser.address_candidate_spans(text)[0]
+    assert text[start:end] == "12 Oak St, Austin, TX 78701" and anchored
+    assert parser.extract_address(text)["street"] == "12 Oak St"
+
+
+def test_unanchored_street_does_not_guess_city():
+    addr = parser.extract_address("Nice place. 12 Oak St. Great school district.")
+    assert addr["street"] == "12 Oak St."
+    assert addr["city"] is None and addr["state"] is None
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Cozy 3 bedroom ranch with 2 baths and a big yard.",
+        "Nice home, 2 car garage, 1 acre lot.",
+        "Custom built 2400 sqft home",
+        "Price $1,200,000. 4 bedrooms. Zip 90210. State CA.",
+    ],
+)
+def test_measurements_are_not_streets(text):
+    data = parse_free_text_to_structured(text, nlp=spacy.blank("en"))
+    assert data["address"]["street"] is None and data["address"]["city"] is None
+    assert "Address not confidently detected." in data["notes"]
+
+
+def test_split_segments_keeps_abbreviations_and_addresses_together():
+    text = "Mr. Lee lists 12 Oak St. Austin, TX 78701.\n\nAsking $410,000! 3 beds; 2 baths.  "
+
+    assert parser.split_segments(text) == [
+        "Mr. Lee lists 12 Oak St. Austin, TX 78701.",
+        "Asking $410,000!",
+        "3 beds;",
+        "2 baths.",
+    ]
+
+
+def test_merged_segments_match_whole_text_parse():
+    nlp = spacy.blank("en")
+    text = PARITY_TEXTS[0]
+
+    segments = parser.split_segments(text)
+    merged = parser.merge_segment_results(parser.parse_many(segments, nlp=nlp))
+    whole = parse_free_text_to_structured(text, nlp=nlp)
+
+    for key in ("price", "bedrooms", "bathrooms", "square_feet", "year_built", "hoa_fees", "phone", "email", "address"):
+        assert merged[key] == whole[key], key
+    assert set(merged["amenities"]) == set(whole["amenities"])
+    assert merged["notes"] == whole["notes"]
+
+
+def test_extract_phones_returns_every_number_with_type(monkeypatch):
+    text = "Call (217) 555-0134 or +1 800-555-0100. Price $350,000, 1,850 sqft, built 1994, ZIP 62704."
+
+    assert [span for span in parser.phone_candidate_spans(text)] == [(5, 19), (23, 38)]
+    phones = parser.extract_phones(text)
+    assert [p["number"] for p in phones] == ["+12175550134", "+18005550100"]
+    assert phones[1]["type"] == "toll_free"
+    assert parser.extract_phone(text) == "+12175550134"
+
+    # Unicode dashes and spaces, and full-width digits
+    for number in (
+        "217\u2013555\u20131212",
+        "217\u2011555\u20111212",
+        "+1\xa0217\xa0555\xa01212",
+        "217\u202f555\u202f1212",
+        "\uff12\uff11\uff17\uff0d\uff15\uff15\uff15\uff0d\uff11\uff12\uff11\uff12",
+    ):
+        assert [p["number"] for p in parser.extract_phones(f"Call {number} today")] == ["+12175551212"]
+
+    # Text without a candidate digit run never reaches phonenumbers
+    import phonenumbers
+
+    monkeypatch.setattr(phonenumbers, "PhoneNumberMatcher", None)
+    assert parser.extract_phones("Lovely home, 3 beds, $450,000, built in 1994. " * 50) == []
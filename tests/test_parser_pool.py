@@ -0,0 +1,82 @@
+import threading
+import time
+from concurrent.futures import wait
+
+import pytest
+import spacy
+
+from realtor import importer, parser
+
+TEXT = "3 beds, 2 baths at 12 Oak St, Austin, TX 78701. Asking $410,000. Call 512-555-0100."
+
+
+@pytest.fixture(scope="module")
+def blank_model(tmp_path_factory):
+    # A pipeline on disk that spawned workers can load without downloading anything
+    path = tmp_path_factory.mktemp("model") / "blank_en"
+    spacy.blank("en").to_disk(path)
+    return str(path)
+
+
+def test_process_pool_parses_in_order(blank_model):
+    with parser.ParserPool(workers=2, model=blank_model, minimal=False) as pool:
+        pool.warm()
+        assert pool.parse(TEXT)["bedrooms"] == 3.0
+        results = list(pool.map([TEXT.replace("3 beds", f"{n} beds") for n in range(1, 8)], chunk_size=2))
+
+    assert [r["bedrooms"] for r in results] == [float(n) for n in range(1, 8)]
+    with pytest.raises(RuntimeError):
+        pool.submit(TEXT)
+
+
+def test_back_pressure_and_timeouts(blank_model, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(parser, "_worker_parse", lambda text: release.wait(5) and {"text": text})
+    pool = parser.ParserPool(workers=1, max_pending=2, model=blank_model, minimal=False, processes=False)
+    try:
+        first, second = pool.submit("a"), pool.submit("b")
+        with pytest.raises(parser.ParserPoolFull):
+            pool.submit("c", block=False)
+        with pytest.raises(parser.ParserPoolFull):
+            pool.submit("c", timeout=0.05)
+        release.set()
+        assert (first.result(5), second.result(5)) == ({"text": "a"}, {"text": "b"})
+
+        release.clear()
+        with pytest.raises(TimeoutError):
+            pool.parse("d", timeout=0.05)
+        release.set()
+        # The abandoned task still held its slot until it finished; afterwards the pool is usable again
+        assert pool.parse("e", timeout=5) == {"text": "e"}
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+def test_timed_out_task_frees_its_worker_and_slot(blank_model):
+    pool = parser.ParserPool(workers=1, max_pending=2, model=blank_model, minimal=False)
+    try:
+        # A task that outlives any caller: it holds the only worker
+        executor, stuck = pool._submit(time.sleep, 60, True, None)
+        with pytest.raises(TimeoutError):
+            pool.parse(TEXT, timeout=0.5)
+        # The old workers were killed, so the stuck task ended and gave its slot back
+        wait([stuck], timeout=10)
+        assert stuck.done() and pool._executor is not executor
+        futures = [pool.submit(TEXT, block=False) for _ in range(2)]
+        assert [f.result(60)["bedrooms"] for f in futures] == [3.0, 3.0]
+    finally:
+        pool.shutdown()
+
+
+def test_importer_parses_through_the_pool(blank_model, monkeypatch):
+    saved = []
+    monkeypatch.setattr(importer, "save_listings_bulk", lambda items: saved.extend(items) or [("r", "s")] * len(items))
+    pool = parser.ParserPool(workers=2, model=blank_model, minimal=False, processes=False)
+    try:
+        stats = importer.import_descriptions([TEXT, "", "Condo, 1 bed."], batch_size=2, pool=pool)
+    finally:
+        pool.shutdown()
+
+    assert stats.rows_imported == 2
+    assert [data["bedrooms"] for _, data in saved] == [3.0, 1.0]
@@ -0,0 +1,72 @@
+import dataclasses
+
+import pytest
+
+from realtor import bench, db, rawstore
+
+pytest.importorskip("zstandard")
+
+
+@pytest.fixture
+def fake_mongo(fake_collections, monkeypatch, mongo_client):
+    raw, _ = fake_collections
+    monkeypatch.setattr(rawstore, "dictionary_collection", lambda: mongo_client.realtor.raw_dictionaries)
+    monkeypatch.setattr(rawstore, "_DICTS", {})
+    monkeypatch.setattr(rawstore, "_ACTIVE", {})
+    monkeypatch.setattr(rawstore, "_LOCAL", rawstore.threading.local())
+    return raw, mongo_client.realtor.raw_dictionaries
+
+
+def test_dictionary_compression_round_trips_and_saves_space(fake_mongo):
+    texts = [item["text"] for item in bench.generate_corpus(per_size=100, seed=3)]
+    dictionary = rawstore.train_dictionary(texts[::2], size=8 * 1024)
+    dict_id = rawstore.store_dictionary(dictionary, samples=len(texts) // 2)
+
+    # A fresh process only has the id stored on the document; the dictionary comes from Mongo
+    rawstore._DICTS.clear()
+    rawstore._LOCAL.codecs = {}
+    plain = with_dict = 0
+    for text in texts[1::2]:
+        fields = rawstore.compress_text(text, rawstore.active_dictionary())
+        assert fields["text_dict"] == dict_id and fields["text_size"] == len(text.encode("utf-8"))
+        assert rawstore.raw_text(fields) == text
+        plain += len(rawstore.compress_text(text)["text_z"])
+        with_dict += len(fields["text_z"])
+    assert with_dict < 0.7 * plain
+    assert rawstore.raw_text({"text": "plain"}) == "plain"
+
+
+def test_active_dictionary_picks_up_one_trained_elsewhere(fake_mongo, monkeypatch):
+    _, dictionaries = fake_mongo
+    clock = [100.0]
+    monkeypatch.setattr(rawstore.time, "monotonic", lambda: clock[0])
+    assert rawstore.active_dictionary() is None
+
+    # Another process trains and stores a dictionary; this one sees it after the recheck interval
+    texts = [item["text"] for item in bench.generate_corpus(per_size=50, seed=5)]
+    dictionary = rawstore.train_dictionary(texts, size=8 * 1024)
+    dictionaries.insert_one(
+        {"_id": dictionary.dict_id(), "data": dictionary.as_bytes(), "created_at": db.datetime.now(db.timezone.utc)}
+    )
+    assert rawstore.active_dictionary() is None
+
+    clock[0] += rawstore.ACTIVE_RECHECK_SECONDS
+    assert rawstore.active_dictionary().dict_id() == dictionary.dict_id()
+
+
+def test_raw_documents_follow_raw_compression_setting(fake_mongo, monkeypatch):
+    raw, _ = fake_mongo
+    text = "Condo at 12 Oak St, Austin, TX 78701. Asking $410,000."
+    monkeypatch.setattr(rawstore, "settings", dataclasses.replace(rawstore.settings, raw_compression="zstd"))
+
+    raw_id = db.save_raw_description(text)
+
+    doc = raw.find_one({"_id": db.ObjectId(raw_id)})
+    assert "text" not in doc and doc["text_dict"] is None
+    assert rawstore.raw_text(doc) == text
+    # Fingerprints come from the plain text, so near-duplicate detection is unaffected
+    assert doc["minhash_bands"] == db.fingerprint(text)["minhash_bands"]
+
+    monkeypatch.setattr(rawstore, "settings", dataclasses.replace(rawstore.settings, raw_compression="lz4"))
+    with pytest.raises(ValueError):
+        db.raw_document(text)
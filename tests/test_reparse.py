@@ -0,0 +1,114 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from realtor import db, reparse
+from realtor.parser import PARSER_VERSION
+
+
+@pytest.fixture
+def fake_collections(fake_collections, monkeypatch, mongo_client):
+    raw, structured = fake_collections
+    jobs = mongo_client.realtor.jobs
+    monkeypatch.setattr(reparse, "collections", lambda: (raw, structured))
+    monkeypatch.setattr(reparse, "checkpoint_collection", lambda: jobs)
+    return raw, structured, jobs
+
+
+def test_reparse_update_keeps_hand_edited_fields():
+    existing = {"_id": 1, "edited_fields": ["price", "address.city"], "parser_version": "1"}
+    parsed = {
+        "price": 410000.0,
+        "bedrooms": 3.0,
+        "address": {"street": "12 Oak St", "city": "Austin", "state": "TX"},
+        "parser_version": PARSER_VERSION,
+    }
+    now = datetime.now(timezone.utc)
+
+    update = reparse.reparse_update(existing, parsed, now)["$set"]
+
+    assert "price" not in update and "address.city" not in update
+    assert update["bedrooms"] == 3.0
+    assert (update["address.street"], update["address.state"]) == ("12 Oak St", "TX")
+    # A note the new parser no longer emits is cleared rather than left stale
+    assert update["notes"] is None
+    assert (update["parser_version"], update["updated_at"]) == (PARSER_VERSION, now)
+
+
+def test_raw_batches_resume_from_checkpoint(fake_collections):
+    raw, _, jobs = fake_collections
+    raw.insert_many([{"text": f"listing {i}"} for i in range(5)])
+    ids = [doc["_id"] for doc in raw.find().sort("_id", 1)]
+
+    assert [len(b) for b in reparse.iter_raw_batches(batch_size=2)] == [2, 2, 1]
+
+    reparse.save_checkpoint(ids[1], scanned=2, updated=1)
+    reparse.save_checkpoint(ids[3], scanned=2, updated=2)
+    assert reparse.load_checkpoint() == ids[3]
+    assert jobs.find_one({"_id": reparse.checkpoint_id()})["scanned"] == 4
+    resumed = [doc["_id"] for batch in reparse.iter_raw_batches(reparse.load_checkpoint(), 2) for doc in batch]
+    assert resumed == ids[4:]
+
+    # Checkpoints are per parser version
+    assert reparse.load_checkpoint("0") is None
+    reparse.clear_checkpoint()
+    assert reparse.load_checkpoint() is None
+
+
+def test_merge_listing_skips_edited_fields(fake_collections):
+    _, structured, _ = fake_collections
+    structured.insert_one(
+        {"description_raw_id": "r1", "price": 500000.0, "bedrooms": 2.0, "edited_fields": ["price"], "amenities": []}
+    )
+
+    assert db.merge_listing("r1", {"price": 410000.0, "bedrooms": 3.0, "amenities": ["pool"]})
+
+    doc = structured.find_one({"description_raw_id": "r1"})
+    assert (doc["price"], doc["bedrooms"], doc["amenities"]) == (500000.0, 3.0, ["pool"])
+
+
+def test_reparse_skips_current_listings_and_marks_done(fake_collections, monkeypatch):
+    raw, structured, jobs = fake_collections
+    monkeypatch.setattr(reparse, "parse_many", lambda texts, **kw: iter(()))
+    raw_ids = raw.insert_many([{"text": "current"}, {"text": "orphan"}]).inserted_ids
+    structured.insert_one({"description_raw_id": str(raw_ids[0]), "parser_version": PARSER_VERSION})
+
+    stats = reparse.reparse_listings(batch_size=10)
+
+    assert (stats.scanned, stats.updated, stats.current, stats.orphaned) == (2, 0, 1, 1)
+    checkpoint = jobs.find_one({"_id": reparse.checkpoint_id()})
+    assert checkpoint["done"] and checkpoint["last_id"] == raw_ids[1]
+
+
+def test_reparse_update_only_fills_empty_fields_of_untracked_rows():
+    legacy = {"_id": 1, "price": 500000.0, "contact_name": "Ann", "bedrooms": None, "address": {"city": "Austin"}}
+    parsed = {
+        "price": None,
+        "contact_name": None,
+        "bedrooms": 3.0,
+        "address": {"street": "12 Oak St", "city": "Dallas"},
+        "parser_version": PARSER_VERSION,
+    }
+    now = datetime.now(timezone.utc)
+
+    update = reparse.reparse_update(legacy, parsed, now)["$set"]
+
+    # parser_version stays stale: the row's other fields were not rewritten
+    assert update == {"bedrooms": 3.0, "address.street": "12 Oak St", "updated_at": now, "reparsed_at": now}
+    assert reparse.reparse_update(legacy, {"price": None}, now)["$set"] == {"reparsed_at": now}
+    overwritten = reparse.reparse_update(legacy, parsed, now, overwrite_legacy=True)["$set"]
+    assert overwritten["price"] is None and overwritten["address.city"] == "Dallas"
+
+
+def test_reparse_corrects_bulk_imported_rows(fake_collections):
+    raw, structured, _ = fake_collections
+    stale = {"square_feet": 850.0, "parser_version": "4"}
+    [(_, structured_id)] = db.save_listings_bulk([("3 beds, 1,850 sqft.", stale)])
+    listing = structured.find_one({"_id": db.ObjectId(structured_id)})
+    assert listing["edited_fields"] == []
+
+    parsed = {"square_feet": 1850.0, "bedrooms": 3.0, "parser_version": PARSER_VERSION}
+    structured.update_one({"_id": listing["_id"]}, reparse.reparse_update(listing, parsed, datetime.now(timezone.utc)))
+
+    doc = structured.find_one({"_id": listing["_id"]})
+    assert (doc["square_feet"], doc["bedrooms"], doc["parser_version"]) == (1850.0, 3.0, PARSER_VERSION)
@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from realtor import db, search
+
+
+@pytest.fixture
+def fake_collections(fake_collections, monkeypatch):
+    raw, structured = fake_collections
+    monkeypatch.setattr(search, "collections", lambda: (raw, structured))
+    created = datetime(2026, 5, 1, tzinfo=timezone.utc)
+    rows = [
+        ("condo", "Austin", 2.0, 310000.0),
+        ("condo", "Austin", 1.0, 95000.0),
+        ("townhouse", "Dallas", 3.0, 520000.0),
+        (None, "Austin", None, None),
+    ]
+    structured.insert_many(
+        [
+            {"property_type": t, "address": {"city": c, "state": "TX"}, "bedrooms": b, "price": p, "created_at": created}
+            for t, c, b, p in rows
+        ]
+    )
+    return raw, structured
+
+
+def test_facets_without_keyword(fake_collections):
+    found = search.search_listings(state="TX", limit=2)
+
+    assert found["total"] == 4
+    assert len(found["results"]) == 2
+    facets = found["facets"]
+    assert facets["property_type"] == [{"value": "condo", "count": 2}, {"value": "townhouse", "count": 1}]
+    assert facets["city"][0] == {"value": "Austin", "count": 3}
+    assert {"value": "$250,000-$500,000", "count": 1} in facets["price"]
+    assert {"value": "unknown", "count": 1} in facets["price"]
+
+
+def test_keyword_search_uses_text_score():
+    pipeline = search.build_search_pipeline({"$text": {"$search": "pool"}}, text_search=True)
+
+    assert pipeline[0] == {"$match": {"$text": {"$search": "pool"}}}
+    assert pipeline[1] == {"$addFields": {"score": {"$meta": "textScore"}}}
+    assert next(iter(pipeline[2]["$facet"]["results"][0]["$sort"])) == "score"
+
+
+def test_text_indexes_are_declared():
+    names = {index.document["name"] for index in db.STRUCTURED_INDEXES + db.RAW_INDEXES}
+    assert {"listing_text_search", "text_search"} <= names
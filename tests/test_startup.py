@@ -0,0 +1,32 @@
+import re
+import subprocess
+import sys
+
+# Cumulative `python -X importtime` budget for the modules CLIs and parse workers start from.
+# They measure ~30-300ms locally; spaCy alone is ~1s, so an eager heavy import blows the budget.
+IMPORT_BUDGET_US = {"realtor": 100_000, "realtor.parser": 400_000, "realtor.importer": 1_000_000}
+HEAVY = ("spacy", "flet", "usaddress", "phonenumbers")
+
+
+def _run(code, *flags):
+    return subprocess.run([sys.executable, *flags, "-c", code], capture_output=True, text=True, check=True)
+
+
+def test_heavy_libraries_load_on_first_use():
+    out = _run(
+        "import sys, realtor, realtor.config, realtor.parser, realtor.importer, realtor.search\n"
+        f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    ).stdout.strip()
+    assert out == ""
+
+    out = _run("import sys, realtor.config; print('dotenv' in sys.modules)").stdout.strip()
+    assert out == "False"
+
+
+def test_import_time_budget():
+    for module, budget in IMPORT_BUDGET_US.items():
+        stderr = _run(f"import {module}", "-X", "importtime").stderr
+        cumulative = [
+            int(m.group(1)) for m in re.finditer(rf"^import time:\s+\d+ \|\s+(\d+) \| {re.escape(module)}$", stderr, re.M)
+        ]
+        assert cumulative and cumulative[-1] < budget, f"import {module} took {cumulative}us (budget {budget}us)"